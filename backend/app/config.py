@@ -15,3 +15,27 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(
         minutes=int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES_MIN", "10080"))
     )
+
+    SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+    SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", "300"))
+    # doc-range shards of the main index, scored in parallel per query
+    SEARCH_INDEX_SHARDS = int(os.getenv("SEARCH_INDEX_SHARDS", "1"))
+
+    # friend presence cache: friend lists change rarely, online status quickly
+    FRIEND_LIST_TTL_SECONDS = int(os.getenv("FRIEND_LIST_TTL_SECONDS", "21600"))
+    FRIEND_PRESENCE_TTL_SECONDS = int(os.getenv("FRIEND_PRESENCE_TTL_SECONDS", "60"))
+    FRIEND_PRESENCE_MAX_STALE_SECONDS = int(os.getenv("FRIEND_PRESENCE_MAX_STALE_SECONDS", "900"))
+
+    # metadata sync: each upstream is polled at its own quota, by a pool of fetch workers
+    STEAMSPY_REQUESTS_PER_SECOND = float(os.getenv("STEAMSPY_REQUESTS_PER_SECOND", "1"))
+    STEAM_STORE_REQUESTS_PER_SECOND = float(os.getenv("STEAM_STORE_REQUESTS_PER_SECOND", "0.66"))
+    METADATA_SYNC_WORKERS = int(os.getenv("METADATA_SYNC_WORKERS", "8"))
+    # queued appids are claimed, committed and indexed in batches of this size
+    METADATA_SYNC_COMMIT_BATCH = int(os.getenv("METADATA_SYNC_COMMIT_BATCH", "50"))
+    # a claimed batch not finished within the lease is taken over by another runner
+    SYNC_CLAIM_LEASE_SECONDS = int(os.getenv("SYNC_CLAIM_LEASE_SECONDS", "1800"))
+    # catalog rows written by a sync are fetched again by a user's sync after this long
+    CATALOG_REFRESH_SECONDS = int(os.getenv("CATALOG_REFRESH_SECONDS", str(30 * 24 * 3600)))
+    # the first gunicorn worker to take the runner lock runs the queue runner; set this to 0
+    # when scripts/run_sync_worker.py runs it instead, or when several hosts share the database
+    SYNC_WORKER_IN_PROCESS = os.getenv("SYNC_WORKER_IN_PROCESS", "1") == "1"
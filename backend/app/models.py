@@ -61,3 +61,36 @@ class UserContextLog(db.Model):
     platform = db.Column(db.String(16), nullable=False)  # windows/mac/linux
     social_mode = db.Column(db.String(16), nullable=False)  # solo/social/any
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class SyncJob(db.Model):
+    """
+    Metadata sync for one user's library. Progress is the user's owned appids
+    still waiting in metadata_fetch_queue; kept in the DB so every worker sees it.
+    """
+    __tablename__ = "sync_jobs"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    steamid = db.Column(db.String(32), index=True, nullable=False)
+    state = db.Column(db.String(16), nullable=False, default="running")  # running/done
+    total = db.Column(db.Integer, nullable=False, default=0)
+    remaining = db.Column(db.Integer, nullable=False, default=0)
+    owned = db.Column(db.Integer, nullable=False, default=0)  # games imported by the sync
+    created_at = db.Column(db.BigInteger, nullable=False)
+    updated_at = db.Column(db.BigInteger, nullable=False)
+    finished_at = db.Column(db.BigInteger, nullable=True)
+
+class MetadataFetchTask(db.Model):
+    """One appid whose catalog metadata is fetched, shared by every job that needs it."""
+    __tablename__ = "metadata_fetch_queue"
+    appid = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    state = db.Column(db.String(16), index=True, nullable=False, default="pending")  # pending/claimed/done/missing/failed
+    priority = db.Column(db.Integer, nullable=False, default=0)  # users owning the appid when queued; higher first
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    claim_token = db.Column(db.String(32), index=True, nullable=True)
+    claimed_at = db.Column(db.BigInteger, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.BigInteger, nullable=False)
+    updated_at = db.Column(db.BigInteger, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_metadata_fetch_queue_claim_order", "state", "priority"),
+    )
@@ -44,6 +44,19 @@ class GameCatalog(db.Model):
     
     document = db.Column(LONGTEXT_COMPAT, nullable=True)
 
+    # when a metadata sync last wrote the row (None: imported, never synced)
+    metadata_synced_at = db.Column(db.BigInteger, nullable=True)
+
+    # ranking features precomputed from the columns above (app/services/game_features.py)
+    feature_version = db.Column(db.SmallInteger, nullable=True)
+    feature_session_minutes = db.Column(db.Integer, nullable=True)
+    feature_intensity = db.Column(db.SmallInteger, nullable=True)
+    feature_social = db.Column(db.Boolean, nullable=True)
+    feature_goal_hits = db.Column(db.Text, nullable=True)  # JSON {goal: [positive, negative]}
+    feature_fps_hits = db.Column(db.SmallInteger, nullable=True)
+    feature_genres = db.Column(db.Text, nullable=True)  # JSON list of normalized genres
+    feature_quality = db.Column(db.Float(precision=53), nullable=True)  # a double: MySQL FLOAT would round it
+
     def to_dict(self):
         return {
             "appid": self.appid,
@@ -19,7 +19,7 @@ def bind_steam():
         return jsonify({"error": "invalid_steamid"}), 400
 
     api_key = current_app.config["STEAM_API_KEY"]
-    prof = get_player_summaries(api_key, steamid)
+    prof = get_player_summaries(api_key, steamid, interactive=True)
     if not prof:
         return jsonify({"error": "steam_profile_not_found_or_private"}), 404
 
@@ -1,7 +1,27 @@
 from flask import Blueprint, jsonify
 
+from app.services.autocomplete import autocomplete_stats
+from app.services.friend_presence import friend_presence_stats
+from app.services.http_client import http_client_stats
+from app.services.index_manager import get_index_manager
+from app.services.metadata_sync import metadata_sync_stats
+from app.services.process_memory import process_memory
+from app.services.search_cache import search_cache_stats
+from app.services.sync_queue import sync_runner_stats
+
 health_bp = Blueprint("health", __name__)
 
 @health_bp.get("/health")
 def health():
-    return jsonify({"ok": True, "service": "what-to-play-api"}), 200
+    return jsonify({
+        "ok": True,
+        "service": "what-to-play-api",
+        "search_index": get_index_manager().status(),
+        "search_cache": search_cache_stats(),
+        "autocomplete": autocomplete_stats(),
+        "friend_presence": friend_presence_stats(),
+        "upstream_http": http_client_stats(),
+        "metadata_sync": metadata_sync_stats(),
+        "sync_queue": sync_runner_stats(),
+        "worker_memory": process_memory(),
+    }), 200
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
+import heapq
 from datetime import datetime
 from typing import Any
-import requests
 from flask import Blueprint, jsonify, request
 
 from app.services.context_ranking import (
@@ -18,12 +18,16 @@ from app.services.context_ranking import (
     is_social_game,
     stable_title_tiebreak,
 )
+from app.services.http_client import get_http_client
 
 public_bp = Blueprint("public", __name__)
 
 FREETOGAME_URL = "https://www.freetogame.com/api/games"
 CHEAPSHARK_URL = "https://www.cheapshark.com/api/1.0/deals"
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 60
+
 def normalize_title(value: str) -> str:
     return "".join(ch for ch in value.lower() if ch.isalnum())
 
@@ -54,8 +58,18 @@ def get_goal_detail_bonus(goal: str, descriptor_text: str) -> float:
     return clamp((positive_hits * 0.8) - (negative_hits * 0.6), -1.2, 2.4)
 
 
-def rank_games(games: list[dict[str, Any]], context: dict[str, Any]) -> list[dict[str, Any]]:
-    ranked: list[dict[str, Any]] = []
+def rank_games(
+    games: list[dict[str, Any]],
+    context: dict[str, Any],
+    limit: int | None = None,
+    offset: int = 0,
+) -> list[dict[str, Any]]:
+    """
+    Games ranked by score, highest first (ties keep input order). With a
+    limit only ranks offset..offset+limit are selected, with a bounded heap,
+    and only those get a response dict and reasons.
+    """
+    scored: list[tuple[float, int, str, dict[str, Any]]] = []
     for game in games:
         descriptor_text = compose_game_text(
             game.get("genre") or "",
@@ -85,11 +99,19 @@ def rank_games(games: list[dict[str, Any]], context: dict[str, Any]) -> list[dic
         goal_detail_bonus = get_goal_detail_bonus(context["goal"], descriptor_text)
         tie_breaker = stable_title_tiebreak(game.get("title") or "")
         score = time_fit + energy_fit + social_fit + goal_boost + device_fit + quality_signal + freshness_signal + goal_detail_bonus + tie_breaker
+        scored.append((round(score, 4), session_length, descriptor_text, game))
+
+    # nlargest is stable like sort(reverse=True), so paged and full rankings agree
+    if limit is None:
+        selected = sorted(scored, key=lambda x: x[0], reverse=True)[offset:]
+    else:
+        selected = heapq.nlargest(offset + limit, scored, key=lambda x: x[0])[offset:]
 
-        ranked_item = {
+    return [
+        {
             **game,
             "sessionLength": session_length,
-            "score": round(score, 4),
+            "score": score,
             "reasons": create_standard_reasons(
                 game,
                 descriptor_text=descriptor_text,
@@ -100,10 +122,8 @@ def rank_games(games: list[dict[str, Any]], context: dict[str, Any]) -> list[dic
                 device=context["device"],
             ),
         }
-        ranked.append(ranked_item)
-
-    ranked.sort(key=lambda x: x["score"], reverse=True)
-    return ranked
+        for score, session_length, descriptor_text, game in selected
+    ]
 
 
 @public_bp.post("/recommend")
@@ -115,6 +135,11 @@ def public_recommend():
     goal = str(payload.get("goal") or "relax").strip().lower()
     time_available = int(payload.get("timeAvailable") or 45)
     friends_online = bool(payload.get("friendsOnline", False))
+    try:
+        limit = int(payload.get("limit") or DEFAULT_PAGE_SIZE)
+        offset = int(payload.get("offset") or 0)
+    except (TypeError, ValueError):
+        return jsonify({"error": "invalid_paging"}), 400
 
     if device not in ("pc", "console", "mobile"):
         return jsonify({"error": "invalid_device"}), 400
@@ -124,16 +149,22 @@ def public_recommend():
         return jsonify({"error": "invalid_goal"}), 400
 
     time_available = max(15, min(180, time_available))
+    limit = max(1, min(MAX_PAGE_SIZE, limit))
+    offset = max(0, offset)
     platform_param = "browser" if device == "mobile" else "pc"
 
     try:
-        free_res = requests.get(FREETOGAME_URL, params={"platform": platform_param}, timeout=15)
+        # the user waits on both calls: one retry each, under a total deadline
+        free_res = get_http_client().get(
+            FREETOGAME_URL, params={"platform": platform_param}, timeout=15, interactive=True
+        )
         free_res.raise_for_status()
 
-        deal_res = requests.get(
+        deal_res = get_http_client().get(
             CHEAPSHARK_URL,
             params={"pageSize": 80, "storeID": 1, "sortBy": "DealRating", "onSale": 1},
             timeout=15,
+            interactive=True,
         )
         deal_res.raise_for_status()
     except Exception as exc:
@@ -170,6 +201,17 @@ def public_recommend():
             "device": device,
             "friendsOnline": friends_online,
         },
+        limit=limit,
+        offset=offset,
     )
 
-    return jsonify({"ok": True, "results": ranked}), 200
+    total = len(merged_games)
+    next_offset = offset + limit if offset + limit < total else None
+    return jsonify({
+        "ok": True,
+        "results": ranked,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "nextOffset": next_offset,
+    }), 200
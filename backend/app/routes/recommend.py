@@ -4,14 +4,15 @@ from flask_jwt_extended import get_jwt_identity, jwt_required
 from app import db
 from app.models import SteamProfile, UserContextLog, UserGameStat, UserPreference
 from app.models_catalog import GameCatalog
+from app.services.batch_scorer import DEFAULT_RECOMMEND_LIMIT, MAX_RECOMMEND_LIMIT, rank_library
+from app.services.game_attributes import AttributeFilter
 from app.services.recommender import (
+    MIN_PRIVATE_REVIEW_COUNT,
     RecommendationContext,
-    has_minimum_review_count,
     parse_preference,
-    score_candidate,
     update_user_preference,
 )
-from app.services.steam_client import get_friend_online_count
+from app.services.friend_presence import get_friend_presence
 
 recommend_bp = Blueprint("recommend", __name__)
 
@@ -29,6 +30,11 @@ def recommend_games():
     social_mode = (payload.get("social_mode") or "any").strip().lower()
     prefer_installed = bool(payload.get("prefer_installed", True))
     shuffle_seed = int(payload.get("shuffle_seed") or 0)
+    # top pick + (limit - 1) alternatives
+    try:
+        limit = max(1, min(MAX_RECOMMEND_LIMIT, int(payload.get("limit") or DEFAULT_RECOMMEND_LIMIT)))
+    except (TypeError, ValueError):
+        return jsonify({"error": "invalid_paging"}), 400
 
     if energy_level not in ("low", "high"):
         return jsonify({"error": "invalid_energy_level"}), 400
@@ -52,7 +58,8 @@ def recommend_games():
     catalog_rows = GameCatalog.query.filter(GameCatalog.appid.in_(appids)).all()
     by_appid = {c.appid: c for c in catalog_rows}
 
-    friends_online_count = get_friend_online_count(current_app.config.get("STEAM_API_KEY", ""), steam.steamid)
+    # cached presence: never waits on the Steam API
+    friends_online_count = get_friend_presence(current_app.config).online_count(steam.steamid)
     ctx = RecommendationContext(
         time_available_min=max(10, min(300, time_available_min)),
         energy_level=energy_level,
@@ -75,45 +82,41 @@ def recommend_games():
     genre_weights = parse_preference(pref)
     comfort_bias = pref.comfort_bias if pref else 0.0
 
-    scored = []
+    # review floor + platform filtering (candidate generation), same filter /api/search applies
+    candidate_filter = AttributeFilter(platforms=(platform,), min_reviews=MIN_PRIVATE_REVIEW_COUNT)
+
+    candidates = []
     for stat in stats:
         cat = by_appid.get(stat.appid)
         if not cat:
             continue
 
-        if not has_minimum_review_count(cat):
+        if not candidate_filter.matches(cat):
             continue
 
-        # platform filtering (candidate generation)
-        supported = {
-            "windows": bool(cat.windows),
-            "mac": bool(cat.mac),
-            "linux": bool(cat.linux),
-        }
-        if not supported.get(platform, False):
-            continue
+        candidates.append((stat, cat))
 
-        score, reasons = score_candidate(stat, cat, ctx, genre_weights, comfort_bias)
-
-        if shuffle_seed:
-            score += ((stat.appid + shuffle_seed) % 7) * 0.07
-
-        scored.append({
-            "appid": stat.appid,
-            "name": cat.name,
-            "header_image": cat.header_image,
-            "genres": cat.genres,
-            "avg_session_minutes": cat.avg_session_minutes,
-            "difficulty": cat.difficulty,
-            "multiplayer_mode": cat.multiplayer_mode,
-            "playtime_forever": stat.playtime_forever,
-            "score": round(score, 4),
-            "why": reasons,
-        })
-
-    scored.sort(key=lambda x: x["score"], reverse=True)
+    # the whole library is scored in one vectorized pass; reasons and dicts only for the survivors
+    ranked, total_candidates = rank_library(
+        candidates, ctx, genre_weights, comfort_bias, limit=limit, shuffle_seed=shuffle_seed
+    )
+    scored = [
+        {
+            "appid": game.game_stat.appid,
+            "name": game.catalog.name,
+            "header_image": game.catalog.header_image,
+            "genres": game.catalog.genres,
+            "avg_session_minutes": game.catalog.avg_session_minutes,
+            "difficulty": game.catalog.difficulty,
+            "multiplayer_mode": game.catalog.multiplayer_mode,
+            "playtime_forever": game.game_stat.playtime_forever,
+            "score": game.score,
+            "why": game.reasons,
+        }
+        for game in ranked
+    ]
     top_pick = scored[0] if scored else None
-    alternatives = scored[1:8] if len(scored) > 1 else []
+    alternatives = scored[1:]
 
     db.session.commit()
 
@@ -128,7 +131,7 @@ def recommend_games():
         "friends_online_count": friends_online_count,
         "top_pick": top_pick,
         "alternatives": alternatives,
-        "total_candidates": len(scored),
+        "total_candidates": total_candidates,
     }), 200
 
 
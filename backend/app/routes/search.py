@@ -1,19 +1,22 @@
-from flask import Blueprint, jsonify, request
+from dataclasses import asdict
+
+from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import jwt_required
 from app import db
 from app.models_catalog import GameCatalog
-from app.services.tfidf_index import load_index, tokenize
+from app.services.analyzer import tokenize
+from app.services.autocomplete import DEFAULT_LIMIT, get_autocomplete
+from app.services.columnar_index import SCORERS
+from app.services.game_attributes import AttributeFilter
+from app.services.index_manager import get_index_manager
+from app.services.search_cache import get_search_cache, make_cache_key
 
 search_bp = Blueprint("search", __name__)
 
-# lazy load index once per process
-_INDEX = None
-
-def get_index():
-    global _INDEX
-    if _INDEX is None:
-        _INDEX = load_index()
-    return _INDEX
+def get_index_snapshot():
+    # the manager swaps in new index versions in the background; holding the
+    # returned snapshot keeps this request on one consistent index
+    return get_index_manager().current()
 
 @search_bp.post("")
 @jwt_required()
@@ -21,39 +24,65 @@ def search():
     payload = request.get_json(silent=True) or {}
     query = (payload.get("query") or "").strip()
     topk = int(payload.get("topk") or 10)
+    # "tfidf" (default) or "bm25f", to compare relevance and latency side by side
+    scorer = payload.get("scorer") or "tfidf"
 
     if not query:
         return jsonify({"error": "missing_query"}), 400
+    if scorer not in SCORERS:
+        return jsonify({"error": "invalid_scorer", "scorers": list(SCORERS)}), 400
+    try:
+        # e.g. {"platforms": ["linux"], "multiplayer_modes": ["coop"], "min_reviews": 5000}
+        filters = AttributeFilter.from_payload(payload.get("filters"))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": "invalid_filters", "detail": str(e)}), 400
     topk = max(1, min(topk, 50))
 
-    idx = get_index()
-    hits = idx.search(query, topk=topk)
+    snapshot = get_index_snapshot()
+    if not snapshot.index.supports(scorer):
+        return jsonify({"error": "scorer_unavailable", "scorer": scorer}), 400
+    if not filters.is_empty() and not snapshot.index.has_attributes:
+        return jsonify({"error": "filters_unavailable", "hint": "rebuild_search_index"}), 400
+
+    query_tokens = tokenize(query)
+    cache = get_search_cache(current_app.config)
+    cache_key = make_cache_key(query_tokens, topk, snapshot.version, scorer, filters)
+    results = cache.get(cache_key)
+    if results is None:
+        results = hydrate_hits(snapshot.index, query, topk, scorer, filters)
+        cache.put(cache_key, results)
+
+    return jsonify({
+        "query": query,
+        "topk": topk,
+        "scorer": scorer,
+        "filters": asdict(filters),
+        "results": results,
+        "query_tokens": query_tokens,
+        "index_version": snapshot.version,
+    }), 200
+
+def hydrate_hits(idx, query, topk, scorer="tfidf", filters=None):
+    """Score the query and join hits with their catalog rows (the cacheable part)."""
+    hits = idx.search(query, topk=topk, scorer=scorer, filters=filters)
 
     # map doc_id -> appid
-    appids = [idx.doc_appids[doc_id] for doc_id, _, _ in hits]
+    appids = [int(idx.doc_appids[doc_id]) for doc_id, _, _ in hits]
     if not appids:
-        return jsonify({"query": query, "results": []}), 200
+        return []
 
     rows = db.session.query(GameCatalog).filter(GameCatalog.appid.in_(appids)).all()
     by_id = {r.appid: r for r in rows}
 
-    # build why terms (convert term_id -> actual term)
-    # reverse vocab (term_id -> term)
-    inv_vocab = {tid: term for term, tid in idx.vocab.items()}
-
     results = []
     for doc_id, score, why in hits:
-        appid = idx.doc_appids[doc_id]
+        appid = int(idx.doc_appids[doc_id])
         g = by_id.get(appid)
         if not g:
             continue
 
-        why_terms = []
-        for tid_str, contrib in why.items():
-            tid = int(tid_str)
-            term = inv_vocab.get(tid)
-            if term:
-                why_terms.append({"term": term, "contrib": contrib})
+        # the index already resolves why terms to strings
+        why_terms = [{"term": term, "contrib": contrib} for term, contrib in why.items()]
         why_terms.sort(key=lambda x: x["contrib"], reverse=True)
 
         results.append({
@@ -66,10 +95,18 @@ def search():
             "score": score,
             "why": why_terms[:3]
         })
+    return results
 
-    return jsonify({
-        "query": query,
-        "topk": topk,
-        "results": results,
-        "query_tokens": tokenize(query),
-    }), 200
+@search_bp.get("/autocomplete")
+@jwt_required()
+def autocomplete():
+    prefix = (request.args.get("q") or "").strip()
+    limit = request.args.get("limit", DEFAULT_LIMIT, type=int)
+
+    if not prefix:
+        return jsonify({"error": "missing_query"}), 400
+
+    ac = get_autocomplete()
+    if ac is None:
+        return jsonify({"error": "autocomplete_not_built"}), 503
+    return jsonify(ac.complete(prefix, limit)), 200
@@ -1,76 +1,34 @@
 import time
-import requests
-import threading
 from flask import Blueprint, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy.dialects.mysql import insert as mysql_insert
-from sqlalchemy.dialects.postgresql import insert as pg_insert
-from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from app import db
 from app.models import SteamProfile, UserGameStat
 from app.models_catalog import GameCatalog
-from app.services.steam_client import get_owned_games, get_app_details, get_friends_with_status
-from app.services.tfidf_index import build_index_from_documents, save_index
+from app.services.steam_client import get_owned_games
+from app.services.friend_presence import get_friend_presence
+from app.services.bulk_upsert import upsert
+from app.services.autocomplete import build_autocomplete, save_autocomplete, term_document_frequencies
+from app.services.columnar_index import build_columnar_index_from_documents
+from app.services.game_attributes import CATALOG_COLUMNS, attach_attributes, attribute_columns
+from app.services.index_manager import get_index_manager
+from app.services.index_segments import SegmentStore, schedule_merge
+from app.services.sync_queue import get_sync_runner, start_sync_job, sync_status_payload
 
 steam_bp = Blueprint("steam", __name__)
 
-STEAMSPY_API_URL = "https://steamspy.com/api.php"
-SYNC_STATUS: dict[str, dict] = {}
-SYNC_STATUS_LOCK = threading.Lock()
 
+# Internal Logic for Index Rebuilding
+def rebuild_autocomplete_internal(index):
+    """Rebuilds the type-ahead tables from catalog names and the index vocabulary."""
+    rows = db.session.query(GameCatalog.appid, GameCatalog.name, GameCatalog.positive, GameCatalog.negative).all()
+    games = [(int(appid), name or "", (positive or 0) + (negative or 0)) for appid, name, positive, negative in rows]
+    save_autocomplete(build_autocomplete(games, term_document_frequencies(index)))
+    print(f"[Background Index] Autocomplete rebuilt for {len(games)} games.")
 
-def set_sync_status(steamid: str, **payload):
-    with SYNC_STATUS_LOCK:
-        current = SYNC_STATUS.get(steamid, {})
-        SYNC_STATUS[steamid] = {**current, **payload, "updated_at": int(time.time())}
-
-
-def get_sync_status_payload(steamid: str) -> dict:
-    with SYNC_STATUS_LOCK:
-        return dict(SYNC_STATUS.get(steamid, {"state": "idle", "pending": False}))
-
-# Helper Functions for Data Inference
-def build_document(name, genres, tags):
-    """Build the document string for TF-IDF text similarity matching."""
-    parts = [name]
-    if genres: parts.append(genres)
-    if tags: parts.append(tags)
-    return "\n".join(parts)
-
-
-def infer_difficulty(tags_dict):
-    """Infer game difficulty based on SteamSpy user tags with type safety."""
-    # Safety check: if tags_dict is a list or None, return default
-    if not isinstance(tags_dict, dict):
-        return "medium"
-
-    tags_lower = [t.lower() for t in tags_dict.keys()]
-    if any(k in tags_lower for k in ["souls-like", "difficult", "hard", "roguelike", "permadeath"]):
-        return "high"
-    if any(k in tags_lower for k in ["casual", "relaxing", "cozy", "visual novel", "walking simulator"]):
-        return "low"
-    return "medium"
-
-
-def infer_multiplayer_mode(tags_dict):
-    """Infer multiplayer mode based on SteamSpy user tags with type safety."""
-    # Safety check: if tags_dict is a list or None, return default
-    if not isinstance(tags_dict, dict):
-        return "solo"
-
-    tags_lower = [t.lower() for t in tags_dict.keys()]
-    if any(k in tags_lower for k in ["co-op", "online co-op", "local co-op"]):
-        return "coop"
-    if any(k in tags_lower for k in ["multiplayer", "pvp", "competitive", "e-sports"]):
-        return "pvp"
-    if any(k in tags_lower for k in ["mmo", "massively multiplayer"]):
-        return "mmo"
-    return "solo"
 
-# Internal Logic for Index Rebuilding
 def rebuild_tfidf_index_internal():
-    """Fetches all games from DB and rebuilds the local .pkl index file."""
+    """Fetches all games from DB and rebuilds the local binary index file."""
     print("[Background Index] Starting TF-IDF index rebuild...")
     rows = db.session.query(GameCatalog.appid, GameCatalog.document).filter(GameCatalog.document.isnot(None)).all()
 
@@ -81,121 +39,44 @@ def rebuild_tfidf_index_internal():
     appids = [int(r[0]) for r in rows]
     docs = [r[1] or "" for r in rows]
 
-    index = build_index_from_documents(docs, appids)
-    out_path = save_index(index)
-    print(f"[Background Index] Index saved to: {out_path}. Vocab size: {len(index.vocab)}")
+    index = build_columnar_index_from_documents(docs, appids)
+    attribute_rows = db.session.query(*[getattr(GameCatalog, c) for c in CATALOG_COLUMNS]).all()
+    attach_attributes(index, attribute_columns(attribute_rows, appids))
+    version = SegmentStore().write_main(index, shards=current_app.config.get("SEARCH_INDEX_SHARDS", 1))
+    print(f"[Background Index] Index version {version} saved. Vocab size: {len(index.vocab)}")
+    rebuild_autocomplete_internal(index)
+    get_index_manager().maybe_reload(force=True)
 
 
-# Background Task: Dual-API Sync + Index Rebuild
-def background_sync_missing(app, steamid: str):
-    """
-    Runs in a background thread to fetch missing metadata
-    and rebuild the TF-IDF index.
-    """
-    with app.app_context():
-        # 1. Identify missing games
-        owned_appids = {stat.appid for stat in db.session.query(UserGameStat.appid).distinct().all()}
-        catalog_appids = {c.appid for c in db.session.query(GameCatalog.appid).all()}
-
-        missing_appids = list(owned_appids - catalog_appids)
-        if not missing_appids:
-            print("[Background Task] No missing games to sync.")
-            set_sync_status(steamid, state="ready", pending=False, message="Steam library sync is fully complete.")
-            return
-
-        print(f"[Background Task] Found {len(missing_appids)} missing games. Starting sync...")
-        set_sync_status(
-            steamid,
-            state="metadata_syncing",
-            pending=True,
-            message=f"Steam library ownership imported. Finishing metadata sync for up to {min(len(missing_appids), 100)} games...",
-            remaining=min(len(missing_appids), 100),
-        )
+def append_tfidf_index_internal(docs, appids, attribute_rows):
+    """Indexes newly synced games as a delta segment instead of rebuilding everything."""
+    store = SegmentStore()
+    if not store.exists():
+        rebuild_tfidf_index_internal()
+        return
+
+    version = store.append(docs, appids, attribute_columns(attribute_rows, appids))
+    print(f"[Background Index] Appended {len(docs)} games as index version {version}.")
+    get_index_manager().maybe_reload(force=True)
+    # autocomplete covers the whole catalog; the sync runner rebuilds it once per job (refresh_autocomplete_internal)
+    if store.load().needs_merge():
+        print("[Background Index] Delta segments over threshold. Merging in background...")
+        schedule_merge(store)
+
 
-        limit = 100
-        inserted = 0
-
-        for appid in missing_appids[:limit]:
-            try:
-                # --- Step 1: SteamSpy Data ---
-                r = requests.get(STEAMSPY_API_URL, params={"request": "appdetails", "appid": appid}, timeout=10)
-                r.raise_for_status()
-                spy_data = r.json()
-
-                if not spy_data or not spy_data.get("name"):
-                    time.sleep(1.5)
-                    continue
-
-                name = spy_data.get("name")
-                tags_dict = spy_data.get("tags", {})
-
-                # Format tags for storage
-                tags_str = ""
-                if isinstance(tags_dict, dict):
-                    tags_str = ", ".join(tags_dict.keys())
-
-                genres = spy_data.get("genre", "")
-                avg_session_minutes = spy_data.get("average_forever", 60) or 60
-
-                # --- Step 2: Official Steam Data ---
-                steam_data = get_app_details(appid)
-                platforms = steam_data.get("platforms", {}) if steam_data else {}
-
-                # --- Step 3: Persistence ---
-                new_game = GameCatalog(
-                    appid=appid,
-                    name=name,
-                    developers=", ".join(spy_data.get("developer", "").split(", ")),
-                    publishers=", ".join(spy_data.get("publisher", "").split(", ")),
-                    genres=genres,
-                    tags=tags_str,
-                    positive=spy_data.get("positive", 0),
-                    negative=spy_data.get("negative", 0),
-                    avg_session_minutes=avg_session_minutes,
-                    difficulty=infer_difficulty(tags_dict),
-                    multiplayer_mode=infer_multiplayer_mode(tags_dict),
-                    document=build_document(name, genres, tags_str),
-                    windows=platforms.get("windows", True),
-                    mac=platforms.get("mac", False),
-                    linux=platforms.get("linux", False),
-                    header_image=f"https://shared.akamai.steamstatic.com/store_item_assets/steam/apps/{appid}/header.jpg"
-                )
-                db.session.add(new_game)
-                inserted += 1
-                print(f"[Background Task] AppID {appid} synced ({name})")
-                set_sync_status(
-                    steamid,
-                    state="metadata_syncing",
-                    pending=True,
-                    message=f"Still syncing metadata... {inserted}/{min(len(missing_appids), limit)} completed.",
-                    remaining=max(0, min(len(missing_appids), limit) - inserted),
-                )
-
-            except Exception as e:
-                print(f"[Background Task] AppID {appid} failed: {e}")
-
-            time.sleep(1.5)  # Rate limit protection
-
-        if inserted > 0:
-            db.session.commit()
-            print(f"[Background Task] Successfully added {inserted} games. Rebuilding index...")
-            rebuild_tfidf_index_internal()
-            set_sync_status(
-                steamid,
-                state="ready",
-                pending=False,
-                message=f"Steam library sync is fully complete. Metadata updated for {inserted} games.",
-                remaining=0,
-            )
-        else:
-            print("[Background Task] No new games added.")
-            set_sync_status(
-                steamid,
-                state="ready",
-                pending=False,
-                message="Steam library ownership imported. No new metadata updates were needed.",
-                remaining=0,
-            )
+def refresh_autocomplete_internal():
+    """Rebuilds the type-ahead tables once a sync has appended its games."""
+    index = SegmentStore().load()
+    if index is not None:
+        rebuild_autocomplete_internal(index)
+
+
+def ensure_sync_runner(app):
+    """Start (or wake) the metadata sync queue runner, unless another process or a dedicated worker runs it."""
+    if not app.config.get("SYNC_WORKER_IN_PROCESS", True):
+        return None
+    runner = get_sync_runner(app, append_tfidf_index_internal, refresh_autocomplete_internal)
+    return runner.wake() if runner is not None else None
 
 
 # Route: Sync User's Steam Library
@@ -215,13 +96,16 @@ def sync_owned_games():
     if not api_key:
         return jsonify({"error": "steam_api_key_missing"}), 500
 
+    # warm friend presence in the background, so the first /api/recommend has a count
+    get_friend_presence(current_app.config).prefetch(sp.steamid)
+
     games = get_owned_games(api_key, sp.steamid)
     now = int(time.time())
 
     if not games:
         sp.last_sync_ts = now
         db.session.commit()
-        set_sync_status(sp.steamid, state="ready", pending=False, message="Steam library sync is fully complete.", remaining=0)
+        start_sync_job(sp.steamid, owned=0, now=now, refresh_after=current_app.config["CATALOG_REFRESH_SECONDS"])
         return jsonify({"ok": True, "synced": 0}), 200
 
     # UPSERT stats
@@ -235,64 +119,26 @@ def sync_owned_games():
             "last_played": int(g.get("rtime_last_played") or 0) or None
         })
 
-    bind = db.session.get_bind() or db.engine
-    dialect_name = bind.dialect.name if bind is not None else ""
-
-    # SQLite can hit parameter limits for large libraries.
-    # Chunking avoids "too many SQL variables" during bulk UPSERT.
-    chunk_size = 120 if dialect_name == "sqlite" else 500
-    for i in range(0, len(rows), chunk_size):
-        chunk = rows[i:i + chunk_size]
-
-        if dialect_name == "sqlite":
-            stmt = sqlite_insert(UserGameStat).values(chunk)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=["steamid", "appid"],
-                set_={
-                    "playtime_forever": stmt.excluded.playtime_forever,
-                    "playtime_2weeks": stmt.excluded.playtime_2weeks,
-                    "last_played": stmt.excluded.last_played,
-                },
-            )
-            db.session.execute(stmt)
-        elif dialect_name == "postgresql":
-            stmt = pg_insert(UserGameStat).values(chunk)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=["steamid", "appid"],
-                set_={
-                    "playtime_forever": stmt.excluded.playtime_forever,
-                    "playtime_2weeks": stmt.excluded.playtime_2weeks,
-                    "last_played": stmt.excluded.last_played,
-                },
-            )
-            db.session.execute(stmt)
-        else:
-            stmt = mysql_insert(UserGameStat).values(chunk)
-            stmt = stmt.on_duplicate_key_update(
-                playtime_forever=stmt.inserted.playtime_forever,
-                playtime_2weeks=stmt.inserted.playtime_2weeks,
-                last_played=stmt.inserted.last_played
-            )
-            db.session.execute(stmt)
+    upsert(
+        UserGameStat,
+        rows,
+        index_elements=["steamid", "appid"],
+        update_columns=["playtime_forever", "playtime_2weeks", "last_played"],
+    )
     sp.last_sync_ts = now
     db.session.commit()
 
-    # Trigger background completion
-    app_object = current_app._get_current_object()
-    set_sync_status(
-        sp.steamid,
-        state="ownership_synced",
-        pending=True,
-        message=f"Imported {len(rows)} owned games. Metadata sync is still running...",
-        remaining=None,
-    )
-    threading.Thread(target=background_sync_missing, args=(app_object, sp.steamid), daemon=True).start()
+    # Queue missing and stale metadata; this or another worker's runner fetches it
+    job = start_sync_job(sp.steamid, owned=len(rows), now=now, refresh_after=current_app.config["CATALOG_REFRESH_SECONDS"])
+    ensure_sync_runner(current_app._get_current_object())
 
     return jsonify({
         "ok": True,
         "synced": len(rows),
         "updated_at": now,
         "status": "ownership_synced",
+        "job_id": job.id,
+        "remaining": job.remaining,
     }), 200
 
 
@@ -304,7 +150,10 @@ def get_sync_status():
     if not sp:
         return jsonify({"error": "steam_not_bound"}), 400
 
-    payload = get_sync_status_payload(sp.steamid)
+    payload = sync_status_payload(sp.steamid)
+    if payload["pending"]:
+        # a restarted worker resumes queued syncs once someone polls
+        ensure_sync_runner(current_app._get_current_object())
     return jsonify({"ok": True, **payload}), 200
 
 
@@ -321,7 +170,7 @@ def get_steam_friends():
         return jsonify({"error": "steam_api_key_missing"}), 500
 
     try:
-        players = get_friends_with_status(api_key, sp.steamid)
+        players = get_friend_presence(current_app.config).friends(sp.steamid)
     except Exception as exc:
         return jsonify({"error": "steam_friends_fetch_failed", "detail": str(exc)}), 502
 
@@ -0,0 +1,98 @@
+"""
+Shared text analyzer for the search index and context ranking.
+
+Tokens are lowercase ASCII letter/digit runs of two or more characters,
+minus stopwords. A hyphenated word also yields its folded compound right
+after its parts, so "Co-op" indexes as co, op, coop: "co-op", "co op" and
+"coop" queries all reach it, and indexes built before folding existed still
+match on the parts. Words are analyzed once and memoized, and text without
+hyphens skips per-word work entirely.
+
+Light stemming (plural folding) is opt-in per Analyzer: the index and its
+queries must use the same settings, so the default analyzer leaves terms
+unstemmed.
+"""
+import re
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+# equivalent to "[a-z0-9]+ of length >= 2": single characters are never tokens
+TOKEN_RE = re.compile(r"[a-z0-9]{2,}")
+WORD_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+STOPWORDS = frozenset({
+    "the","a","an","and","or","to","of","in","on","for","with","as","is","are","be","by","at","from",
+    "this","that","it","its","you","your","we","our","they","their","i","me","my",
+})
+
+TERM_CACHE_SIZE = 1 << 16
+
+
+def fold_hyphens(word: str) -> str:
+    return word.replace("-", "")
+
+
+def light_stem(term: str) -> str:
+    """Plural folding only: games -> game, strategies -> strategy; leaves -ss/-us/-is alone."""
+    if len(term) > 4 and term.endswith("ies"):
+        return term[:-3] + "y"
+    if len(term) > 3 and term.endswith("s") and not term.endswith(("ss", "us", "is")):
+        return term[:-1]
+    return term
+
+
+def word_variants(word: str) -> Tuple[str, ...]:
+    """'co-op' -> ('co', 'op', 'coop'); other words map to themselves."""
+    if "-" not in word:
+        return (word,)
+    return tuple(word.split("-")) + (fold_hyphens(word),)
+
+
+class Analyzer:
+    def __init__(self, stem: bool = False, stopwords: Iterable[str] = STOPWORDS):
+        self.stem = stem
+        self.stopwords = frozenset(stopwords)
+        self.normalize_term = lru_cache(maxsize=TERM_CACHE_SIZE)(self._normalize_term)
+        self._word_terms = lru_cache(maxsize=TERM_CACHE_SIZE)(self._analyze_word)
+
+    def _normalize_term(self, term: str) -> str:
+        term = fold_hyphens(term.lower())
+        return light_stem(term) if self.stem else term
+
+    def _analyze_word(self, word: str) -> Tuple[str, ...]:
+        terms = []
+        for variant in word_variants(word):
+            if len(variant) < 2:
+                continue
+            term = self.normalize_term(variant)
+            if term not in self.stopwords:
+                terms.append(term)
+        return tuple(terms)
+
+    def tokenize(self, text: str) -> List[str]:
+        text = (text or "").lower()
+        if "-" not in text and not self.stem:
+            stopwords = self.stopwords
+            return [t for t in TOKEN_RE.findall(text) if t not in stopwords]
+        word_terms = self._word_terms
+        if self.stem:
+            return [term for word in WORD_RE.findall(text) for term in word_terms(word)]
+        # plain words are already normalized; only hyphenated ones go through the cache
+        terms = []
+        stopwords = self.stopwords
+        for word in WORD_RE.findall(text):
+            if "-" in word:
+                terms.extend(word_terms(word))
+            elif len(word) > 1 and word not in stopwords:
+                terms.append(word)
+        return terms
+
+    def tokenize_many(self, texts: Iterable[str]) -> List[List[str]]:
+        tokenize = self.tokenize
+        return [tokenize(text) for text in texts]
+
+
+DEFAULT_ANALYZER = Analyzer()
+tokenize = DEFAULT_ANALYZER.tokenize
+tokenize_many = DEFAULT_ANALYZER.tokenize_many
+normalize_term = DEFAULT_ANALYZER.normalize_term
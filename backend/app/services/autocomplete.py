@@ -0,0 +1,375 @@
+"""
+Type-ahead over game names and index vocabulary.
+
+Each PrefixTable keeps its keys sorted in one UTF-8 blob (plus offsets), so a
+prefix maps to a contiguous key range found by binary search. Game names are
+keyed by the full name and by every later word start ("strike" finds
+"Counter-Strike 2"). Short prefixes match thousands of keys, so their top
+results are precomputed at build time; longer prefixes have small ranges and
+are ranked on the fly. Results are ordered by popularity (review count for
+games, document frequency for terms), then alphabetically.
+
+The tables are saved next to the search index and reloaded in the
+background when the file changes, so completions never touch the database.
+"""
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.tfidf_index import default_index_path
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+# prefixes up to this many characters get precomputed results ...
+PRECOMPUTE_PREFIX_CHARS = 3
+# ... when they match more keys than this
+SCAN_LIMIT = 256
+DEFAULT_POLL_INTERVAL = 5.0
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def default_autocomplete_path() -> str:
+    return os.path.join(os.path.dirname(default_index_path()), "autocomplete.npz")
+
+
+def normalize_prefix(text: str) -> str:
+    """Casefold and collapse punctuation/whitespace runs to single spaces."""
+    return _NON_WORD_RE.sub(" ", (text or "").casefold()).strip()
+
+
+def name_keys(name: str) -> List[str]:
+    """The normalized name plus its suffixes starting at each later word."""
+    norm = normalize_prefix(name)
+    if not norm:
+        return []
+    return [norm] + [norm[i + 1:] for i, ch in enumerate(norm) if ch == " "]
+
+
+def _encode_strings(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+class PrefixTable:
+    def __init__(
+        self,
+        key_blob: np.ndarray,
+        key_offsets: np.ndarray,
+        entry_items: np.ndarray,
+        label_blob: np.ndarray,
+        label_offsets: np.ndarray,
+        item_appids: np.ndarray,
+        item_weights: np.ndarray,
+        top_prefix_blob: np.ndarray,
+        top_prefix_offsets: np.ndarray,
+        top_offsets: np.ndarray,
+        top_items: np.ndarray,
+    ):
+        self._keys = key_blob.tobytes()
+        self.key_offsets = key_offsets
+        self.entry_items = entry_items
+        self._labels = label_blob.tobytes()
+        self.label_offsets = label_offsets
+        self.item_appids = item_appids
+        self.item_weights = item_weights
+        prefixes = top_prefix_blob.tobytes()
+        bounds = top_prefix_offsets.tolist()
+        tops = top_offsets.tolist()
+        self._top = {
+            prefixes[bounds[i]:bounds[i + 1]].decode("utf-8"): top_items[tops[i]:tops[i + 1]]
+            for i in range(len(bounds) - 1)
+        }
+
+    @classmethod
+    def build(cls, records: Iterable[Tuple[str, int, int, List[str]]]) -> "PrefixTable":
+        """records: (label, appid, weight, keys); item ids follow the sorted first key."""
+        records = sorted((r for r in records if r[3]), key=lambda r: (r[3][0], r[0], r[1]))
+        item_appids = np.asarray([r[1] for r in records], dtype=np.int64)
+        item_weights = np.asarray([r[2] for r in records], dtype=np.int64)
+        entries = sorted((key, item) for item, r in enumerate(records) for key in r[3])
+        keys = [key for key, _ in entries]
+        entry_items = np.asarray([item for _, item in entries], dtype=np.int32)
+
+        top_prefixes, top_lists = [], []
+        for length in range(1, PRECOMPUTE_PREFIX_CHARS + 1):
+            start = 0
+            while start < len(keys):
+                prefix = keys[start][:length]
+                end = start + 1
+                while end < len(keys) and keys[end][:length] == prefix:
+                    end += 1
+                if end - start > SCAN_LIMIT and len(prefix) == length:
+                    top_prefixes.append(prefix)
+                    top_lists.append(_best_items(entry_items[start:end], item_weights, MAX_LIMIT))
+                start = end
+
+        top_offsets = np.zeros(len(top_lists) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in top_lists], out=top_offsets[1:])
+        return cls(
+            *_encode_strings(keys),
+            entry_items,
+            *_encode_strings([r[0] for r in records]),
+            item_appids,
+            item_weights,
+            *_encode_strings(top_prefixes),
+            top_offsets,
+            np.concatenate(top_lists).astype(np.int32) if top_lists else np.zeros(0, dtype=np.int32),
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        prefixes = list(self._top)
+        top_offsets = np.zeros(len(prefixes) + 1, dtype=np.int64)
+        np.cumsum([len(self._top[p]) for p in prefixes], out=top_offsets[1:])
+        key_blob = np.frombuffer(self._keys, dtype=np.uint8)
+        label_blob = np.frombuffer(self._labels, dtype=np.uint8)
+        top_prefix_blob, top_prefix_offsets = _encode_strings(prefixes)
+        return {
+            "key_blob": key_blob,
+            "key_offsets": self.key_offsets,
+            "entry_items": self.entry_items,
+            "label_blob": label_blob,
+            "label_offsets": self.label_offsets,
+            "item_appids": self.item_appids,
+            "item_weights": self.item_weights,
+            "top_prefix_blob": top_prefix_blob,
+            "top_prefix_offsets": top_prefix_offsets,
+            "top_offsets": top_offsets,
+            "top_items": (
+                np.concatenate([self._top[p] for p in prefixes]).astype(np.int32)
+                if prefixes else np.zeros(0, dtype=np.int32)
+            ),
+        }
+
+    @property
+    def num_keys(self) -> int:
+        return int(self.key_offsets.size - 1)
+
+    def label(self, item: int) -> str:
+        return self._labels[int(self.label_offsets[item]):int(self.label_offsets[item + 1])].decode("utf-8")
+
+    def _key(self, i: int) -> bytes:
+        return self._keys[int(self.key_offsets[i]):int(self.key_offsets[i + 1])]
+
+    def key_range(self, prefix: bytes) -> Tuple[int, int]:
+        n = len(prefix)
+        lo, hi = 0, self.num_keys
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        first = lo
+        hi = self.num_keys
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid)[:n] <= prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        return first, lo
+
+    def complete(self, prefix: str, limit: int = DEFAULT_LIMIT) -> List[int]:
+        """Item ids for a normalized prefix, best first."""
+        if not prefix:
+            return []
+        top = self._top.get(prefix)
+        if top is not None:
+            return top[:limit].tolist()
+        lo, hi = self.key_range(prefix.encode("utf-8"))
+        if lo == hi:
+            return []
+        return _best_items(self.entry_items[lo:hi], self.item_weights, limit).tolist()
+
+
+def _best_items(entry_items: np.ndarray, item_weights: np.ndarray, limit: int) -> np.ndarray:
+    # a game can match through several keys; weight desc, then item id (alphabetical)
+    items = np.unique(entry_items)
+    order = np.lexsort((items, -item_weights[items]))
+    return items[order[:limit]]
+
+
+@dataclass
+class Autocomplete:
+    games: PrefixTable
+    terms: PrefixTable
+
+    def complete(self, text: str, limit: int = DEFAULT_LIMIT) -> dict:
+        prefix = normalize_prefix(text)
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        games = [
+            {
+                "appid": int(self.games.item_appids[item]),
+                "name": self.games.label(item),
+                "popularity": int(self.games.item_weights[item]),
+            }
+            for item in self.games.complete(prefix, limit)
+        ]
+        # vocab terms are single tokens, so complete the last word typed
+        last_word = prefix.rsplit(" ", 1)[-1]
+        terms = [
+            {"term": self.terms.label(item), "df": int(self.terms.item_weights[item])}
+            for item in self.terms.complete(last_word, limit)
+        ]
+        return {"prefix": prefix, "games": games, "terms": terms}
+
+
+def term_document_frequencies(index) -> Dict[str, int]:
+    """term -> df for a legacy, columnar or segmented index."""
+    parts = [seg.index for seg in index.segments] if hasattr(index, "segments") else [index]
+    df: Dict[str, int] = {}
+    for part in parts:
+        if hasattr(part, "term_offsets"):
+            counts = np.diff(np.asarray(part.term_offsets)).tolist()
+            for term, tid in part.vocab.items():
+                df[term] = df.get(term, 0) + counts[tid]
+        else:
+            for term, tid in part.vocab.items():
+                df[term] = df.get(term, 0) + len(part.postings.get(tid, []))
+    return df
+
+
+def build_autocomplete(games: Iterable[Tuple[int, str, int]], term_df: Dict[str, int]) -> Autocomplete:
+    """games: (appid, name, popularity) rows; term_df: vocab term -> document frequency."""
+    return Autocomplete(
+        games=PrefixTable.build((name, int(appid), int(pop or 0), name_keys(name)) for appid, name, pop in games),
+        terms=PrefixTable.build((term, -1, int(df), [term]) for term, df in term_df.items()),
+    )
+
+
+def save_autocomplete(ac: Autocomplete, path: Optional[str] = None) -> str:
+    path = path or default_autocomplete_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    arrays = {f"games_{k}": v for k, v in ac.games.arrays().items()}
+    arrays.update({f"terms_{k}": v for k, v in ac.terms.arrays().items()})
+
+    fd, tmp_path = tempfile.mkstemp(prefix=".autocomplete-", suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return path
+
+
+def load_autocomplete(path: Optional[str] = None) -> Autocomplete:
+    path = path or default_autocomplete_path()
+    with np.load(path) as data:
+        tables = {}
+        for table in ("games", "terms"):
+            names = [k for k in data.files if k.startswith(table + "_")]
+            tables[table] = PrefixTable(**{k[len(table) + 1:]: data[k] for k in names})
+    return Autocomplete(**tables)
+
+
+class AutocompleteHolder:
+    """
+    Per-process copy of the saved tables. As with IndexManager, a changed
+    file is loaded on a background thread while the old tables keep serving,
+    and a file that fails to load leaves them in place (see last_error).
+    """
+
+    def __init__(self, path: Optional[str] = None, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.path = path or default_autocomplete_path()
+        self.poll_interval = poll_interval
+        self._ac: Optional[Autocomplete] = None
+        self._signature = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._reloading = False
+        self.last_error: Optional[str] = None
+
+    def _signature_on_disk(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def current(self) -> Optional[Autocomplete]:
+        if self._signature is None:
+            # the very first load has nothing older to serve, so it blocks
+            with self._lock:
+                now = time.monotonic()
+                if self._signature is None and now - self._last_check >= self.poll_interval:
+                    self._last_check = now
+                    signature = self._signature_on_disk()
+                    if signature is not None:
+                        self._load(signature)
+            return self._ac
+        self.maybe_reload()
+        return self._ac
+
+    def maybe_reload(self) -> bool:
+        """Start a background reload if the file changed; True when one started."""
+        now = time.monotonic()
+        if now - self._last_check < self.poll_interval:
+            return False
+        self._last_check = now
+        signature = self._signature_on_disk()
+        if signature is None or signature == self._signature:
+            return False
+        with self._lock:
+            if self._reloading:
+                return False
+            self._reloading = True
+        threading.Thread(target=self._reload, args=(signature,), daemon=True).start()
+        return True
+
+    def _reload(self, signature):
+        try:
+            self._load(signature)
+        finally:
+            with self._lock:
+                self._reloading = False
+
+    def _load(self, signature):
+        # a file that fails to load is not retried until it changes again
+        self._signature = signature
+        try:
+            ac = load_autocomplete(self.path)
+        except Exception as exc:
+            self.last_error = str(exc)
+            print(f"[Autocomplete] Load failed, keeping the old tables: {exc}")
+        else:
+            self._ac = ac
+            self.last_error = None
+
+    def status(self) -> dict:
+        ac = self._ac
+        return {
+            "loaded": ac is not None,
+            "games": int(ac.games.item_appids.size) if ac is not None else 0,
+            "terms": int(ac.terms.item_appids.size) if ac is not None else 0,
+            "reloading": self._reloading,
+            "last_error": self.last_error,
+        }
+
+
+_HOLDER: Optional[AutocompleteHolder] = None
+_HOLDER_LOCK = threading.Lock()
+
+
+def get_autocomplete() -> Optional[Autocomplete]:
+    global _HOLDER
+    if _HOLDER is None:
+        with _HOLDER_LOCK:
+            if _HOLDER is None:
+                _HOLDER = AutocompleteHolder()
+    return _HOLDER.current()
+
+
+def autocomplete_stats() -> Optional[dict]:
+    return _HOLDER.status() if _HOLDER is not None else None
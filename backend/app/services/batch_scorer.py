@@ -0,0 +1,190 @@
+"""
+Whole-library scoring for /api/recommend.
+
+score_candidate() scores one game at a time and builds its reasons on the
+way. For large libraries the per-game Python work dominates the request, so
+the library is laid out once as NumPy columns (session length, intensity,
+social flag, goal hits, genre fit, playtime, recency, quality) and every
+score_candidate() term is added as one array operation, in the same order
+and with the same float operations, so scores are bit-identical. Terms that
+only depend on a few distinct inputs (goal boost, device fit, genre fit) are
+computed once per distinct input with the scalar helpers. Reasons are built
+only for the games that survive top-k selection.
+"""
+import math
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.columnar_index import select_top_k
+from app.services.context_ranking import get_device_fit, goal_boost_from_hits
+from app.services.game_features import game_features
+from app.services.recommender import RecommendationContext, platform_label, score_candidate
+
+# top pick + alternatives returned by /api/recommend
+DEFAULT_RECOMMEND_LIMIT = 8
+MAX_RECOMMEND_LIMIT = 50
+
+
+@dataclass
+class LibraryColumns:
+    """Per-candidate score inputs, row i describing candidates[i]."""
+
+    candidates: List[Tuple]  # (game_stat, catalog)
+    session_minutes: np.ndarray
+    intensity: np.ndarray
+    social_game: np.ndarray
+    goal_boost: np.ndarray
+    device_fit: np.ndarray
+    genre_fit: np.ndarray
+    playtime_forever: np.ndarray
+    playtime_2weeks: np.ndarray
+    last_played: np.ndarray  # 0 = never
+    quality: np.ndarray
+    appids: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+
+def build_columns(
+    candidates: Sequence[Tuple],
+    goal: str,
+    genre_weights: dict,
+) -> LibraryColumns:
+    """Lay out (game_stat, catalog) pairs as columns for one goal and genre preference."""
+    memoized = lru_cache(maxsize=None)
+    goal_boost = memoized(lambda positive, negative, fps: goal_boost_from_hits(goal, positive, negative, fps))
+    device_fit = memoized(lambda windows, mac, linux: get_device_fit("pc", platform_label(windows, mac, linux) or "pc"))
+    genre_fit = memoized(lambda genres: max([0.0, *(float(genre_weights.get(g, 0.0)) for g in genres)]))
+
+    rows = []
+    for stat, catalog in candidates:
+        features = game_features(catalog)
+        positive, negative = features.goal_alignment(goal)
+        rows.append((
+            catalog.avg_session_minutes or features.session_minutes,
+            features.intensity,
+            features.social_game,
+            goal_boost(positive, negative, features.fps_hits),
+            device_fit(bool(catalog.windows), bool(catalog.mac), bool(catalog.linux)),
+            genre_fit(features.genres),
+            stat.playtime_forever or 0,
+            stat.playtime_2weeks or 0,
+            stat.last_played or 0,
+            features.quality,
+            stat.appid,
+        ))
+
+    (session, intensity, social, boost, device, genre, forever, two_weeks, last_played, quality, appids) = (
+        zip(*rows) if rows else [()] * 11
+    )
+    return LibraryColumns(
+        candidates=list(candidates),
+        session_minutes=np.array(session, dtype=np.int64),
+        intensity=np.array(intensity, dtype=np.int64),
+        social_game=np.array(social, dtype=bool),
+        goal_boost=np.array(boost, dtype=np.float64),
+        device_fit=np.array(device, dtype=np.float64),
+        genre_fit=np.array(genre, dtype=np.float64),
+        playtime_forever=np.array(forever, dtype=np.int64),
+        playtime_2weeks=np.array(two_weeks, dtype=np.int64),
+        last_played=np.array(last_played, dtype=np.int64),
+        quality=np.array(quality, dtype=np.float64),
+        appids=np.array(appids, dtype=np.int64),
+    )
+
+
+def score_columns(
+    columns: LibraryColumns,
+    ctx: RecommendationContext,
+    comfort_bias: float,
+    now: Optional[int] = None,
+) -> np.ndarray:
+    """score_candidate() scores for every row; adding 0.0 for a skipped term leaves a score unchanged."""
+    now = int(time.time()) if now is None else now
+    n = len(columns)
+    score = np.zeros(n, dtype=np.float64)
+    zero = np.zeros(n, dtype=np.float64)
+
+    score += 40 - np.clip(np.abs(ctx.time_available_min - columns.session_minutes), 0, 40)
+
+    if ctx.energy_level == "low":
+        score += np.where(columns.intensity <= 1, 18, -10)
+    else:
+        score += np.where(columns.intensity >= 2, 18, 2)
+
+    social = columns.social_game
+    if ctx.social_mode == "social":
+        score += np.where(social, 14, -5)
+    else:
+        score += np.where(social, -2, 8)
+
+    score += columns.goal_boost
+    score += columns.device_fit
+
+    genre_fit = columns.genre_fit
+    score += np.where(genre_fit > 0, np.clip(genre_fit, 0, 4) * 6, zero)
+
+    forever = columns.playtime_forever
+    score += np.where(forever > 500, comfort_bias * 8, zero)
+
+    last_played = columns.last_played
+    played = last_played != 0
+    days = np.where(last_played > now, 0.0, (now - last_played) / 86400)
+    two_weeks = columns.playtime_2weeks
+    if ctx.prefer_installed:
+        score += np.where(two_weeks > 0, 5, np.where(played & (days <= 30), 3, -2))
+
+    score += np.where(forever < 30, 6, 0)
+    score += np.where(played & (days >= 90) & (forever >= 60), 4, 0)
+    score += np.where((forever > 2000) & (~played | (days > 180)), -5, 0)
+
+    # math.log2 on the few active games: np.log2 is not guaranteed to round identically
+    active = np.flatnonzero(two_weeks > 0)
+    recent = zero.copy()
+    recent[active] = [min(5, math.log2(1 + minutes / 30)) for minutes in two_weeks[active].tolist()]
+    score += recent
+
+    score += columns.quality
+    return score
+
+
+@dataclass
+class RankedGame:
+    game_stat: object
+    catalog: object
+    score: float
+    reasons: List[str]
+
+
+def rank_library(
+    candidates: Sequence[Tuple],
+    ctx: RecommendationContext,
+    genre_weights: dict,
+    comfort_bias: float,
+    limit: int = DEFAULT_RECOMMEND_LIMIT,
+    shuffle_seed: int = 0,
+) -> Tuple[List[RankedGame], int]:
+    """
+    The `limit` best (game_stat, catalog) pairs, ordered like a stable sort
+    of score_candidate() scores rounded to 4 places, plus the candidate count.
+    """
+    columns = build_columns(candidates, ctx.goal, genre_weights)
+    scores = score_columns(columns, ctx, comfort_bias)
+    if shuffle_seed:
+        scores += ((columns.appids + shuffle_seed) % 7) * 0.07
+
+    # Python's round() (correctly rounded) so ties match the per-game path exactly
+    rounded = np.array([round(s, 4) for s in scores.tolist()], dtype=np.float64)
+    positions, top_scores = select_top_k(np.arange(len(columns)), rounded, limit)
+
+    ranked = []
+    for pos, score in zip(positions.tolist(), top_scores.tolist()):
+        stat, catalog = columns.candidates[pos]
+        _, reasons = score_candidate(stat, catalog, ctx, genre_weights, comfort_bias)
+        ranked.append(RankedGame(stat, catalog, score, reasons))
+    return ranked, len(columns)
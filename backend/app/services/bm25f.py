@@ -0,0 +1,63 @@
+"""
+BM25F field model for catalog documents.
+
+A document is build_document's "name\\ngenres\\ntags" string, optionally
+followed by more lines of store description ("about"). Each term's field
+counts are folded into one pseudo term frequency
+
+    tf~ = sum_f w_f * tf_f / (1 - B + B * len_f / avg_len_f)
+
+and saturated once at build time to tf~ * (K1 + 1) / (K1 + tf~). That
+per-posting value does not depend on idf, so query-time scoring is just
+sum(qtf * idf * value) over the postings, and segments written at different
+times share one global idf.
+"""
+import math
+from collections import Counter
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from app.services.analyzer import tokenize_many
+
+FIELDS = ("name", "genres", "tags", "about")
+FIELD_WEIGHTS = {"name": 3.0, "genres": 1.5, "tags": 1.0, "about": 0.5}
+K1 = 1.2
+B = 0.75
+
+
+def split_fields(document: str) -> Tuple[str, str, str, str]:
+    lines = (document or "").split("\n")
+    lines += [""] * (3 - len(lines))
+    return lines[0], lines[1], lines[2], "\n".join(lines[3:])
+
+
+def field_term_counts(document: str) -> Tuple[List[Counter], List[int]]:
+    """Per-field term counts and token lengths, in FIELDS order."""
+    counts = [Counter(terms) for terms in tokenize_many(split_fields(document))]
+    return counts, [sum(c.values()) for c in counts]
+
+
+def saturate(field_tfs: np.ndarray, field_lens: np.ndarray, avg_field_len: Sequence[float]) -> np.ndarray:
+    """
+    Per-posting BM25F values from (postings x fields) term counts and the
+    matching documents' field lengths. Fields are accumulated in a fixed
+    order, so every builder produces bit-identical float32 values.
+    """
+    tf = np.zeros(field_tfs.shape[0], dtype=np.float64)
+    for f, name in enumerate(FIELDS):
+        avg = float(avg_field_len[f])
+        if avg <= 0.0:
+            continue
+        norm = 1.0 - B + B * field_lens[:, f].astype(np.float64) / avg
+        tf += FIELD_WEIGHTS[name] * field_tfs[:, f].astype(np.float64) / norm
+    return (tf * (K1 + 1.0) / (K1 + tf)).astype(np.float32)
+
+
+def average_field_lengths(field_len_totals: np.ndarray, num_docs: int) -> np.ndarray:
+    # exact integer totals first, so streaming and in-memory builds agree
+    return np.asarray(field_len_totals, dtype=np.float64) / max(1, num_docs)
+
+
+def bm25_idf(df: int, num_docs: int) -> float:
+    return math.log(1.0 + (num_docs - df + 0.5) / (df + 0.5))
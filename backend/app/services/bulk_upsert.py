@@ -0,0 +1,78 @@
+"""
+Multi-row INSERT ... ON CONFLICT statements for SQLite, PostgreSQL and MySQL.
+
+Rows are dicts of column values, written in chunks that keep each statement
+under the dialect's bound-parameter limit (SQLite builds can cap a
+statement at 999 parameters), or come from a SELECT run by the database.
+Nothing is committed here.
+"""
+from typing import Dict, Iterator, List, Sequence
+
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+
+SQLITE_MAX_PARAMETERS = 999
+MAX_ROWS_PER_STATEMENT = 500
+
+
+def dialect_name() -> str:
+    bind = db.session.get_bind() or db.engine
+    return bind.dialect.name if bind is not None else ""
+
+
+def _chunks(rows: List[Dict], dialect: str) -> Iterator[List[Dict]]:
+    size = MAX_ROWS_PER_STATEMENT
+    if dialect == "sqlite" and rows:
+        size = max(1, min(size, SQLITE_MAX_PARAMETERS // len(rows[0])))
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def upsert(model, rows: List[Dict], index_elements: Sequence[str], update_columns: Sequence[str]):
+    """Insert rows, overwriting update_columns of rows whose index_elements already exist."""
+    dialect = dialect_name()
+    for chunk in _chunks(rows, dialect):
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite_insert if dialect == "sqlite" else pg_insert
+            stmt = insert(model).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(index_elements),
+                set_={c: stmt.excluded[c] for c in update_columns},
+            )
+        else:
+            stmt = mysql_insert(model).values(chunk)
+            stmt = stmt.on_duplicate_key_update(**{c: stmt.inserted[c] for c in update_columns})
+        db.session.execute(stmt)
+
+
+def upsert_from_select(model, columns: Sequence[str], select, index_elements: Sequence[str], update_columns: Sequence[str]):
+    """INSERT INTO model (columns) SELECT ..., overwriting update_columns of rows whose index_elements already exist."""
+    # sqlite: the SELECT needs a WHERE clause, or its join's ON is parsed as the upsert's
+    dialect = dialect_name()
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else pg_insert
+        stmt = insert(model).from_select(list(columns), select)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(index_elements),
+            set_={c: stmt.excluded[c] for c in update_columns},
+        )
+    else:
+        stmt = mysql_insert(model).from_select(list(columns), select)
+        stmt = stmt.on_duplicate_key_update(**{c: stmt.inserted[c] for c in update_columns})
+    db.session.execute(stmt)
+
+
+def insert_ignore(model, rows: List[Dict]):
+    """Insert rows, skipping those that conflict with an existing key."""
+    dialect = dialect_name()
+    for chunk in _chunks(rows, dialect):
+        if dialect == "sqlite":
+            stmt = sqlite_insert(model).values(chunk).on_conflict_do_nothing()
+        elif dialect == "postgresql":
+            stmt = pg_insert(model).values(chunk).on_conflict_do_nothing()
+        else:
+            stmt = mysql_insert(model).values(chunk).prefix_with("IGNORE")
+        db.session.execute(stmt)
@@ -0,0 +1,144 @@
+"""
+Catalog rows from SteamSpy + Steam store metadata, written in bulk.
+
+catalog_values() turns fetched metadata into GameCatalog column values,
+ranking features included. CatalogWriter buffers those rows and upserts them
+chunk_size at a time with one multi-row statement per chunk, committing each
+chunk, so a sync keeps its progress if it dies and a re-synced appid has its
+row refreshed in place instead of failing on the primary key.
+"""
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+from app import db
+from app.models_catalog import GameCatalog
+from app.services.bulk_upsert import upsert
+from app.services.game_attributes import catalog_row
+from app.services.game_features import compute_game_features, feature_values
+
+DEFAULT_CHUNK_SIZE = 200
+HEADER_IMAGE_URL = "https://shared.akamai.steamstatic.com/store_item_assets/steam/apps/{appid}/header.jpg"
+
+
+def build_document(name, genres, tags):
+    """Build the document string for TF-IDF text similarity matching."""
+    # empty fields keep their line, so name/genres/tags stay at fixed positions for BM25F
+    return "\n".join([name, genres or "", tags or ""])
+
+
+def infer_difficulty(tags_dict):
+    """Infer game difficulty based on SteamSpy user tags with type safety."""
+    # Safety check: if tags_dict is a list or None, return default
+    if not isinstance(tags_dict, dict):
+        return "medium"
+
+    tags_lower = [t.lower() for t in tags_dict.keys()]
+    if any(k in tags_lower for k in ["souls-like", "difficult", "hard", "roguelike", "permadeath"]):
+        return "high"
+    if any(k in tags_lower for k in ["casual", "relaxing", "cozy", "visual novel", "walking simulator"]):
+        return "low"
+    return "medium"
+
+
+def infer_multiplayer_mode(tags_dict):
+    """Infer multiplayer mode based on SteamSpy user tags with type safety."""
+    # Safety check: if tags_dict is a list or None, return default
+    if not isinstance(tags_dict, dict):
+        return "solo"
+
+    tags_lower = [t.lower() for t in tags_dict.keys()]
+    if any(k in tags_lower for k in ["co-op", "online co-op", "local co-op"]):
+        return "coop"
+    if any(k in tags_lower for k in ["multiplayer", "pvp", "competitive", "e-sports"]):
+        return "pvp"
+    if any(k in tags_lower for k in ["mmo", "massively multiplayer"]):
+        return "mmo"
+    return "solo"
+
+
+def catalog_values(appid: int, spy_data: dict, steam_data: Optional[dict] = None, now: Optional[int] = None) -> dict:
+    """GameCatalog column values from SteamSpy appdetails plus (optionally empty) Steam store appdetails."""
+    now = int(time.time()) if now is None else now
+    name = spy_data.get("name")
+    tags_dict = spy_data.get("tags", {})
+
+    # Format tags for storage
+    tags_str = ""
+    if isinstance(tags_dict, dict):
+        tags_str = ", ".join(tags_dict.keys())
+
+    genres = spy_data.get("genre", "")
+    platforms = steam_data.get("platforms", {}) if steam_data else {}
+
+    values = {
+        "appid": int(appid),
+        "name": name,
+        "developers": ", ".join(spy_data.get("developer", "").split(", ")),
+        "publishers": ", ".join(spy_data.get("publisher", "").split(", ")),
+        "genres": genres,
+        "tags": tags_str,
+        "positive": spy_data.get("positive", 0),
+        "negative": spy_data.get("negative", 0),
+        # 'average_forever' is in minutes; brand new games report 0
+        "avg_session_minutes": spy_data.get("average_forever", 60) or 60,
+        "difficulty": infer_difficulty(tags_dict),
+        "multiplayer_mode": infer_multiplayer_mode(tags_dict),
+        "document": build_document(name, genres, tags_str),
+        "windows": platforms.get("windows", True),
+        "mac": platforms.get("mac", False),
+        "linux": platforms.get("linux", False),
+        "header_image": HEADER_IMAGE_URL.format(appid=appid),
+        "metadata_synced_at": now,
+    }
+    # synced rows carry no categories or metacritic score, so features depend on these columns only
+    values.update(feature_values(compute_game_features(SimpleNamespace(categories=None, **values))))
+    return values
+
+
+class CatalogWriter:
+    """
+    Buffers catalog_values() rows and upserts them chunk_size at a time,
+    committing each chunk (with whatever else the session holds).
+    on_commit(docs, appids, attribute_rows) runs after each commit, e.g. to
+    index the chunk.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        on_commit: Optional[Callable[[List[str], List[int], List[tuple]], None]] = None,
+    ):
+        self.chunk_size = max(1, int(chunk_size))
+        self.on_commit = on_commit
+        self._buffer: Dict[int, dict] = {}
+        self.written = 0
+        self.chunks = 0
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def add(self, values: dict):
+        # one row per appid: a statement may not touch the same key twice
+        self._buffer[values["appid"]] = values
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """Upsert the buffered rows and commit; the number of rows written."""
+        rows = list(self._buffer.values())
+        self._buffer.clear()
+        if rows:
+            upsert(GameCatalog, rows, ["appid"], [c for c in rows[0] if c != "appid"])
+        db.session.commit()
+        if not rows:
+            return 0
+        self.written += len(rows)
+        self.chunks += 1
+        if self.on_commit is not None:
+            self.on_commit(
+                [r["document"] for r in rows],
+                [r["appid"] for r in rows],
+                [catalog_row(SimpleNamespace(**r)) for r in rows],
+            )
+        return len(rows)
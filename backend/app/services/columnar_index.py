@@ -0,0 +1,578 @@
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.analyzer import tokenize
+from app.services.bm25f import FIELDS, average_field_lengths, bm25_idf, field_term_counts, saturate
+from app.services.compact_vocab import CompactVocab
+from app.services.game_attributes import ATTRIBUTE_COLUMNS, AttributeFilter
+from app.services.tfidf_index import TfidfIndex, build_index_from_documents
+
+DOC_ID_DTYPE = np.int32
+WEIGHT_DTYPE = np.float32
+
+# relative slack on score upper bounds; impacts are stored as float32, so a
+# bound can undershoot the float64 score by a few ulps.
+BOUND_SLACK = 1e-6
+# first impact-ordered depth probed by the pruned top-k path
+MIN_PROBE_DEPTH = 32
+
+# "tfidf": log-tf cosine over the whole document; "bm25f": field-weighted BM25
+SCORERS = ("tfidf", "bm25f")
+# filter masks kept per index; filters repeat far more than queries do
+MAX_CACHED_FILTER_MASKS = 64
+
+
+@dataclass
+class ColumnarTfidfIndex:
+    """
+    Same TF-IDF model as TfidfIndex, stored as contiguous CSR arrays.
+
+    Postings for term_id t live in doc_ids/weights[term_offsets[t]:term_offsets[t + 1]],
+    sorted by doc_id. The same slice of impact_doc_ids/impact_values holds the
+    term's postings re-sorted by impact (weight / doc_norm) descending, so
+    impact_values[term_offsets[t]] is the term's score upper bound.
+
+    Indexes built from documents also carry a BM25F value per posting
+    (bm25_weights, aligned with doc_ids) and its own impact ordering, so
+    either scorer runs over the same posting traversal.
+
+    Optional doc_* attribute columns (see game_attributes.py) let searches
+    restrict hits to documents matching an AttributeFilter.
+    """
+    # vocab: term -> term_id (a dict when built in memory, CompactVocab when loaded)
+    vocab: Mapping[str, int]
+    # term_offsets: term_id -> start of its postings (int64, len = vocab + 1)
+    term_offsets: np.ndarray
+    # doc_ids: posting doc ids (int32)
+    doc_ids: np.ndarray
+    # weights: posting tfidf weights (float32)
+    weights: np.ndarray
+    # doc_norms: doc_id -> L2 norm (float32)
+    doc_norms: np.ndarray
+    # doc_appids: doc_id -> appid (int64)
+    doc_appids: np.ndarray
+    # idf: term_id -> idf (float32)
+    idf: np.ndarray
+    # impact_doc_ids / impact_values: postings ordered by impact desc, doc_id asc
+    impact_doc_ids: Optional[np.ndarray] = None
+    impact_values: Optional[np.ndarray] = None
+    # bm25_weights: posting BM25F values, saturated, without idf (float32)
+    bm25_weights: Optional[np.ndarray] = None
+    # bm25_impact_doc_ids / bm25_impact_values: bm25 postings ordered by value desc, doc_id asc
+    bm25_impact_doc_ids: Optional[np.ndarray] = None
+    bm25_impact_values: Optional[np.ndarray] = None
+    # bm25_avg_field_len: average token length per field at build time (float64, FIELDS order)
+    bm25_avg_field_len: Optional[np.ndarray] = None
+    # doc_platforms / doc_multiplayer / doc_difficulty: doc_id -> bits or code (uint8)
+    doc_platforms: Optional[np.ndarray] = None
+    doc_multiplayer: Optional[np.ndarray] = None
+    doc_difficulty: Optional[np.ndarray] = None
+    # doc_reviews: doc_id -> positive + negative reviews (int64)
+    doc_reviews: Optional[np.ndarray] = None
+    _filter_masks: Dict[AttributeFilter, np.ndarray] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    @property
+    def num_docs(self) -> int:
+        return int(self.doc_norms.shape[0])
+
+    @property
+    def has_attributes(self) -> bool:
+        return self.doc_reviews is not None
+
+    def filter_mask(self, filters: Optional[AttributeFilter]) -> Optional[np.ndarray]:
+        """Bool mask of documents passing filters (None when nothing is filtered)."""
+        if filters is None or filters.is_empty():
+            return None
+        if not self.has_attributes:
+            raise ValueError("index was built without attribute columns")
+        mask = self._filter_masks.get(filters)
+        if mask is None:
+            if len(self._filter_masks) >= MAX_CACHED_FILTER_MASKS:
+                self._filter_masks.clear()
+            mask = self._filter_masks[filters] = filters.mask(self)
+        return mask
+
+    def supports(self, scorer: str) -> bool:
+        return scorer == "tfidf" or (scorer == "bm25f" and self.bm25_weights is not None)
+
+    def check_scorer(self, scorer: str):
+        if scorer not in SCORERS:
+            raise ValueError(f"unknown scorer {scorer!r}")
+        if not self.supports(scorer):
+            raise ValueError(f"index was built without {scorer} statistics")
+
+    def document_frequency(self, tid: int) -> int:
+        return int(self.term_offsets[tid + 1] - self.term_offsets[tid])
+
+    def postings(self, tid: int, scorer: str = "tfidf") -> Tuple[np.ndarray, np.ndarray]:
+        start = self.term_offsets[tid]
+        end = self.term_offsets[tid + 1]
+        weights = self.bm25_weights if scorer == "bm25f" else self.weights
+        return self.doc_ids[start:end], weights[start:end]
+
+    def query_weights(self, query: str, scorer: str = "tfidf") -> List[Tuple[int, float]]:
+        q_terms = tokenize(query)
+        if not q_terms:
+            return []
+
+        q_weights = []
+        for term, tf in Counter(q_terms).items():
+            tid = self.vocab.get(term)
+            if tid is None:
+                continue
+            if scorer == "bm25f":
+                q_weights.append((tid, tf * bm25_idf(self.document_frequency(tid), self.num_docs)))
+            else:
+                # tf: 1 + log(tf)
+                q_weights.append((tid, (1.0 + math.log(tf)) * float(self.idf[tid])))
+        return q_weights
+
+    def search(
+        self,
+        query: str,
+        topk: int = 20,
+        exhaustive: bool = False,
+        scorer: str = "tfidf",
+        filters: Optional[AttributeFilter] = None,
+    ) -> List[Tuple[int, float, Dict[str, float]]]:
+        """
+        Top-k over the query terms: cosine for "tfidf", summed BM25F for
+        "bm25f", restricted to documents passing filters. The default path
+        prunes with per-term upper bounds; exhaustive=True scores every
+        matching document. Both return identical hits and scores.
+        """
+        self.check_scorer(scorer)
+        live = self.filter_mask(filters)
+        q_weights = self.query_weights(query, scorer)
+        if not q_weights:
+            return []
+
+        q_norm = query_norm(q_weights) if scorer == "tfidf" else 1.0
+        top_docs, top_scores = self.top_k(
+            q_weights, q_norm, topk, exhaustive=exhaustive, live=live, scorer=scorer
+        )
+        return self.explain_hits(top_docs, top_scores, q_weights, scorer)
+
+    def top_k(
+        self,
+        q_weights: List[Tuple[int, float]],
+        q_norm: float,
+        topk: int,
+        exhaustive: bool = False,
+        live: Optional[np.ndarray] = None,
+        scorer: str = "tfidf",
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score pre-weighted query terms. live, when given, is a bool mask over
+        doc ids; masked-out documents are never returned. For "bm25f" pass
+        q_norm=1.0: scores are plain sums of qw * posting value.
+        """
+        if exhaustive:
+            return self._score_exhaustive(q_weights, q_norm, topk, live, scorer)
+        return self._score_pruned(q_weights, q_norm, topk, live, scorer)
+
+    def _final_scores(self, dots: np.ndarray, docs: np.ndarray, q_norm: float, scorer: str) -> np.ndarray:
+        if scorer == "bm25f":
+            return dots
+        return dots / (q_norm * self.doc_norms[docs].astype(np.float64))
+
+    def _score_exhaustive(
+        self,
+        q_weights: List[Tuple[int, float]],
+        q_norm: float,
+        topk: int,
+        live: Optional[np.ndarray] = None,
+        scorer: str = "tfidf",
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # accumulate dot products into a dense score column; doc ids are unique
+        # within one posting list, so fancy-index += is safe per term.
+        scores = np.zeros(self.num_docs, dtype=np.float64)
+        touched = []
+        for tid, qw in q_weights:
+            ids, w = self.postings(tid, scorer)
+            scores[ids] += qw * w.astype(np.float64)
+            touched.append(ids)
+
+        candidates = np.unique(np.concatenate(touched))
+        if live is not None:
+            candidates = candidates[live[candidates]]
+        return select_top_k(candidates, self._final_scores(scores[candidates], candidates, q_norm, scorer), topk)
+
+    def _exact_dots(self, docs: np.ndarray, q_weights: List[Tuple[int, float]], scorer: str) -> np.ndarray:
+        # same per-term accumulation order as _score_exhaustive, so scores are bit-identical
+        dots = np.zeros(docs.size, dtype=np.float64)
+        for tid, qw in q_weights:
+            ids, w = self.postings(tid, scorer)
+            pos, found = _lookup(ids, docs)
+            dots[found] += qw * w[pos[found]].astype(np.float64)
+        return dots
+
+    def _score_pruned(
+        self,
+        q_weights: List[Tuple[int, float]],
+        q_norm: float,
+        topk: int,
+        live: Optional[np.ndarray] = None,
+        scorer: str = "tfidf",
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Threshold pruning over impact-ordered postings.
+
+        Each round reads the first `depth` postings of every query term,
+        scores that candidate set exactly, and stops once the sum of the next
+        unread impact of each term (the best any unseen document could score)
+        falls below the current k-th score. Depth grows geometrically, so work
+        tracks topk rather than posting-list length.
+        """
+        impact_doc_ids, impact_values = self.impacts(scorer)
+        if topk <= 0:
+            return self.doc_ids[:0], np.zeros(0, dtype=np.float64)
+
+        total = sum(self.document_frequency(tid) for tid, _ in q_weights)
+        # one bm25f term scores qw * value exactly, and unread postings tied
+        # with the k-th value have larger doc ids, so a tie is already decided
+        ties_decided = scorer == "bm25f" and len(q_weights) == 1
+        depth = max(topk, MIN_PROBE_DEPTH)
+        while True:
+            probes = []
+            frontier = 0.0
+            exhausted = True
+            probed = 0
+            for tid, qw in q_weights:
+                start = int(self.term_offsets[tid])
+                end = int(self.term_offsets[tid + 1])
+                stop = min(end, start + depth)
+                probes.append(impact_doc_ids[start:stop])
+                probed += stop - start
+                if stop < end:
+                    exhausted = False
+                    frontier += qw / q_norm * float(impact_values[stop])
+
+            if not exhausted and probed * 2 > total:
+                # flat impact distributions (many ties) would need most
+                # postings anyway; one exhaustive pass is cheaper
+                return self._score_exhaustive(q_weights, q_norm, topk, live, scorer)
+
+            candidates = np.unique(np.concatenate(probes))
+            if live is not None:
+                candidates = candidates[live[candidates]]
+            scores = self._final_scores(self._exact_dots(candidates, q_weights, scorer), candidates, q_norm, scorer)
+            top_docs, top_scores = select_top_k(candidates, scores, topk)
+
+            if exhausted:
+                return top_docs, top_scores
+            if top_docs.size == topk and frontier * (1.0 + BOUND_SLACK) < top_scores[-1]:
+                return top_docs, top_scores
+            if ties_decided and top_docs.size == topk and frontier <= top_scores[-1]:
+                return top_docs, top_scores
+            depth *= 4
+
+    @cached_property
+    def terms(self) -> Sequence[str]:
+        # term_id -> term; a compact vocab already stores terms in id order
+        if isinstance(self.vocab, CompactVocab):
+            return self.vocab.terms
+        terms = [""] * len(self.vocab)
+        for term, tid in self.vocab.items():
+            terms[tid] = term
+        return terms
+
+    def term_for(self, tid: int) -> str:
+        return self.terms[tid]
+
+    def ensure_impacts(self):
+        if self.impact_doc_ids is None or self.impact_values is None:
+            self.impact_doc_ids, self.impact_values = build_impact_order(
+                self.term_offsets, self.doc_ids, self.weights, self.doc_norms
+            )
+
+    def impacts(self, scorer: str = "tfidf") -> Tuple[np.ndarray, np.ndarray]:
+        if scorer == "bm25f":
+            if self.bm25_impact_doc_ids is None or self.bm25_impact_values is None:
+                self.bm25_impact_doc_ids, self.bm25_impact_values = build_impact_order(
+                    self.term_offsets, self.doc_ids, self.bm25_weights
+                )
+            return self.bm25_impact_doc_ids, self.bm25_impact_values
+        self.ensure_impacts()
+        return self.impact_doc_ids, self.impact_values
+
+    def explain_hits(
+        self,
+        top_docs: np.ndarray,
+        top_scores: np.ndarray,
+        q_weights: List[Tuple[int, float]],
+        scorer: str = "tfidf",
+    ) -> List[Tuple[int, float, Dict[str, float]]]:
+        if top_docs.size == 0:
+            return []
+
+        # contrib[i, j]: contribution of query term j to hit i (0 when absent)
+        contrib = np.zeros((top_docs.size, len(q_weights)), dtype=np.float64)
+        for j, (tid, qw) in enumerate(q_weights):
+            ids, w = self.postings(tid, scorer)
+            pos, found = _lookup(ids, top_docs)
+            contrib[found, j] = qw * w[pos[found]].astype(np.float64)
+
+        out = []
+        for i, doc_id in enumerate(top_docs.tolist()):
+            row = contrib[i]
+            # top 3 contributors, earlier query terms win ties
+            order = np.argsort(-row, kind="stable")[:3]
+            why = {}
+            for j in order.tolist():
+                if row[j] <= 0.0:
+                    break
+                why[self.term_for(q_weights[j][0])] = float(row[j])
+            out.append((doc_id, float(top_scores[i]), why))
+        return out
+
+    @classmethod
+    def from_tfidf_index(cls, index: TfidfIndex) -> "ColumnarTfidfIndex":
+        n_terms = len(index.vocab)
+        counts = np.zeros(n_terms, dtype=np.int64)
+        for tid, plist in index.postings.items():
+            counts[tid] = len(plist)
+
+        term_offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(counts, out=term_offsets[1:])
+
+        doc_ids = np.empty(int(term_offsets[-1]), dtype=DOC_ID_DTYPE)
+        weights = np.empty(int(term_offsets[-1]), dtype=WEIGHT_DTYPE)
+        for tid, plist in index.postings.items():
+            if not plist:
+                continue
+            start = term_offsets[tid]
+            ids, ws = zip(*plist)
+            doc_ids[start:start + len(plist)] = ids
+            weights[start:start + len(plist)] = ws
+
+        doc_norms = np.asarray(index.doc_norms, dtype=WEIGHT_DTYPE)
+        impact_doc_ids, impact_values = build_impact_order(term_offsets, doc_ids, weights, doc_norms)
+        return cls(
+            vocab=dict(index.vocab),
+            term_offsets=term_offsets,
+            doc_ids=doc_ids,
+            weights=weights,
+            doc_norms=doc_norms,
+            doc_appids=np.asarray(index.doc_appids, dtype=np.int64),
+            idf=np.asarray(index.idf, dtype=WEIGHT_DTYPE),
+            impact_doc_ids=impact_doc_ids,
+            impact_values=impact_values,
+        )
+
+
+def query_norm(q_weights: List[Tuple[int, float]]) -> float:
+    return math.sqrt(sum(w * w for _, w in q_weights)) or 1.0
+
+
+def _lookup(ids: np.ndarray, docs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions of docs inside the sorted posting slice ids, plus a found mask."""
+    if ids.size == 0:
+        return np.zeros(docs.size, dtype=np.int64), np.zeros(docs.size, dtype=bool)
+    pos = np.minimum(np.searchsorted(ids, docs), ids.size - 1)
+    return pos, ids[pos] == docs
+
+
+def build_impact_order(
+    term_offsets: np.ndarray,
+    doc_ids: np.ndarray,
+    weights: np.ndarray,
+    doc_norms: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Re-sort each term's postings by weight / doc_norm desc (doc_id asc on
+    ties); without doc_norms the weights themselves are the impacts.
+    """
+    if doc_norms is None:
+        impacts = np.asarray(weights, dtype=WEIGHT_DTYPE)
+    else:
+        impacts = (weights.astype(np.float64) / doc_norms[doc_ids].astype(np.float64)).astype(WEIGHT_DTYPE)
+    term_of_posting = np.repeat(np.arange(term_offsets.size - 1, dtype=np.int64), np.diff(term_offsets))
+    order = np.lexsort((doc_ids, -impacts, term_of_posting))
+    return doc_ids[order], impacts[order]
+
+
+def select_top_k(doc_ids: np.ndarray, scores: np.ndarray, topk: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the topk (doc_id, score) pairs ordered by score desc, then doc_id asc."""
+    if topk <= 0 or scores.size == 0:
+        return doc_ids[:0], scores[:0]
+
+    if topk < scores.size:
+        # partial selection: keep everything tied with the k-th score so the
+        # doc_id tie-break stays deterministic, then order only the survivors.
+        kth = np.partition(scores, scores.size - topk)[scores.size - topk]
+        keep = np.flatnonzero(scores >= kth)
+        doc_ids, scores = doc_ids[keep], scores[keep]
+
+    order = np.lexsort((doc_ids, -scores))[:topk]
+    return doc_ids[order], scores[order]
+
+
+def attach_bm25f(
+    index: ColumnarTfidfIndex,
+    documents: List[str],
+    avg_field_len: Optional[np.ndarray] = None,
+) -> ColumnarTfidfIndex:
+    """
+    Add BM25F posting values for the documents index was built from (same
+    order). avg_field_len defaults to these documents' own averages; deltas
+    pass the main segment's so their values stay comparable.
+    """
+    field_tfs = np.zeros((index.doc_ids.size, len(FIELDS)), dtype=np.uint32)
+    doc_field_lens = np.zeros((index.num_docs, len(FIELDS)), dtype=np.int64)
+    # postings are doc-sorted per term, so walking docs in order fills each slice front to back
+    cursor = index.term_offsets[:-1].tolist()
+    for doc_id, doc in enumerate(documents):
+        counts, lens = field_term_counts(doc)
+        doc_field_lens[doc_id] = lens
+        positions = {}
+        for f, field_counts in enumerate(counts):
+            for term, tf in field_counts.items():
+                pos = positions.get(term)
+                if pos is None:
+                    tid = index.vocab[term]
+                    pos = positions[term] = cursor[tid]
+                    cursor[tid] += 1
+                field_tfs[pos, f] = tf
+
+    if avg_field_len is None:
+        avg_field_len = average_field_lengths(doc_field_lens.sum(axis=0), index.num_docs)
+    index.bm25_avg_field_len = np.asarray(avg_field_len, dtype=np.float64)
+    index.bm25_weights = saturate(field_tfs, doc_field_lens[index.doc_ids], index.bm25_avg_field_len)
+    index.bm25_impact_doc_ids, index.bm25_impact_values = build_impact_order(
+        index.term_offsets, index.doc_ids, index.bm25_weights
+    )
+    return index
+
+
+def build_columnar_index_from_documents(
+    documents: List[str],
+    appids: List[int],
+) -> ColumnarTfidfIndex:
+    index = ColumnarTfidfIndex.from_tfidf_index(build_index_from_documents(documents, appids))
+    return attach_bm25f(index, documents)
+
+
+def build_columnar_index_from_postings(
+    terms: List[str],
+    term_ids: np.ndarray,
+    doc_ids: np.ndarray,
+    tfs: np.ndarray,
+    appids: np.ndarray,
+    bm25_weights: Optional[np.ndarray] = None,
+    bm25_avg_field_len: Optional[np.ndarray] = None,
+) -> ColumnarTfidfIndex:
+    """
+    Vectorized build from one (term_id, doc_id, tf) triple per distinct term in
+    each document; term_ids index into terms, doc_ids into appids. Produces
+    the same weighting as build_index_from_documents. bm25_weights, when
+    given, are carried along per triple (they do not depend on idf).
+    """
+    n_docs = len(appids)
+    term_ids = np.asarray(term_ids, dtype=np.int64)
+    doc_ids = np.asarray(doc_ids, dtype=np.int64)
+
+    # vocab ordered by document frequency, most common first; unused terms dropped
+    df = np.bincount(term_ids, minlength=len(terms))
+    order = np.lexsort((np.arange(len(terms)), -df))
+    order = order[df[order] > 0]
+    remap = np.full(len(terms), -1, dtype=np.int64)
+    remap[order] = np.arange(order.size)
+    tids = remap[term_ids]
+    df = df[order]
+
+    idf = np.log((n_docs + 1) / (df + 1)) + 1.0  # smooth
+    w = (1.0 + np.log(np.asarray(tfs, dtype=np.float64))) * idf[tids]
+    doc_norms = np.sqrt(np.bincount(doc_ids, weights=w * w, minlength=n_docs))
+    doc_norms[doc_norms == 0.0] = 1.0
+
+    sort = np.lexsort((doc_ids, tids))
+    term_offsets = np.zeros(order.size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tids, minlength=order.size), out=term_offsets[1:])
+
+    posting_doc_ids = doc_ids[sort].astype(DOC_ID_DTYPE)
+    weights = w[sort].astype(WEIGHT_DTYPE)
+    doc_norms = doc_norms.astype(WEIGHT_DTYPE)
+    impact_doc_ids, impact_values = build_impact_order(term_offsets, posting_doc_ids, weights, doc_norms)
+    index = ColumnarTfidfIndex(
+        vocab={terms[gid]: i for i, gid in enumerate(order.tolist())},
+        term_offsets=term_offsets,
+        doc_ids=posting_doc_ids,
+        weights=weights,
+        doc_norms=doc_norms,
+        doc_appids=np.asarray(appids, dtype=np.int64),
+        idf=idf.astype(WEIGHT_DTYPE),
+        impact_doc_ids=impact_doc_ids,
+        impact_values=impact_values,
+    )
+    if bm25_weights is not None:
+        index.bm25_weights = np.asarray(bm25_weights, dtype=WEIGHT_DTYPE)[sort]
+        index.bm25_avg_field_len = np.asarray(bm25_avg_field_len, dtype=np.float64)
+        index.bm25_impact_doc_ids, index.bm25_impact_values = build_impact_order(
+            term_offsets, posting_doc_ids, index.bm25_weights
+        )
+    return index
+
+
+def split_by_doc_range(index: ColumnarTfidfIndex, num_shards: int) -> List[ColumnarTfidfIndex]:
+    """
+    Partition index into num_shards contiguous doc-id ranges of (nearly) equal
+    size. Each shard keeps the global weights, norms and idf of its postings
+    and only the terms it contains, so per-shard scores equal the monolithic
+    index's and shard top-k lists merge into the global top-k.
+    """
+    n_docs = index.num_docs
+    num_shards = max(1, min(int(num_shards), n_docs))
+    if num_shards == 1:
+        return [index]
+
+    n_terms = index.term_offsets.size - 1
+    bounds = np.linspace(0, n_docs, num_shards + 1).astype(np.int64)
+    doc_ids = np.asarray(index.doc_ids)
+    term_of_posting = np.repeat(np.arange(n_terms, dtype=np.int64), np.diff(index.term_offsets))
+    shard_of_posting = np.searchsorted(bounds, doc_ids, side="right") - 1
+    terms = index.terms
+
+    shards = []
+    for shard_no in range(num_shards):
+        lo, hi = int(bounds[shard_no]), int(bounds[shard_no + 1])
+        sel = shard_of_posting == shard_no
+        # postings stay ordered by (term, doc), so each term's slice stays doc-sorted
+        counts = np.bincount(term_of_posting[sel], minlength=n_terms)
+        kept = np.flatnonzero(counts)
+        term_offsets = np.zeros(kept.size + 1, dtype=np.int64)
+        np.cumsum(counts[kept], out=term_offsets[1:])
+
+        shard_doc_ids = (doc_ids[sel] - lo).astype(DOC_ID_DTYPE)
+        weights = np.asarray(index.weights)[sel]
+        doc_norms = np.asarray(index.doc_norms[lo:hi])
+        impact_doc_ids, impact_values = build_impact_order(term_offsets, shard_doc_ids, weights, doc_norms)
+        shard = ColumnarTfidfIndex(
+            vocab={terms[tid]: i for i, tid in enumerate(kept.tolist())},
+            term_offsets=term_offsets,
+            doc_ids=shard_doc_ids,
+            weights=weights,
+            doc_norms=doc_norms,
+            doc_appids=np.asarray(index.doc_appids[lo:hi]),
+            idf=np.asarray(index.idf)[kept],
+            impact_doc_ids=impact_doc_ids,
+            impact_values=impact_values,
+        )
+        if index.bm25_weights is not None:
+            shard.bm25_weights = np.asarray(index.bm25_weights)[sel]
+            shard.bm25_avg_field_len = index.bm25_avg_field_len
+            shard.bm25_impact_doc_ids, shard.bm25_impact_values = build_impact_order(
+                term_offsets, shard_doc_ids, shard.bm25_weights
+            )
+        if index.has_attributes:
+            for name in ATTRIBUTE_COLUMNS:
+                setattr(shard, name, np.asarray(getattr(index, name)[lo:hi]))
+        shards.append(shard)
+    return shards
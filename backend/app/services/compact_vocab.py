@@ -0,0 +1,121 @@
+"""
+Term <-> term id mapping without a Python object per term.
+
+Terms are stored in term-id order in one UTF-8 blob plus int64 offsets, so
+id -> term is a slice. term -> id goes through an open-addressing table of
+term ids (int32, at most half full) keyed by crc32 of the term's bytes; a
+lookup hashes once and compares one or two byte slices. All three arrays are
+saved as index sections, so a loaded vocab stays in the shared mmap instead
+of becoming hundreds of thousands of str/int objects in every worker.
+"""
+import zlib
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+EMPTY_SLOT = -1
+
+
+def _slot_count(num_terms: int) -> int:
+    # power of two with load factor <= 0.5, so probe chains stay short
+    size = 8
+    while size < 2 * num_terms:
+        size *= 2
+    return size
+
+
+def encode_terms(terms: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """(blob, offsets) for terms in term-id order."""
+    encoded = [t.encode("utf-8") for t in terms]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def build_slots(blob: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    raw = blob.tobytes()
+    bounds = offsets.tolist()
+    slots = np.full(_slot_count(len(bounds) - 1), EMPTY_SLOT, dtype=np.int32)
+    mask = slots.size - 1
+    for tid in range(len(bounds) - 1):
+        slot = zlib.crc32(raw[bounds[tid]:bounds[tid + 1]]) & mask
+        while slots[slot] != EMPTY_SLOT:
+            slot = (slot + 1) & mask
+        slots[slot] = tid
+    return slots
+
+
+class TermSequence(Sequence):
+    """Read-only term_id -> term view, used where a list of terms was."""
+
+    def __init__(self, vocab: "CompactVocab"):
+        self._vocab = vocab
+
+    def __len__(self) -> int:
+        return len(self._vocab)
+
+    def __getitem__(self, tid):
+        if isinstance(tid, slice):
+            return [self._vocab.term(i) for i in range(*tid.indices(len(self)))]
+        return self._vocab.term(tid)
+
+
+class CompactVocab(Mapping):
+    """Mapping[str, int] over (blob, offsets, slots) arrays; ids are 0..len-1."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray, slots: Optional[np.ndarray] = None):
+        self.blob = blob
+        self.offsets = offsets
+        self.slots = build_slots(blob, offsets) if slots is None else slots
+        # memoryviews index to plain ints without creating numpy scalars
+        self._raw = memoryview(blob)
+        self._offsets = memoryview(np.ascontiguousarray(offsets, dtype=np.int64))
+        self._slots = memoryview(np.ascontiguousarray(self.slots, dtype=np.int32))
+        self._mask = len(self._slots) - 1
+        self._len = len(self._offsets) - 1
+
+    @classmethod
+    def from_dict(cls, vocab: Dict[str, int]) -> "CompactVocab":
+        terms = [""] * len(vocab)
+        for term, tid in vocab.items():
+            terms[tid] = term
+        return cls(*encode_terms(terms))
+
+    def get(self, term: str, default=None):
+        key = term.encode("utf-8")
+        slot = zlib.crc32(key) & self._mask
+        while True:
+            tid = self._slots[slot]
+            if tid == EMPTY_SLOT:
+                return default
+            if self._raw[self._offsets[tid]:self._offsets[tid + 1]] == key:
+                return tid
+            slot = (slot + 1) & self._mask
+
+    def __getitem__(self, term: str) -> int:
+        tid = self.get(term)
+        if tid is None:
+            raise KeyError(term)
+        return tid
+
+    def __contains__(self, term) -> bool:
+        return isinstance(term, str) and self.get(term) is not None
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.term(tid) for tid in range(self._len))
+
+    def term(self, tid: int) -> str:
+        if not 0 <= tid < self._len:
+            raise IndexError(tid)
+        return str(self._raw[self._offsets[tid]:self._offsets[tid + 1]], "utf-8")
+
+    @property
+    def terms(self) -> TermSequence:
+        return TermSequence(self)
+
+    def nbytes(self) -> int:
+        return int(self.blob.nbytes + self.offsets.nbytes + self.slots.nbytes)
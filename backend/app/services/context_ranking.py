@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Any
 
+from app.services.analyzer import normalize_term
+from app.services.keyword_matcher import KeywordAutomaton
+
 
 def clamp(num: float, minimum: float, maximum: float) -> float:
     return max(minimum, min(maximum, num))
@@ -104,6 +108,133 @@ HIGH_INTENSITY_KEYWORDS = (
     "fighting",
     "souls-like",
 )
+HARD_DIFFICULTY_KEYWORDS = ("hard", "high difficulty")
+MEDIUM_INTENSITY_KEYWORDS = ("shooter", "action", "sports", "competitive", "pvp", "medium")
+EASY_DIFFICULTY_KEYWORDS = ("easy", "low difficulty")
+# first matching rule wins
+SESSION_LENGTH_RULES = (
+    (("battle", "moba", "shooter", "fighting", "party"), 30),
+    (("roguel", "action", "arcade"), 40),
+    (("racing", "sports"), 35),
+    (("strategy", "rpg", "4x"), 75),
+    (("mmo",), 90),
+    (("adventure", "story", "narrative", "visual novel"), 60),
+    (("sandbox", "simulation", "builder", "farming"), 50),
+)
+DEFAULT_SESSION_LENGTH = 45
+
+# every keyword the text helpers look for, matched in one pass per haystack
+RANKING_KEYWORDS = frozenset(
+    [
+        *SOCIAL_KEYWORDS,
+        *(keyword for config in GOAL_KEYWORDS.values() for keywords in config.values() for keyword in keywords),
+        *LOW_INTENSITY_KEYWORDS,
+        *MID_INTENSITY_KEYWORDS,
+        *HIGH_INTENSITY_KEYWORDS,
+        *FPS_PRIORITY_KEYWORDS,
+        *HARD_DIFFICULTY_KEYWORDS,
+        *MEDIUM_INTENSITY_KEYWORDS,
+        *EASY_DIFFICULTY_KEYWORDS,
+        *(keyword for keywords, _ in SESSION_LENGTH_RULES for keyword in keywords),
+    ]
+)
+KEYWORD_AUTOMATON = KeywordAutomaton(RANKING_KEYWORDS)
+HAYSTACK_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=None)
+def keyword_group(keywords: tuple[str, ...]) -> tuple[int, tuple[str, ...], bool]:
+    """
+    (bitmask of the group's automaton keywords, keywords checked the slow
+    way, whether popcount equals the per-keyword count).
+    """
+    mask = 0
+    other = []
+    for keyword in keywords:
+        bit = KEYWORD_AUTOMATON.bit(keyword)
+        if bit is None or keyword != keyword.lower().strip():
+            other.append(keyword)
+        else:
+            mask |= 1 << bit
+    return mask, tuple(other), not other and len(set(keywords)) == len(keywords)
+
+
+class KeywordHits:
+    """
+    Ranking keywords found in one haystack, as a bitmask over the automaton's
+    keywords. any() has `keyword in haystack` semantics, count_matches() the
+    keyword_matches() semantics; keywords outside RANKING_KEYWORDS fall back
+    to those checks.
+    """
+
+    __slots__ = ("text", "mask")
+
+    def __init__(self, text: str, mask: int):
+        self.text = text
+        self.mask = mask
+
+    def any(self, keywords: tuple[str, ...]) -> bool:
+        mask, other, _ = keyword_group(keywords)
+        return bool(self.mask & mask) or any(keyword in self.text for keyword in other)
+
+    def count_matches(self, keywords: tuple[str, ...]) -> int:
+        mask, other, exact = keyword_group(keywords)
+        matched = self.mask | _term_mask(self.text)
+        if exact:
+            return (matched & mask).bit_count()
+        terms = haystack_terms(self.text)
+        return sum(
+            1
+            for keyword in keywords
+            if keyword_matches(keyword, terms, self.text)
+        )
+
+
+@lru_cache(maxsize=HAYSTACK_CACHE_SIZE)
+def _scan(text: str) -> tuple[int, int]:
+    return KEYWORD_AUTOMATON.scan(text)
+
+
+@lru_cache(maxsize=1)
+def _keyword_form_bits() -> dict[str, int]:
+    # normalized / folded keyword form -> bits of the keywords it matches
+    form_bits: dict[str, int] = {}
+    for bit, keyword in enumerate(KEYWORD_AUTOMATON.keywords):
+        for form in set(_keyword_forms(keyword)):
+            form_bits[form] = form_bits.get(form, 0) | 1 << bit
+    return form_bits
+
+
+@lru_cache(maxsize=HAYSTACK_CACHE_SIZE)
+def _term_mask(haystack: str) -> int:
+    # keywords matched through normalized terms rather than as substrings ("coop" in "co-op")
+    form_bits = _keyword_form_bits()
+    mask = 0
+    for term in haystack_terms(haystack).intersection(form_bits):
+        mask |= form_bits[term]
+    return mask
+
+
+def keyword_hits(haystack: str) -> KeywordHits:
+    return KeywordHits(haystack, _scan(haystack)[0])
+
+
+@lru_cache(maxsize=HAYSTACK_CACHE_SIZE)
+def composed_hits(*parts: str | None) -> KeywordHits:
+    """
+    Hits for compose_game_text(*parts). The descriptor is usually the first
+    part and is shared by several haystacks of the same game, so its scan is
+    cached and only the remaining parts are scanned on top of it.
+    """
+    haystack = compose_game_text(*parts)
+    base = compose_game_text(parts[0]) if parts else ""
+    if not base or len(parts) == 1 or not haystack.startswith(base):
+        return keyword_hits(haystack)
+    mask, state = _scan(base)
+    if len(haystack) > len(base):
+        more, _ = KEYWORD_AUTOMATON.scan(haystack[len(base):], state)
+        mask |= more
+    return KeywordHits(haystack, mask)
 
 
 def compose_game_text(*parts: str | None) -> str:
@@ -111,49 +242,61 @@ def compose_game_text(*parts: str | None) -> str:
 
 
 def contains_any(text: str, keywords: tuple[str, ...]) -> bool:
-    return any(keyword in text for keyword in keywords)
+    return keyword_hits(text).any(keywords)
 
 
 def normalize_terms(*raw_values: str) -> set[str]:
+    """Words, hyphen parts and comma-separated phrases; hyphenated forms are also folded ("co-op" -> "coop")."""
     terms: set[str] = set()
     for raw in raw_values:
         if not raw:
             continue
         text = str(raw).lower()
-        for token in text.replace("/", " ").replace("-", " ").replace("_", " ").replace("&", " ").split(","):
+        for token in text.replace("/", " ").replace("_", " ").replace("&", " ").split(","):
             for piece in token.split():
-                piece = piece.strip()
-                if piece:
-                    terms.add(piece)
-            token = token.strip()
-            if token:
-                terms.add(token)
+                terms.update(part for part in piece.split("-") if part)
+                terms.add(normalize_term(piece))
+            phrase = token.strip()
+            if phrase:
+                terms.add(phrase.replace("-", " "))
+                terms.add(normalize_term(phrase))
+    terms.discard("")
     return terms
 
 
-def keyword_matches(keyword: str, normalized_terms: set[str], haystack: str) -> bool:
+@lru_cache(maxsize=HAYSTACK_CACHE_SIZE)
+def haystack_terms(haystack: str) -> frozenset[str]:
+    return frozenset(normalize_terms(haystack))
+
+
+@lru_cache(maxsize=None)
+def _keyword_forms(keyword: str) -> tuple[str, str]:
     normalized_keyword = keyword.lower().strip()
+    return normalized_keyword, normalize_term(normalized_keyword)
+
+
+def keyword_matches(keyword: str, normalized_terms: set[str], haystack: str) -> bool:
+    normalized_keyword, folded_keyword = _keyword_forms(keyword)
     if not normalized_keyword:
         return False
-    return normalized_keyword in normalized_terms or normalized_keyword in haystack
+    return (
+        normalized_keyword in normalized_terms
+        or folded_keyword in normalized_terms
+        or normalized_keyword in haystack
+    )
 
 
 
 
 def get_priority_keyword_hits(keywords: tuple[str, ...], text: str = "", multiplayer_mode: str = "") -> int:
-    haystack = compose_game_text(text, multiplayer_mode)
-    terms = normalize_terms(haystack)
-    return sum(1 for keyword in keywords if keyword_matches(keyword, terms, haystack))
+    return composed_hits(text, multiplayer_mode).count_matches(keywords)
 
 def get_goal_alignment(goal: str, text: str = "", multiplayer_mode: str = "") -> tuple[int, int]:
     config = GOAL_KEYWORDS.get(goal)
     if not config:
         return 0, 0
-    haystack = compose_game_text(text, multiplayer_mode)
-    terms = normalize_terms(haystack)
-    positive_hits = sum(1 for keyword in config["positive"] if keyword_matches(keyword, terms, haystack))
-    negative_hits = sum(1 for keyword in config["negative"] if keyword_matches(keyword, terms, haystack))
-    return positive_hits, negative_hits
+    hits = composed_hits(text, multiplayer_mode)
+    return hits.count_matches(config["positive"]), hits.count_matches(config["negative"])
 
 
 
@@ -174,45 +317,38 @@ def stable_title_tiebreak(value: str = "") -> float:
 
 
 def get_session_length_by_text(text: str = "") -> int:
-    key = text.lower()
-    if any(x in key for x in ("battle", "moba", "shooter", "fighting", "party")):
-        return 30
-    if any(x in key for x in ("roguel", "action", "arcade")):
-        return 40
-    if any(x in key for x in ("racing", "sports")):
-        return 35
-    if any(x in key for x in ("strategy", "rpg", "4x")):
-        return 75
-    if "mmo" in key:
-        return 90
-    if any(x in key for x in ("adventure", "story", "narrative", "visual novel")):
-        return 60
-    if any(x in key for x in ("sandbox", "simulation", "builder", "farming")):
-        return 50
-    return 45
+    hits = keyword_hits(text.lower())
+    for keywords, minutes in SESSION_LENGTH_RULES:
+        if hits.any(keywords):
+            return minutes
+    return DEFAULT_SESSION_LENGTH
 
 
 def get_intensity_by_text(text: str = "", difficulty: str = "") -> int:
-    key = compose_game_text(text, difficulty)
-    if contains_any(key, HIGH_INTENSITY_KEYWORDS) or any(x in key for x in ("hard", "high difficulty")):
+    hits = composed_hits(text, difficulty)
+    if hits.any(HIGH_INTENSITY_KEYWORDS) or hits.any(HARD_DIFFICULTY_KEYWORDS):
         return 3
-    if any(x in key for x in ("shooter", "action", "sports", "competitive", "pvp", "medium")):
+    if hits.any(MEDIUM_INTENSITY_KEYWORDS):
         return 2
-    if contains_any(key, MID_INTENSITY_KEYWORDS):
+    if hits.any(MID_INTENSITY_KEYWORDS):
         return 1
-    if contains_any(key, LOW_INTENSITY_KEYWORDS) or any(x in key for x in ("easy", "low difficulty")):
+    if hits.any(LOW_INTENSITY_KEYWORDS) or hits.any(EASY_DIFFICULTY_KEYWORDS):
         return 0
     return 1
 
 
 def is_social_game(text: str = "", multiplayer_mode: str = "") -> bool:
-    key = compose_game_text(text, multiplayer_mode)
-    return contains_any(key, SOCIAL_KEYWORDS)
+    return composed_hits(text, multiplayer_mode).any(SOCIAL_KEYWORDS)
 
 
 def get_goal_boost(goal: str, text: str = "", multiplayer_mode: str = "") -> float:
     positive_hits, negative_hits = get_goal_alignment(goal, text, multiplayer_mode)
+    fps_hits = get_priority_keyword_hits(FPS_PRIORITY_KEYWORDS, text, multiplayer_mode) if goal == "competitive" else 0
+    return goal_boost_from_hits(goal, positive_hits, negative_hits, fps_hits)
+
 
+def goal_boost_from_hits(goal: str, positive_hits: int, negative_hits: int, fps_hits: int = 0) -> float:
+    """get_goal_boost() for already counted goal and FPS keyword hits."""
     if goal == "social":
         if positive_hits == 0:
             return -6 - min(4, negative_hits * 2)
@@ -224,7 +360,6 @@ def get_goal_boost(goal: str, text: str = "", multiplayer_mode: str = "") -> flo
 
     if goal == "competitive":
         score = 8 + (positive_hits * 2.5) - (negative_hits * 3)
-        fps_hits = get_priority_keyword_hits(FPS_PRIORITY_KEYWORDS, text, multiplayer_mode)
         if fps_hits > 0:
             score += min(6, 2 + (fps_hits * 0.9))
         return clamp(score, -8, 28)
@@ -254,22 +389,47 @@ def create_standard_reasons(
     multiplayer_mode: str = "",
     difficulty: str = "",
 ) -> list[str]:
+    return standard_reasons(
+        item,
+        session_length=get_session_length_by_text(descriptor_text),
+        intensity=get_intensity_by_text(descriptor_text, difficulty),
+        social_game=is_social_game(descriptor_text, multiplayer_mode),
+        goal_hits=get_goal_alignment(goal, descriptor_text, multiplayer_mode),
+        fps_hits=get_priority_keyword_hits(FPS_PRIORITY_KEYWORDS, descriptor_text, multiplayer_mode),
+        time_available=time_available,
+        energy=energy,
+        goal=goal,
+        friends_online=friends_online,
+        device=device,
+    )
+
+
+def standard_reasons(
+    item: dict[str, Any],
+    *,
+    session_length: int,
+    intensity: int,
+    social_game: bool,
+    goal_hits: tuple[int, int],
+    fps_hits: int,
+    time_available: int,
+    energy: str,
+    goal: str,
+    friends_online: bool,
+    device: str,
+) -> list[str]:
+    """create_standard_reasons() for already inferred game features."""
     reasons: list[str] = []
-    session_length = get_session_length_by_text(descriptor_text)
-    social_game = is_social_game(descriptor_text, multiplayer_mode)
-    intensity = get_intensity_by_text(descriptor_text, difficulty)
-
     if abs(session_length - time_available) <= 20:
         reasons.append(f"Fits your {time_available} minute window")
     if energy == "low" and intensity <= 1:
         reasons.append("Low mental load for your current energy")
     if energy == "high" and intensity >= 2:
         reasons.append("High intensity option while you are focused")
-    goal_positive_hits, goal_negative_hits = get_goal_alignment(goal, descriptor_text, multiplayer_mode)
+    goal_positive_hits, goal_negative_hits = goal_hits
     if goal == "relax" and goal_positive_hits > goal_negative_hits:
         reasons.append("Supports a more relaxed session")
     if goal == "competitive" and goal_positive_hits > goal_negative_hits:
-        fps_hits = get_priority_keyword_hits(FPS_PRIORITY_KEYWORDS, descriptor_text, multiplayer_mode)
         reasons.append("Strong FPS fit for a competitive session" if fps_hits > 0 else "Matches a competitive mood")
     if goal == "story" and goal_positive_hits > goal_negative_hits:
         reasons.append("Strong fit for a story-driven session")
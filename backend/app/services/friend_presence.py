@@ -0,0 +1,276 @@
+"""
+Per-steamid cache of friends and their online status.
+
+Fetching presence takes two Steam Web API calls (GetFriendList, then
+GetPlayerSummaries), so requests read it from here instead. Friend lists
+change rarely and are kept for hours; presence (the player summaries) goes
+stale after a minute. A stale entry is still served and refreshed on a
+background worker (stale-while-revalidate), and a refresher thread keeps
+the entries of recently active users warm, so they normally never wait on
+Steam. Presence older than max_stale is not served: /api/steam/friends then
+fetches it synchronously (or waits for the fetch already running),
+/api/recommend counts no friends online and schedules the fetch. A failed
+fetch (a private friend list answers 401, say) is not retried before an
+exponentially growing backoff runs out; until then waiting callers get the
+same error again.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from app.services.steam_client import count_online, get_friend_ids, get_friend_summaries
+
+DEFAULT_FRIEND_LIST_TTL_SECONDS = 6 * 3600
+DEFAULT_PRESENCE_TTL_SECONDS = 60
+DEFAULT_PRESENCE_MAX_STALE_SECONDS = 15 * 60
+# the refresher keeps steamids requested within this window fresh
+ACTIVE_WINDOW_SECONDS = 10 * 60
+REFRESH_INTERVAL_SECONDS = 15
+# refresh ahead once presence is this far into its TTL
+REFRESH_AHEAD = 0.75
+MAX_ENTRIES = 10000
+REFRESH_WORKERS = 4
+# after a failed refresh, wait this long (doubling per failure in a row) before the next
+FAILURE_BACKOFF_SECONDS = 60
+MAX_FAILURE_BACKOFF_SECONDS = 3600
+# a caller waiting on another caller's refresh gives up after this long
+WAIT_TIMEOUT_SECONDS = 30
+
+
+class PresenceEntry:
+    __slots__ = (
+        "friend_ids", "friends_at", "players", "presence_at", "last_requested",
+        "refreshing", "refreshed", "failures", "retry_at", "error",
+    )
+
+    def __init__(self, now: float):
+        self.friend_ids: Optional[List[str]] = None
+        self.friends_at = 0.0
+        self.players: Optional[List[dict]] = None
+        self.presence_at: Optional[float] = None
+        self.last_requested = now
+        self.refreshing = False
+        # set when the refresh in flight finishes, either way
+        self.refreshed: Optional[threading.Event] = None
+        self.failures = 0
+        self.retry_at = 0.0
+        self.error: Optional[Exception] = None
+
+
+class FriendPresenceCache:
+    def __init__(
+        self,
+        api_key: str,
+        friend_list_ttl: float = DEFAULT_FRIEND_LIST_TTL_SECONDS,
+        presence_ttl: float = DEFAULT_PRESENCE_TTL_SECONDS,
+        max_stale: float = DEFAULT_PRESENCE_MAX_STALE_SECONDS,
+        fetch_friend_ids: Callable[[str, str], List[str]] = get_friend_ids,
+        fetch_summaries: Callable[[str, List[str]], List[dict]] = get_friend_summaries,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.api_key = api_key
+        self.friend_list_ttl = float(friend_list_ttl)
+        self.presence_ttl = float(presence_ttl)
+        self.max_stale = max(float(max_stale), self.presence_ttl)
+        self._fetch_friend_ids = fetch_friend_ids
+        self._fetch_summaries = fetch_summaries
+        self._clock = clock
+        self._entries: Dict[str, PresenceEntry] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.last_error: Optional[str] = None
+
+    def friends(self, steamid: str, wait: bool = True) -> Optional[List[dict]]:
+        """
+        Friends' player summaries in friend list order. Without a servable
+        entry, wait=True fetches from Steam, or waits for the fetch already
+        running (errors propagate, and repeat until the failure backoff runs
+        out); wait=False schedules the fetch and returns None.
+        """
+        if not self.api_key:
+            return []
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(steamid)
+            if entry is None:
+                entry = self._entries[steamid] = PresenceEntry(now)
+            entry.last_requested = now
+            if self._servable(entry, now):
+                if self._is_stale(entry, now):
+                    self.stale_hits += 1
+                    self._schedule_locked(steamid, entry, now)
+                else:
+                    self.hits += 1
+                return entry.players
+            self.misses += 1
+            if not wait:
+                self._schedule_locked(steamid, entry, now)
+                return None
+            if entry.refreshing:
+                in_flight = entry.refreshed
+            elif entry.error is not None and now < entry.retry_at:
+                raise entry.error
+            else:
+                in_flight = None
+                self._begin_locked(entry)
+        if in_flight is None:
+            return self._refresh(steamid, entry)
+
+        if not in_flight.wait(WAIT_TIMEOUT_SECONDS):
+            raise TimeoutError(f"friend presence refresh for {steamid} still running")
+        with self._lock:
+            if entry.players is not None and entry.error is None:
+                return entry.players
+            raise entry.error or RuntimeError(f"friend presence refresh for {steamid} failed")
+
+    def online_count(self, steamid: str) -> int:
+        """Friends online now, never waiting on Steam (0 until the first fetch lands)."""
+        players = self.friends(steamid, wait=False)
+        return count_online(players) if players else 0
+
+    def prefetch(self, steamid: str):
+        self.friends(steamid, wait=False)
+
+    def _servable(self, entry: PresenceEntry, now: float) -> bool:
+        return entry.players is not None and now - entry.presence_at <= self.max_stale
+
+    def _is_stale(self, entry: PresenceEntry, now: float, ahead: float = 1.0) -> bool:
+        return (
+            now - entry.presence_at >= self.presence_ttl * ahead
+            or now - entry.friends_at >= self.friend_list_ttl
+        )
+
+    def _begin_locked(self, entry: PresenceEntry):
+        entry.refreshing = True
+        entry.refreshed = threading.Event()
+
+    def _schedule_locked(self, steamid: str, entry: PresenceEntry, now: float):
+        # one refresh at a time, and none while a failure is backing off
+        if entry.refreshing or now < entry.retry_at:
+            return
+        self._begin_locked(entry)
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="friend-presence")
+        self._pool.submit(self._refresh_quietly, steamid, entry)
+
+    def _refresh_quietly(self, steamid: str, entry: PresenceEntry):
+        try:
+            self._refresh(steamid, entry)
+        except Exception as exc:
+            # keep serving what we have; the next request or sweep retries after the backoff
+            print(f"[Friend Presence] Refresh for {steamid} failed: {exc}")
+
+    def _refresh(self, steamid: str, entry: PresenceEntry) -> List[dict]:
+        """Fetch for an entry marked with _begin_locked(); wakes whoever waits on it."""
+        started = self._clock()
+        with self._lock:
+            friend_ids = entry.friend_ids if started - entry.friends_at < self.friend_list_ttl else None
+        try:
+            friends_at = None
+            if friend_ids is None:
+                friend_ids = self._fetch_friend_ids(self.api_key, steamid)
+                friends_at = started
+            players = self._fetch_summaries(self.api_key, friend_ids)
+        except Exception as exc:
+            with self._lock:
+                entry.failures += 1
+                backoff = FAILURE_BACKOFF_SECONDS * 2 ** (entry.failures - 1)
+                entry.retry_at = self._clock() + min(MAX_FAILURE_BACKOFF_SECONDS, backoff)
+                entry.error = exc
+                entry.refreshing = False
+                entry.refreshed.set()
+                self.refresh_errors += 1
+                self.last_error = str(exc)
+            raise
+        with self._lock:
+            if friends_at is not None:
+                entry.friend_ids, entry.friends_at = friend_ids, friends_at
+            entry.players, entry.presence_at = players, started
+            entry.failures, entry.retry_at, entry.error = 0, 0.0, None
+            entry.refreshing = False
+            entry.refreshed.set()
+            self.refreshes += 1
+        return players
+
+    def start_refresher(self, interval: float = REFRESH_INTERVAL_SECONDS):
+        """Background thread refreshing active entries before they go stale, and evicting idle ones."""
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(target=self._refresh_loop, args=(interval,), daemon=True)
+        self._refresher.start()
+
+    def stop_refresher(self):
+        self._stop.set()
+
+    def _refresh_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            self.sweep()
+
+    def sweep(self):
+        now = self._clock()
+        with self._lock:
+            idle = [sid for sid, e in self._entries.items() if now - e.last_requested > self.friend_list_ttl]
+            for steamid in idle:
+                del self._entries[steamid]
+            overflow = len(self._entries) - MAX_ENTRIES
+            if overflow > 0:
+                oldest = sorted(self._entries.items(), key=lambda item: item[1].last_requested)[:overflow]
+                for steamid, _ in oldest:
+                    del self._entries[steamid]
+            for steamid, entry in self._entries.items():
+                if now - entry.last_requested > ACTIVE_WINDOW_SECONDS:
+                    continue
+                if entry.presence_at is None or self._is_stale(entry, now, REFRESH_AHEAD):
+                    self._schedule_locked(steamid, entry, now)
+
+    def stats(self) -> dict:
+        now = self._clock()
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "backing_off": sum(1 for e in self._entries.values() if now < e.retry_at),
+                "friend_list_ttl_seconds": self.friend_list_ttl,
+                "presence_ttl_seconds": self.presence_ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "last_error": self.last_error,
+            }
+
+
+_CACHE: Optional[FriendPresenceCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_friend_presence(config: Optional[dict] = None) -> FriendPresenceCache:
+    """Process-wide cache; config (app.config) supplies the API key and TTLs on first use."""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                config = config or {}
+                _CACHE = FriendPresenceCache(
+                    api_key=config.get("STEAM_API_KEY", ""),
+                    friend_list_ttl=config.get("FRIEND_LIST_TTL_SECONDS", DEFAULT_FRIEND_LIST_TTL_SECONDS),
+                    presence_ttl=config.get("FRIEND_PRESENCE_TTL_SECONDS", DEFAULT_PRESENCE_TTL_SECONDS),
+                    max_stale=config.get("FRIEND_PRESENCE_MAX_STALE_SECONDS", DEFAULT_PRESENCE_MAX_STALE_SECONDS),
+                )
+                _CACHE.start_refresher()
+    return _CACHE
+
+
+def friend_presence_stats() -> Optional[dict]:
+    return _CACHE.stats() if _CACHE is not None else None
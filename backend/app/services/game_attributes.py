@@ -0,0 +1,145 @@
+"""
+Filterable per-game attributes shared by search and recommendations.
+
+A GameCatalog row is reduced to four small values: a platform bitmask, a
+multiplayer mode code, a difficulty code and its review count. The search
+index stores them as per-document columns, so an AttributeFilter turns into
+a doc-id mask that is applied during posting traversal; recommendation
+routes apply the same filter to catalog rows.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+PLATFORMS = ("windows", "mac", "linux")
+PLATFORM_BITS = {name: 1 << i for i, name in enumerate(PLATFORMS)}
+# code 0 means unknown; known values are 1 + their position
+MULTIPLAYER_MODES = ("solo", "coop", "pvp", "mmo")
+DIFFICULTIES = ("low", "medium", "high")
+
+# GameCatalog columns the attributes are derived from, in row order
+CATALOG_COLUMNS = ("appid", "windows", "mac", "linux", "multiplayer_mode", "difficulty", "positive", "negative")
+# index attribute name -> dtype
+ATTRIBUTE_COLUMNS = {
+    "doc_platforms": np.uint8,
+    "doc_multiplayer": np.uint8,
+    "doc_difficulty": np.uint8,
+    "doc_reviews": np.int64,
+}
+
+
+def _code(values: Sequence[str], value: Optional[str]) -> int:
+    value = (value or "").strip().lower()
+    return values.index(value) + 1 if value in values else 0
+
+
+def encode_row(row: Sequence) -> Tuple[int, int, int, int]:
+    """(platform bits, multiplayer code, difficulty code, reviews) for a CATALOG_COLUMNS row."""
+    _, windows, mac, linux, multiplayer_mode, difficulty, positive, negative = row
+    bits = 0
+    for enabled, name in ((windows, "windows"), (mac, "mac"), (linux, "linux")):
+        if enabled:
+            bits |= PLATFORM_BITS[name]
+    return (
+        bits,
+        _code(MULTIPLAYER_MODES, multiplayer_mode),
+        _code(DIFFICULTIES, difficulty),
+        (positive or 0) + (negative or 0),
+    )
+
+
+def catalog_row(catalog) -> Tuple:
+    return tuple(getattr(catalog, name, None) for name in CATALOG_COLUMNS)
+
+
+def review_count(catalog) -> int:
+    return (getattr(catalog, "positive", 0) or 0) + (getattr(catalog, "negative", 0) or 0)
+
+
+def attribute_columns(rows: Iterable[Sequence], appids: Sequence[int]) -> Dict[str, np.ndarray]:
+    """
+    Columns aligned with appids (index doc order) from CATALOG_COLUMNS rows.
+    Appids without a row get zeros, which only an empty filter accepts.
+    """
+    encoded = {int(row[0]): encode_row(row) for row in rows}
+    values = np.zeros((len(appids), len(ATTRIBUTE_COLUMNS)), dtype=np.int64)
+    for i, appid in enumerate(appids):
+        values[i] = encoded.get(int(appid), (0, 0, 0, 0))
+    return {name: values[:, j].astype(dtype) for j, (name, dtype) in enumerate(ATTRIBUTE_COLUMNS.items())}
+
+
+def attach_attributes(index, columns: Dict[str, np.ndarray]):
+    """Set the attribute columns on a ColumnarTfidfIndex (aligned with its doc ids)."""
+    for name, dtype in ATTRIBUTE_COLUMNS.items():
+        column = np.asarray(columns[name], dtype=dtype)
+        if column.shape[0] != index.num_docs:
+            raise ValueError(f"{name} has {column.shape[0]} rows for {index.num_docs} documents")
+        setattr(index, name, column)
+    return index
+
+
+@dataclass(frozen=True)
+class AttributeFilter:
+    # any of these platforms / modes / difficulties; empty means no constraint
+    platforms: Tuple[str, ...] = ()
+    multiplayer_modes: Tuple[str, ...] = ()
+    difficulties: Tuple[str, ...] = ()
+    min_reviews: int = 0
+
+    @classmethod
+    def from_payload(cls, payload: Optional[dict]) -> "AttributeFilter":
+        """Parse a request "filters" object; raises ValueError on unknown values."""
+        payload = payload or {}
+        if not isinstance(payload, dict):
+            raise ValueError("filters must be an object")
+
+        def names(key: str, allowed: Sequence[str]) -> Tuple[str, ...]:
+            raw = payload.get(key) or []
+            if isinstance(raw, str):
+                raw = [raw]
+            values = tuple(sorted({str(v).strip().lower() for v in raw}))
+            invalid = [v for v in values if v not in allowed]
+            if invalid:
+                raise ValueError(f"invalid {key}: {', '.join(invalid)}")
+            return values
+
+        return cls(
+            platforms=names("platforms", PLATFORMS),
+            multiplayer_modes=names("multiplayer_modes", MULTIPLAYER_MODES),
+            difficulties=names("difficulties", DIFFICULTIES),
+            min_reviews=max(0, int(payload.get("min_reviews") or 0)),
+        )
+
+    def is_empty(self) -> bool:
+        return not (self.platforms or self.multiplayer_modes or self.difficulties or self.min_reviews)
+
+    def _platform_bits(self) -> int:
+        bits = 0
+        for name in self.platforms:
+            bits |= PLATFORM_BITS[name]
+        return bits
+
+    def matches(self, catalog) -> bool:
+        """Row-level check with the same semantics as mask()."""
+        platforms, multiplayer, difficulty, reviews = encode_row(catalog_row(catalog))
+        if self.platforms and not platforms & self._platform_bits():
+            return False
+        if self.multiplayer_modes and multiplayer not in [_code(MULTIPLAYER_MODES, m) for m in self.multiplayer_modes]:
+            return False
+        if self.difficulties and difficulty not in [_code(DIFFICULTIES, d) for d in self.difficulties]:
+            return False
+        return reviews >= self.min_reviews
+
+    def mask(self, index) -> np.ndarray:
+        """Bool mask over the doc ids of an index carrying attribute columns."""
+        keep = np.ones(index.num_docs, dtype=bool)
+        if self.platforms:
+            keep &= (index.doc_platforms & self._platform_bits()) != 0
+        if self.multiplayer_modes:
+            keep &= np.isin(index.doc_multiplayer, [_code(MULTIPLAYER_MODES, m) for m in self.multiplayer_modes])
+        if self.difficulties:
+            keep &= np.isin(index.doc_difficulty, [_code(DIFFICULTIES, d) for d in self.difficulties])
+        if self.min_reviews:
+            keep &= index.doc_reviews >= self.min_reviews
+        return keep
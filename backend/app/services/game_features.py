@@ -0,0 +1,159 @@
+"""
+Per-game ranking features precomputed from catalog data.
+
+Session length, intensity and the social flag inferred from a game's text,
+its goal and FPS keyword hits, normalized genres and quality signal depend
+only on its GameCatalog row, so they are computed when the row is written
+(sync, backfill script) and stored in the row's feature_* columns instead of
+being re-derived for every recommendation request. Rows whose stored
+feature_version is missing or older than FEATURES_VERSION fall back to
+computing the features on the fly.
+"""
+import json
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from app.services.context_ranking import (
+    FPS_PRIORITY_KEYWORDS,
+    GOAL_KEYWORDS,
+    clamp,
+    compose_game_text,
+    get_goal_alignment,
+    get_intensity_by_text,
+    get_priority_keyword_hits,
+    get_session_length_by_text,
+    get_title_signal_terms,
+    is_social_game,
+)
+
+# bump when the inference rules change, so stale rows are recomputed (and backfilled)
+FEATURES_VERSION = 1
+# distinct stored JSON values are few (many games share genres and hit counts)
+DECODE_CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class GameFeatures:
+    session_minutes: int  # inferred from text, before avg_session_minutes is considered
+    intensity: int
+    social_game: bool
+    goal_hits: Dict[str, Tuple[int, int]]  # goal -> (positive, negative) keyword hits
+    fps_hits: int
+    genres: Tuple[str, ...]
+    quality: float
+
+    def goal_alignment(self, goal: str) -> Tuple[int, int]:
+        return self.goal_hits.get(goal, (0, 0))
+
+
+def normalize_genres(raw_genres: str):
+    if not raw_genres:
+        return []
+    parts = []
+    for sep in [",", ";", "|"]:
+        if sep in raw_genres:
+            parts = [p.strip().lower() for p in raw_genres.split(sep)]
+            break
+    if not parts:
+        parts = [raw_genres.strip().lower()]
+    return [p for p in parts if p]
+
+
+def quality_signal(catalog):
+    score = 0.0
+
+    metacritic = getattr(catalog, "metacritic_score", None)
+    if metacritic is not None:
+        score += clamp((float(metacritic) - 75.0) / 10.0, -2.0, 2.5)
+
+    positive = getattr(catalog, "positive", 0) or 0
+    negative = getattr(catalog, "negative", 0) or 0
+    total = positive + negative
+    if total > 0:
+        approval = positive / total
+        confidence = min(1.0, math.log10(total + 1) / 3.0)
+        score += clamp((approval - 0.72) * 18.0 * confidence, -2.5, 3.5)
+
+    return score
+
+
+def descriptor_text(catalog) -> str:
+    return compose_game_text(
+        catalog.name,
+        catalog.genres,
+        catalog.tags,
+        catalog.categories,
+        get_title_signal_terms(catalog.name),
+    )
+
+
+def compute_game_features(catalog) -> GameFeatures:
+    text = descriptor_text(catalog)
+    multiplayer_mode = catalog.multiplayer_mode or ""
+    return GameFeatures(
+        session_minutes=get_session_length_by_text(text),
+        intensity=get_intensity_by_text(text, catalog.difficulty or ""),
+        social_game=is_social_game(text, multiplayer_mode),
+        goal_hits={goal: get_goal_alignment(goal, text, multiplayer_mode) for goal in GOAL_KEYWORDS},
+        fps_hits=get_priority_keyword_hits(FPS_PRIORITY_KEYWORDS, text, multiplayer_mode),
+        genres=tuple(normalize_genres(catalog.genres)),
+        quality=quality_signal(catalog),
+    )
+
+
+@lru_cache(maxsize=DECODE_CACHE_SIZE)
+def _decode_goal_hits(raw: str) -> Dict[str, Tuple[int, int]]:
+    return {goal: tuple(hits) for goal, hits in json.loads(raw).items()}
+
+
+@lru_cache(maxsize=DECODE_CACHE_SIZE)
+def _decode_genres(raw: str) -> Tuple[str, ...]:
+    return tuple(json.loads(raw))
+
+
+def stored_features(catalog) -> Optional[GameFeatures]:
+    """Features persisted on the row, or None when missing or from an older FEATURES_VERSION."""
+    if getattr(catalog, "feature_version", None) != FEATURES_VERSION:
+        return None
+    try:
+        goal_hits = _decode_goal_hits(catalog.feature_goal_hits)
+        genres = _decode_genres(catalog.feature_genres)
+    except (TypeError, ValueError):
+        return None
+    return GameFeatures(
+        session_minutes=catalog.feature_session_minutes,
+        intensity=catalog.feature_intensity,
+        social_game=bool(catalog.feature_social),
+        goal_hits=goal_hits,
+        fps_hits=catalog.feature_fps_hits,
+        genres=genres,
+        quality=catalog.feature_quality,
+    )
+
+
+def game_features(catalog) -> GameFeatures:
+    return stored_features(catalog) or compute_game_features(catalog)
+
+
+def feature_values(features: GameFeatures) -> dict:
+    """The feature_* column values storing features."""
+    return {
+        "feature_version": FEATURES_VERSION,
+        "feature_session_minutes": features.session_minutes,
+        "feature_intensity": features.intensity,
+        "feature_social": features.social_game,
+        "feature_goal_hits": json.dumps({goal: list(hits) for goal, hits in features.goal_hits.items()}),
+        "feature_fps_hits": features.fps_hits,
+        "feature_genres": json.dumps(list(features.genres), ensure_ascii=False),
+        "feature_quality": features.quality,
+    }
+
+
+def apply_game_features(catalog, features: Optional[GameFeatures] = None) -> GameFeatures:
+    """Compute (unless given) and store the features on a GameCatalog row; the caller commits."""
+    features = features or compute_game_features(catalog)
+    for column, value in feature_values(features).items():
+        setattr(catalog, column, value)
+    return features
@@ -0,0 +1,247 @@
+"""
+Shared HTTP client for the upstream APIs (Steam Web API, Steam store,
+SteamSpy, FreeToGame, CheapShark).
+
+One requests.Session per process keeps connections alive, so repeated calls
+to the same host skip the TCP and TLS handshakes; each host gets its own
+connection pool capped at pool_maxsize (callers wait up to pool_timeout for
+a free connection rather than opening more). Connection errors, timeouts,
+429 and 5xx responses are retried a bounded number of times with full-jitter
+exponential backoff, honouring Retry-After when the server sends one. Calls
+a user's request waits on pass interactive=True: one retry at most and a
+total deadline across attempts and backoff, well inside gunicorn's worker
+timeout; background syncs keep the full retry budget. Calls are timed per
+endpoint (host + path) for /health.
+"""
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import EmptyPoolError
+
+DEFAULT_TIMEOUT = 15
+DEFAULT_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+DEFAULT_POOL_HOSTS = 8
+# connections kept per upstream host
+DEFAULT_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "8"))
+# seconds a caller waits for a free pooled connection
+DEFAULT_POOL_TIMEOUT = 10.0
+# calls a user's request waits on; two in a row must fit gunicorn's 120 s timeout
+INTERACTIVE_MAX_RETRIES = 1
+INTERACTIVE_DEADLINE_SECONDS = float(os.getenv("HTTP_INTERACTIVE_DEADLINE_SECONDS", "20"))
+# a retry is only started with at least this long left before the deadline
+MIN_ATTEMPT_SECONDS = 1.0
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+USER_AGENT = "what-to-play-api"
+
+
+class EndpointStats:
+    __slots__ = ("calls", "errors", "retries", "total_ms", "max_ms", "statuses")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.statuses: Dict[int, int] = {}
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "statuses": {str(code): n for code, n in sorted(self.statuses.items())},
+        }
+
+
+def endpoint_name(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
+
+
+def retry_after_seconds(response: Optional[requests.Response]) -> Optional[float]:
+    """A response's Retry-After in seconds; None when absent or in HTTP-date form."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        return None
+
+
+class _WaitBoundedPool:
+    """Mixin for urllib3 pools: a blocking pool's callers wait at most pool_timeout."""
+    pool_timeout: Optional[float] = None
+
+    def _get_conn(self, timeout=None):
+        return super()._get_conn(self.pool_timeout if timeout is None else timeout)
+
+
+class PoolTimeoutAdapter(HTTPAdapter):
+    """HTTPAdapter with pool_block=True that raises ConnectionError after pool_timeout instead of waiting forever."""
+
+    def __init__(self, pool_timeout: float = DEFAULT_POOL_TIMEOUT, **kwargs):
+        # set before HTTPAdapter.__init__, which builds the pool manager
+        self.pool_timeout = pool_timeout
+        super().__init__(pool_block=True, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: type(f"WaitBounded{cls.__name__}", (_WaitBoundedPool, cls), {"pool_timeout": self.pool_timeout})
+            for scheme, cls in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def send(self, request, *args, **kwargs):
+        try:
+            return super().send(request, *args, **kwargs)
+        except EmptyPoolError as exc:
+            raise requests.ConnectionError(exc, request=request)
+
+
+class HttpClient:
+    def __init__(
+        self,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        pool_hosts: int = DEFAULT_POOL_HOSTS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        backoff_base: float = BACKOFF_BASE_SECONDS,
+        backoff_max: float = BACKOFF_MAX_SECONDS,
+        default_timeout: float = DEFAULT_TIMEOUT,
+        pool_timeout: float = DEFAULT_POOL_TIMEOUT,
+        interactive_deadline: float = INTERACTIVE_DEADLINE_SECONDS,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.default_timeout = default_timeout
+        self.interactive_deadline = interactive_deadline
+        self._sleep = sleep
+        self._clock = clock
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        # retries are done here (urllib3's would hide them from the stats)
+        adapter = PoolTimeoutAdapter(
+            pool_timeout, pool_connections=pool_hosts, pool_maxsize=pool_maxsize, max_retries=0
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._stats: Dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Seconds to wait before retry number attempt + 1."""
+        retry_after = retry_after_seconds(response)
+        if retry_after is not None:
+            return min(self.backoff_max, retry_after)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def get(self, url: str, params: Optional[dict] = None, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        return self.request("GET", url, params=params, timeout=timeout, **kwargs)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        timeout: Optional[float] = None,
+        interactive: bool = False,
+        deadline: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        The final response (callers still raise_for_status()); raises the last
+        connection error or timeout once retries are used up. deadline caps
+        the seconds spent on all attempts and backoff together; interactive
+        calls get at most INTERACTIVE_MAX_RETRIES and interactive_deadline.
+        max_retries=0 leaves retrying to a caller that rate-limits attempts.
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        if max_retries is None:
+            max_retries = min(self.max_retries, INTERACTIVE_MAX_RETRIES) if interactive else self.max_retries
+        if deadline is None and interactive:
+            deadline = self.interactive_deadline
+        ends = self._clock() + deadline if deadline is not None else None
+        started = time.perf_counter()
+        retries = 0
+        response = None
+        try:
+            while True:
+                response = None
+                attempt_timeout = timeout if ends is None else min(timeout, max(0.001, ends - self._clock()))
+                try:
+                    response = self.session.request(method, url, timeout=attempt_timeout, **kwargs)
+                except (requests.ConnectionError, requests.Timeout):
+                    delay = self.backoff(retries)
+                    if retries >= max_retries or not self._fits(ends, delay):
+                        raise
+                    self._sleep(delay)
+                else:
+                    if response.status_code not in RETRY_STATUSES or retries >= max_retries:
+                        return response
+                    delay = self.backoff(retries, response)
+                    if not self._fits(ends, delay):
+                        return response
+                    self._sleep(delay)
+                    response.close()
+                retries += 1
+        finally:
+            self._record(endpoint_name(url), started, retries, response)
+
+    def _fits(self, ends: Optional[float], delay: float) -> bool:
+        return ends is None or self._clock() + delay + MIN_ATTEMPT_SECONDS <= ends
+
+    def _record(self, endpoint: str, started: float, retries: int, response: Optional[requests.Response]):
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        with self._lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = EndpointStats()
+            stats.calls += 1
+            stats.retries += retries
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            if response is None:
+                stats.errors += 1
+            else:
+                stats.statuses[response.status_code] = stats.statuses.get(response.status_code, 0) + 1
+                if response.status_code >= 400:
+                    stats.errors += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {endpoint: s.to_dict() for endpoint, s in sorted(self._stats.items())}
+
+    def close(self):
+        self.session.close()
+
+
+_CLIENT: Optional[HttpClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Process-wide client. Created lazily, so each gunicorn worker has its own connections."""
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = HttpClient()
+    return _CLIENT
+
+
+def http_client_stats() -> Optional[dict]:
+    return _CLIENT.stats() if _CLIENT is not None else None
@@ -0,0 +1,250 @@
+"""
+Streaming, parallel TF-IDF index build with bounded memory.
+
+Document batches are tokenized and counted in a process pool. The parent
+only keeps the vocabulary, per-term document frequencies and one norm per
+document; each batch's (term, doc, tf) triples are spilled to a run file.
+Once document frequencies are final, the runs are replayed in order and
+scattered into disk-backed posting arrays laid out by term, so peak memory
+is a few batches plus O(vocab + docs), not O(postings).
+
+Workers also count each term per document field, so the BM25F posting
+values are computed in the same replay once average field lengths are known.
+
+The result is identical to build_columnar_index_from_documents over the same
+documents in the same order (same vocab order, weights, norms and BM25F
+values).
+"""
+import math
+import os
+import tempfile
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.bm25f import FIELDS, average_field_lengths, field_term_counts, saturate
+from app.services.columnar_index import DOC_ID_DTYPE, WEIGHT_DTYPE, ColumnarTfidfIndex
+
+# postings per impact-ordering block, keeps the final sort bounded too
+IMPACT_BLOCK_POSTINGS = 4_000_000
+
+BatchCounts = Tuple[List[int], List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def count_batch(rows: Sequence[Tuple[int, str]]) -> BatchCounts:
+    """
+    Worker: tokenize one batch of (appid, document) rows.
+
+    Returns (appids, batch_terms, term_idx, doc_idx, tfs, field_tfs,
+    field_lens), with one triple (plus its per-field counts) per distinct
+    term of each document, in document order and first-seen term order (the
+    order build_index_from_documents sees them), and one row of field
+    lengths per document.
+    """
+    appids = []
+    batch_vocab = {}
+    term_idx, doc_idx, tfs, field_tfs, field_lens = [], [], [], [], []
+    for doc_no, (appid, doc) in enumerate(rows):
+        appids.append(int(appid))
+        counts, lens = field_term_counts(doc or "")
+        field_lens.append(lens)
+        # tokens never span lines, so the document's counts are its field
+        # counts summed in field order (same first-seen order as tokenize(doc))
+        doc_counts = Counter()
+        for c in counts:
+            doc_counts.update(c)
+        for term, tf in doc_counts.items():
+            term_idx.append(batch_vocab.setdefault(term, len(batch_vocab)))
+            doc_idx.append(doc_no)
+            tfs.append(tf)
+            field_tfs.append([c.get(term, 0) for c in counts])
+    return (
+        appids,
+        list(batch_vocab),
+        np.asarray(term_idx, dtype=np.int32),
+        np.asarray(doc_idx, dtype=np.int32),
+        np.asarray(tfs, dtype=np.uint32),
+        np.asarray(field_tfs, dtype=np.uint32).reshape(-1, len(FIELDS)),
+        np.asarray(field_lens, dtype=np.int64).reshape(-1, len(FIELDS)),
+    )
+
+
+def _iter_counted(batches: Iterable[Sequence[Tuple[int, str]]], workers: int):
+    """Yield count_batch results in input order with at most 2 * workers batches in flight."""
+    if workers <= 1:
+        for rows in batches:
+            yield count_batch(rows)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for rows in batches:
+            pending.append(pool.submit(count_batch, rows))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class StreamingIndexBuilder:
+    def __init__(self, work_dir: str):
+        self.work_dir = work_dir
+        self.vocab = {}  # term -> first-seen id
+        self.df = np.zeros(0, dtype=np.int64)
+        self.appids: List[int] = []
+        self.runs: List[str] = []
+        self.num_postings = 0
+        self.field_lens: List[np.ndarray] = []
+
+    def add(self, counted: BatchCounts):
+        appids, batch_terms, term_idx, doc_idx, tfs, field_tfs, field_lens = counted
+        to_global = np.fromiter(
+            (self.vocab.setdefault(term, len(self.vocab)) for term in batch_terms),
+            dtype=np.int64,
+            count=len(batch_terms),
+        )
+        gids = to_global[term_idx] if term_idx.size else np.zeros(0, dtype=np.int64)
+
+        if len(self.vocab) > self.df.size:
+            self.df = np.concatenate([self.df, np.zeros(len(self.vocab) - self.df.size, dtype=np.int64)])
+        self.df += np.bincount(gids, minlength=self.df.size)
+
+        docs = doc_idx.astype(np.int64) + len(self.appids)
+        self.appids.extend(appids)
+        self.field_lens.append(field_lens)
+
+        run_path = os.path.join(self.work_dir, f"run-{len(self.runs):06d}.npz")
+        np.savez(run_path, gids=gids, docs=docs, tfs=tfs, field_tfs=field_tfs)
+        self.runs.append(run_path)
+        self.num_postings += int(gids.size)
+
+    def _iter_runs(self):
+        for run_path in self.runs:
+            with np.load(run_path) as run:
+                yield run["gids"], run["docs"], run["tfs"], run["field_tfs"]
+
+    def finish(self) -> ColumnarTfidfIndex:
+        n_docs = len(self.appids)
+        n_terms = len(self.vocab)
+
+        # vocab by df desc, first-seen order on ties (Counter.most_common order)
+        order = np.lexsort((np.arange(n_terms), -self.df))
+        tid_of_gid = np.empty(n_terms, dtype=np.int64)
+        tid_of_gid[order] = np.arange(n_terms)
+        df = self.df[order]
+        idf = np.array([math.log((n_docs + 1) / (d + 1)) + 1.0 for d in df.tolist()], dtype=np.float64)
+
+        term_offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(df, out=term_offsets[1:])
+
+        doc_field_lens = (
+            np.concatenate(self.field_lens) if self.field_lens else np.zeros((0, len(FIELDS)), dtype=np.int64)
+        )
+        avg_field_len = average_field_lengths(doc_field_lens.sum(axis=0), n_docs)
+
+        doc_ids = self._memmap("doc_ids", DOC_ID_DTYPE, self.num_postings)
+        weights = self._memmap("weights", WEIGHT_DTYPE, self.num_postings)
+        bm25_weights = self._memmap("bm25_weights", WEIGHT_DTYPE, self.num_postings)
+        norm_sq = np.zeros(n_docs, dtype=np.float64)
+        cursor = term_offsets[:-1].copy()
+
+        # runs are in doc order, so appending per term keeps postings doc-sorted
+        for gids, docs, tfs, field_tfs in self._iter_runs():
+            tids = tid_of_gid[gids]
+            w = (1.0 + np.log(tfs.astype(np.float64))) * idf[tids]
+            norm_sq += np.bincount(docs, weights=w * w, minlength=n_docs)
+            bm25 = saturate(field_tfs, doc_field_lens[docs], avg_field_len)
+
+            by_term = np.argsort(tids, kind="stable")
+            tids_sorted = tids[by_term]
+            counts = np.bincount(tids_sorted, minlength=n_terms)
+            group_start = np.repeat(np.cumsum(counts) - counts, counts)
+            pos = cursor[tids_sorted] + (np.arange(tids_sorted.size) - group_start)
+            doc_ids[pos] = docs[by_term]
+            weights[pos] = w[by_term]
+            bm25_weights[pos] = bm25[by_term]
+            cursor += counts
+
+        doc_norms = np.sqrt(norm_sq)
+        doc_norms[doc_norms == 0.0] = 1.0
+        doc_norms = doc_norms.astype(WEIGHT_DTYPE)
+
+        impact_doc_ids, impact_values = self._impact_order("", term_offsets, doc_ids, weights, doc_norms)
+        bm25_impact_doc_ids, bm25_impact_values = self._impact_order("bm25_", term_offsets, doc_ids, bm25_weights)
+        terms = list(self.vocab)
+        return ColumnarTfidfIndex(
+            vocab={terms[gid]: tid for tid, gid in enumerate(order.tolist())},
+            term_offsets=term_offsets,
+            doc_ids=doc_ids,
+            weights=weights,
+            doc_norms=doc_norms,
+            doc_appids=np.asarray(self.appids, dtype=np.int64),
+            idf=idf.astype(WEIGHT_DTYPE),
+            impact_doc_ids=impact_doc_ids,
+            impact_values=impact_values,
+            bm25_weights=bm25_weights,
+            bm25_impact_doc_ids=bm25_impact_doc_ids,
+            bm25_impact_values=bm25_impact_values,
+            bm25_avg_field_len=avg_field_len,
+        )
+
+    def _memmap(self, name: str, dtype, size: int) -> np.ndarray:
+        path = os.path.join(self.work_dir, f"{name}.bin")
+        if size == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(size,))
+
+    def _impact_order(self, prefix, term_offsets, doc_ids, weights, doc_norms=None):
+        # without doc_norms the weights are the impacts (BM25F)
+        impact_doc_ids = self._memmap(f"{prefix}impact_doc_ids", DOC_ID_DTYPE, doc_ids.size)
+        impact_values = self._memmap(f"{prefix}impact_values", WEIGHT_DTYPE, doc_ids.size)
+
+        # sort whole terms in blocks of roughly IMPACT_BLOCK_POSTINGS postings
+        first = 0
+        n_terms = term_offsets.size - 1
+        while first < n_terms:
+            start = int(term_offsets[first])
+            last = int(np.searchsorted(term_offsets, start + IMPACT_BLOCK_POSTINGS, side="right")) - 1
+            last = min(max(last, first + 1), n_terms)
+            end = int(term_offsets[last])
+
+            ids = np.asarray(doc_ids[start:end])
+            if doc_norms is None:
+                impacts = np.asarray(weights[start:end], dtype=WEIGHT_DTYPE)
+            else:
+                impacts = (
+                    np.asarray(weights[start:end], dtype=np.float64) / doc_norms[ids].astype(np.float64)
+                ).astype(WEIGHT_DTYPE)
+            term_of_posting = np.repeat(np.arange(last - first), np.diff(term_offsets[first:last + 1]))
+            order = np.lexsort((ids, -impacts, term_of_posting))
+            impact_doc_ids[start:end] = ids[order]
+            impact_values[start:end] = impacts[order]
+            first = last
+        return impact_doc_ids, impact_values
+
+
+def build_index_streaming(
+    batches: Iterable[Sequence[Tuple[int, str]]],
+    workers: int = 1,
+    work_dir: Optional[str] = None,
+    on_batch=None,
+) -> Tuple[ColumnarTfidfIndex, tempfile.TemporaryDirectory]:
+    """
+    Build from an iterable of (appid, document) batches.
+
+    Returns the index and the TemporaryDirectory backing its posting arrays;
+    keep it alive until the index is saved, then call cleanup().
+    """
+    tmp = tempfile.TemporaryDirectory(prefix="tfidf-build-", dir=work_dir)
+    try:
+        builder = StreamingIndexBuilder(tmp.name)
+        for counted in _iter_counted(batches, workers):
+            builder.add(counted)
+            if on_batch is not None:
+                on_batch(len(builder.appids))
+        return builder.finish(), tmp
+    except BaseException:
+        tmp.cleanup()
+        raise
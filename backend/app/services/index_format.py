@@ -0,0 +1,187 @@
+"""
+Versioned binary on-disk format for ColumnarTfidfIndex.
+
+Layout (little endian):
+
+    header     magic, format version, section count, num_docs, num_terms, num_postings
+    directory  one entry per section: name, numpy dtype, byte offset, item count
+    sections   raw array bytes, each aligned to SECTION_ALIGN
+
+Every array section is opened with mmap and wrapped by np.frombuffer, so the
+postings are never copied into the worker heap: all gunicorn workers share the
+same page-cache pages. The vocab is stored as a CompactVocab (term blob,
+offsets, hash slots) and read in place too, so opening the index only parses
+the header.
+"""
+import mmap
+import os
+import struct
+import tempfile
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.services.columnar_index import ColumnarTfidfIndex
+from app.services.compact_vocab import CompactVocab
+from app.services.tfidf_index import default_index_path, load_index
+
+INDEX_MAGIC = b"WTPTFIDF"
+INDEX_FORMAT_VERSION = 1
+SECTION_ALIGN = 64
+# write large (possibly disk-backed) arrays in slices instead of one tobytes() copy
+WRITE_CHUNK_BYTES = 16 * 1024 * 1024
+
+_HEADER = struct.Struct("<8sIIQQQ")
+_HEADER_SIZE = 64
+_ENTRY = struct.Struct("<24s8sQQ")
+
+# section name -> attribute on ColumnarTfidfIndex
+_ARRAY_SECTIONS = ("term_offsets", "doc_ids", "weights", "doc_norms", "doc_appids", "idf")
+# sections older files may lack; the index derives impacts on first use and
+# only offers the bm25f scorer / attribute filters when their sections exist
+_OPTIONAL_SECTIONS = (
+    "impact_doc_ids",
+    "impact_values",
+    "bm25_weights",
+    "bm25_impact_doc_ids",
+    "bm25_impact_values",
+    "bm25_avg_field_len",
+    "doc_platforms",
+    "doc_multiplayer",
+    "doc_difficulty",
+    "doc_reviews",
+)
+
+
+class IndexFormatError(ValueError):
+    pass
+
+
+def default_binary_index_path() -> str:
+    return os.path.join(os.path.dirname(default_index_path()), "tfidf.idx")
+
+
+def _encode_vocab(vocab: Mapping[str, int]) -> CompactVocab:
+    return vocab if isinstance(vocab, CompactVocab) else CompactVocab.from_dict(vocab)
+
+
+def save_binary_index(index: ColumnarTfidfIndex, path: Optional[str] = None) -> str:
+    """
+    Write index atomically (temp file + rename), so readers that mmap the
+    previous file keep a consistent view until they reopen.
+    """
+    path = path or default_binary_index_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    vocab = _encode_vocab(index.vocab)
+    sections = [("vocab_blob", vocab.blob), ("vocab_offsets", vocab.offsets), ("vocab_slots", vocab.slots)]
+    sections += [(name, np.ascontiguousarray(getattr(index, name))) for name in _ARRAY_SECTIONS]
+    sections += [
+        (name, np.ascontiguousarray(getattr(index, name)))
+        for name in _OPTIONAL_SECTIONS
+        if getattr(index, name) is not None
+    ]
+
+    data_start = _HEADER_SIZE + _ENTRY.size * len(sections)
+    entries = []
+    cursor = data_start
+    for name, arr in sections:
+        cursor = -(-cursor // SECTION_ALIGN) * SECTION_ALIGN
+        entries.append((name, arr, cursor))
+        cursor += arr.nbytes
+
+    fd, tmp_path = tempfile.mkstemp(prefix=".tfidf-", suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            header = _HEADER.pack(
+                INDEX_MAGIC,
+                INDEX_FORMAT_VERSION,
+                len(sections),
+                index.num_docs,
+                len(index.vocab),
+                int(index.doc_ids.size),
+            )
+            f.write(header.ljust(_HEADER_SIZE, b"\0"))
+            for name, arr, offset in entries:
+                f.write(_ENTRY.pack(name.encode("ascii"), arr.dtype.str.encode("ascii"), offset, arr.size))
+            for name, arr, offset in entries:
+                f.write(b"\0" * (offset - f.tell()))
+                step = max(1, WRITE_CHUNK_BYTES // max(1, arr.itemsize))
+                for start in range(0, arr.size, step):
+                    f.write(arr[start:start + step].tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return path
+
+
+def read_sections(buf) -> Tuple[dict, Dict[str, np.ndarray]]:
+    """Parse header + directory of an index buffer; arrays are zero-copy views."""
+    if len(buf) < _HEADER_SIZE:
+        raise IndexFormatError("index file is truncated")
+    magic, version, n_sections, num_docs, num_terms, num_postings = _HEADER.unpack_from(buf, 0)
+    if magic != INDEX_MAGIC:
+        raise IndexFormatError("not a WhatToPlay binary index")
+    if version != INDEX_FORMAT_VERSION:
+        raise IndexFormatError(f"unsupported index format version {version}")
+
+    arrays: Dict[str, np.ndarray] = {}
+    for i in range(n_sections):
+        raw_name, raw_dtype, offset, count = _ENTRY.unpack_from(buf, _HEADER_SIZE + i * _ENTRY.size)
+        name = raw_name.rstrip(b"\0").decode("ascii")
+        dtype = np.dtype(raw_dtype.rstrip(b"\0").decode("ascii"))
+        if offset + count * dtype.itemsize > len(buf):
+            raise IndexFormatError(f"section {name} points past end of file")
+        arrays[name] = np.frombuffer(buf, dtype=dtype, count=count, offset=offset)
+
+    meta = {
+        "version": version,
+        "num_docs": num_docs,
+        "num_terms": num_terms,
+        "num_postings": num_postings,
+    }
+    return meta, arrays
+
+
+def index_from_buffer(buf) -> ColumnarTfidfIndex:
+    _, arrays = read_sections(buf)
+    missing = [name for name in ("vocab_blob", "vocab_offsets", *_ARRAY_SECTIONS) if name not in arrays]
+    if missing:
+        raise IndexFormatError(f"index is missing sections: {', '.join(missing)}")
+    return ColumnarTfidfIndex(
+        # files written before vocab_slots existed get the hash table rebuilt on load
+        vocab=CompactVocab(arrays["vocab_blob"], arrays["vocab_offsets"], arrays.get("vocab_slots")),
+        **{name: arrays[name] for name in _ARRAY_SECTIONS},
+        **{name: arrays[name] for name in _OPTIONAL_SECTIONS if name in arrays},
+    )
+
+
+def load_binary_index(path: Optional[str] = None) -> ColumnarTfidfIndex:
+    path = path or default_binary_index_path()
+    with open(path, "rb") as f:
+        # the mapping outlives the file descriptor; the arrays keep it alive
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return index_from_buffer(buf)
+
+
+def is_binary_index(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(INDEX_MAGIC)) == INDEX_MAGIC
+
+
+def open_index(path: Optional[str] = None):
+    """
+    Open whatever index is on disk: the binary format when present,
+    otherwise the legacy pickle written by older builds.
+    """
+    if path is None:
+        path = default_binary_index_path()
+        if not os.path.exists(path):
+            return load_index()
+    if is_binary_index(path):
+        return load_binary_index(path)
+    return load_index(path)
@@ -0,0 +1,188 @@
+"""
+Per-process owner of the serving search index.
+
+Requests grab an immutable IndexSnapshot and search it; when the on-disk
+index changes (manifest version, or file mtime for single-file indexes) a
+background thread loads the new index and swaps the snapshot reference.
+In-flight searches keep the snapshot they started with, and nothing on the
+request path waits for a reload after the first load.
+
+Under gunicorn with preload_app the master loads the first snapshot before
+forking (preload_shared_index), so workers start with it already in place.
+"""
+import gc
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from app.services.index_format import default_binary_index_path
+from app.services.index_segments import SegmentStore, load_search_index
+from app.services.tfidf_index import default_index_path
+
+# how often a request may stat the index files for changes
+DEFAULT_POLL_INTERVAL = 5.0
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    index: Any
+    # manifest version ("v12") or file signature ("mtime:...") of what was loaded
+    version: str
+    loaded_at: int
+
+
+def index_signature(directory: Optional[str] = None) -> Optional[str]:
+    """Cheap identity of the index currently on disk (None when there is none)."""
+    store = SegmentStore(directory)
+    manifest = store.read_manifest()
+    if manifest is not None:
+        return f"v{int(manifest['version'])}"
+
+    candidates = [store.single_file_path]
+    if directory is None:
+        candidates += [default_binary_index_path(), default_index_path()]
+    for path in candidates:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        return f"mtime:{os.path.basename(path)}:{st.st_mtime_ns}:{st.st_size}"
+    return None
+
+
+class IndexManager:
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        loader: Optional[Callable[[], Any]] = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ):
+        self.directory = directory
+        self.loader = loader or (lambda: load_search_index(directory))
+        self.poll_interval = poll_interval
+        self._snapshot: Optional[IndexSnapshot] = None
+        self._lock = threading.Lock()
+        self._reloading = False
+        self._last_check = 0.0
+        self._listeners = []
+        self.last_error: Optional[str] = None
+
+    def add_listener(self, callback: Callable[[IndexSnapshot], None]):
+        """Called with the new snapshot after every swap (e.g. cache invalidation)."""
+        self._listeners.append(callback)
+
+    def snapshot(self) -> Optional[IndexSnapshot]:
+        return self._snapshot
+
+    def current(self) -> IndexSnapshot:
+        snap = self._snapshot
+        if snap is None:
+            # the very first load has nothing older to serve, so it blocks
+            with self._lock:
+                if self._snapshot is None:
+                    self._swap(self._load())
+                snap = self._snapshot
+        else:
+            self.maybe_reload()
+        return snap
+
+    def maybe_reload(self, force: bool = False) -> bool:
+        """Start a background reload if the on-disk index changed; True when one started."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.poll_interval:
+            return False
+        self._last_check = now
+
+        snap = self._snapshot
+        signature = index_signature(self.directory)
+        if snap is not None and signature == snap.version:
+            return False
+
+        with self._lock:
+            if self._reloading:
+                return False
+            self._reloading = True
+        threading.Thread(target=self._reload, daemon=True).start()
+        return True
+
+    def reload(self) -> IndexSnapshot:
+        """Synchronous reload (scripts, tests)."""
+        with self._lock:
+            self._swap(self._load())
+            return self._snapshot
+
+    def _load(self) -> IndexSnapshot:
+        # read the signature first: if the files change mid-load we simply
+        # reload again on the next check
+        version = index_signature(self.directory) or "none"
+        return IndexSnapshot(index=self.loader(), version=version, loaded_at=int(time.time()))
+
+    def _reload(self):
+        try:
+            snap = self._load()
+        except Exception as exc:
+            # keep serving the old snapshot
+            self.last_error = str(exc)
+            print(f"[Index Manager] Reload failed: {exc}")
+        else:
+            with self._lock:
+                self._swap(snap)
+        finally:
+            with self._lock:
+                self._reloading = False
+
+    def _swap(self, snap: IndexSnapshot):
+        self._snapshot = snap
+        self.last_error = None
+        for callback in self._listeners:
+            callback(snap)
+
+    def status(self) -> dict:
+        snap = self._snapshot
+        if snap is None:
+            return {"loaded": False, "on_disk": index_signature(self.directory)}
+        return {
+            "loaded": True,
+            "version": snap.version,
+            "loaded_at": snap.loaded_at,
+            "docs": int(len(snap.index.doc_appids)),
+            "on_disk": index_signature(self.directory),
+            "last_error": self.last_error,
+        }
+
+
+_MANAGER: Optional[IndexManager] = None
+_MANAGER_LOCK = threading.Lock()
+
+
+def get_index_manager() -> IndexManager:
+    global _MANAGER
+    if _MANAGER is None:
+        with _MANAGER_LOCK:
+            if _MANAGER is None:
+                _MANAGER = IndexManager()
+    return _MANAGER
+
+
+def preload_shared_index() -> Optional[IndexSnapshot]:
+    """
+    Load the index in a pre-fork master so every worker inherits it.
+
+    The postings are mmapped, so workers share those pages either way; what
+    preloading adds is one copy of the Python-side objects (vocab, segment
+    masks) instead of one per worker. gc.freeze() moves them out of the
+    collector's reach, otherwise its bookkeeping writes would un-share the
+    pages in each child. A later reload in a worker loads a private copy.
+    """
+    manager = get_index_manager()
+    try:
+        snap = manager.reload()
+    except Exception as exc:
+        # workers load lazily on their first search instead
+        manager.last_error = str(exc)
+        print(f"[Index Manager] Preload failed: {exc}")
+        return None
+    gc.freeze()
+    return snap
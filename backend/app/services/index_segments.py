@@ -0,0 +1,473 @@
+"""
+Incremental TF-IDF index: one main segment plus small append-only deltas.
+
+Each segment is a ColumnarTfidfIndex in the binary format. A delta's
+weights use idf from the whole catalog as it was when the delta was
+written; query weights always use current catalog-wide document
+frequencies, and merging all segments into a new main refreshes every
+stored weight. The manifest (tfidf.manifest.json) names the live segment
+files plus per-segment tombstones for appids re-indexed in a later segment,
+and the files the last merge or rebuild replaced, deleted one write later.
+
+The main index may be written as several doc-range shards (the first
+"shards" entries of the manifest). Searches score every segment on a shared
+thread pool; the numpy kernels release the GIL, so shards use several cores
+for one query, and per-segment top-k lists are merged as before.
+"""
+import fcntl
+import json
+import math
+import os
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.analyzer import tokenize
+from app.services.bm25f import bm25_idf
+from app.services.columnar_index import (
+    SCORERS,
+    ColumnarTfidfIndex,
+    attach_bm25f,
+    build_columnar_index_from_documents,
+    build_columnar_index_from_postings,
+    query_norm,
+    select_top_k,
+    split_by_doc_range,
+)
+from app.services.game_attributes import ATTRIBUTE_COLUMNS, AttributeFilter, attach_attributes
+from app.services.index_format import default_binary_index_path, load_binary_index, open_index, save_binary_index
+from app.services.tfidf_index import build_index_from_documents
+
+MANIFEST_NAME = "tfidf.manifest.json"
+LOCK_NAME = "tfidf.lock"
+
+# merge once there are this many deltas, or deltas hold this share of all docs
+MAX_DELTA_SEGMENTS = 8
+MAX_DELTA_RATIO = 0.1
+
+# threads scoring segments of one query in parallel (shared by all requests)
+SEGMENT_SEARCH_WORKERS = int(os.getenv("SEARCH_SEGMENT_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+_SEARCH_POOL: Optional[ThreadPoolExecutor] = None
+_SEARCH_POOL_LOCK = threading.Lock()
+
+
+def get_search_pool() -> Optional[ThreadPoolExecutor]:
+    global _SEARCH_POOL
+    if SEGMENT_SEARCH_WORKERS <= 1:
+        return None
+    if _SEARCH_POOL is None:
+        with _SEARCH_POOL_LOCK:
+            if _SEARCH_POOL is None:
+                _SEARCH_POOL = ThreadPoolExecutor(max_workers=SEGMENT_SEARCH_WORKERS, thread_name_prefix="segment-search")
+    return _SEARCH_POOL
+
+
+@dataclass
+class Segment:
+    index: ColumnarTfidfIndex
+    # file name inside the index directory
+    file: str
+    # appids superseded by a later segment
+    deleted_appids: List[int] = field(default_factory=list)
+    # live: doc_id -> not deleted (None when nothing is deleted)
+    live: Optional[np.ndarray] = None
+
+    def __post_init__(self):
+        if self.deleted_appids and self.live is None:
+            self.live = ~np.isin(self.index.doc_appids, np.asarray(self.deleted_appids, dtype=np.int64))
+
+    @property
+    def num_live_docs(self) -> int:
+        return self.index.num_docs if self.live is None else int(self.live.sum())
+
+
+class SegmentedTfidfIndex:
+    """Searches all segments as one index; doc ids are global across segments."""
+
+    def __init__(self, segments: List[Segment], version: int = 0, num_shards: int = 1):
+        self.segments = segments
+        self.version = version
+        # the first num_shards segments are the main index; the rest are deltas
+        self.num_shards = max(1, min(num_shards, len(segments))) if segments else 1
+        sizes = [seg.index.num_docs for seg in segments]
+        self.doc_bases = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        self.doc_appids = (
+            np.concatenate([seg.index.doc_appids for seg in segments])
+            if segments else np.zeros(0, dtype=np.int64)
+        )
+        self.num_live_docs = sum(seg.num_live_docs for seg in segments)
+
+    @property
+    def num_docs(self) -> int:
+        return int(self.doc_appids.size)
+
+    def document_frequency(self, term: str) -> int:
+        # tombstoned postings still count until the next merge
+        df = 0
+        for seg in self.segments:
+            tid = seg.index.vocab.get(term)
+            if tid is not None:
+                df += int(seg.index.term_offsets[tid + 1] - seg.index.term_offsets[tid])
+        return df
+
+    def supports(self, scorer: str) -> bool:
+        return all(seg.index.supports(scorer) for seg in self.segments)
+
+    @property
+    def has_attributes(self) -> bool:
+        return bool(self.segments) and all(seg.index.has_attributes for seg in self.segments)
+
+    def check_scorer(self, scorer: str):
+        if scorer not in SCORERS:
+            raise ValueError(f"unknown scorer {scorer!r}")
+        if not self.supports(scorer):
+            raise ValueError(f"index was built without {scorer} statistics")
+
+    def query_weights(self, query: str, scorer: str = "tfidf") -> List[Tuple[str, float]]:
+        q_terms = tokenize(query)
+        n = self.num_live_docs
+        q_weights = []
+        for term, tf in Counter(q_terms).items():
+            df = self.document_frequency(term)
+            if df == 0:
+                continue
+            if scorer == "bm25f":
+                # df includes tombstoned postings, so it can exceed the live count; a negative idf breaks pruning bounds
+                q_weights.append((term, tf * bm25_idf(min(df, n), n)))
+                continue
+            idf = math.log((n + 1) / (df + 1)) + 1.0
+            q_weights.append((term, (1.0 + math.log(tf)) * idf))
+        return q_weights
+
+    def search(
+        self,
+        query: str,
+        topk: int = 20,
+        exhaustive: bool = False,
+        scorer: str = "tfidf",
+        filters: Optional[AttributeFilter] = None,
+    ) -> List[Tuple[int, float, Dict[str, float]]]:
+        self.check_scorer(scorer)
+        if filters is not None and not filters.is_empty() and not self.has_attributes:
+            raise ValueError("index was built without attribute columns")
+        q_weights = self.query_weights(query, scorer)
+        if not q_weights:
+            return []
+        q_norm = query_norm(q_weights) if scorer == "tfidf" else 1.0
+
+        # per-segment top-k, then merge on (score desc, global doc id asc)
+        local_queries = [
+            [(seg.index.vocab[term], qw) for term, qw in q_weights if term in seg.index.vocab]
+            for seg in self.segments
+        ]
+
+        def score_segment(seg_no: int) -> Tuple[np.ndarray, np.ndarray]:
+            seg = self.segments[seg_no]
+            live = seg.live
+            mask = seg.index.filter_mask(filters)
+            if mask is not None:
+                live = mask if live is None else live & mask
+            docs, scores = seg.index.top_k(
+                local_queries[seg_no], q_norm, topk, exhaustive=exhaustive, live=live, scorer=scorer
+            )
+            return docs.astype(np.int64) + self.doc_bases[seg_no], scores
+
+        hit_segment_nos = [seg_no for seg_no, local_q in enumerate(local_queries) if local_q]
+        pool = get_search_pool() if len(hit_segment_nos) > 1 else None
+        if pool is None:
+            results = [score_segment(seg_no) for seg_no in hit_segment_nos]
+        else:
+            results = list(pool.map(score_segment, hit_segment_nos))
+        all_docs = [docs for docs, _ in results]
+        all_scores = [scores for _, scores in results]
+
+        if not all_docs:
+            return []
+        top_docs, top_scores = select_top_k(np.concatenate(all_docs), np.concatenate(all_scores), topk)
+
+        hit_segments = np.searchsorted(self.doc_bases, top_docs, side="right") - 1
+        explained = {}
+        for seg_no in np.unique(hit_segments).tolist():
+            mask = hit_segments == seg_no
+            seg_docs = top_docs[mask]
+            hits = self.segments[seg_no].index.explain_hits(
+                seg_docs - self.doc_bases[seg_no], top_scores[mask], local_queries[seg_no], scorer
+            )
+            for global_doc, (_, score, why) in zip(seg_docs.tolist(), hits):
+                explained[global_doc] = (global_doc, score, why)
+        return [explained[doc] for doc in top_docs.tolist()]
+
+    @property
+    def deltas(self) -> List[Segment]:
+        return self.segments[self.num_shards:]
+
+    def delta_docs(self) -> int:
+        return sum(seg.index.num_docs for seg in self.deltas)
+
+    def needs_merge(self) -> bool:
+        if not self.deltas:
+            return any(seg.deleted_appids for seg in self.segments)
+        return (
+            len(self.deltas) >= MAX_DELTA_SEGMENTS
+            or self.delta_docs() >= MAX_DELTA_RATIO * max(1, self.num_docs)
+        )
+
+    def merged(self) -> ColumnarTfidfIndex:
+        """
+        Collapse all live documents into one segment with fresh idf.
+
+        Term frequencies are recovered from stored weights
+        (w = (1 + log tf) * idf), so no documents need to be re-read. BM25F
+        values are carried over as stored.
+        """
+        with_bm25 = self.supports("bm25f")
+        with_attributes = self.has_attributes
+        term_ids: Dict[str, int] = {}
+        parts_terms, parts_docs, parts_tfs, parts_appids, parts_bm25 = [], [], [], [], []
+        parts_attributes = {name: [] for name in ATTRIBUTE_COLUMNS}
+        next_doc = 0
+        for seg in self.segments:
+            idx = seg.index
+            live = seg.live if seg.live is not None else np.ones(idx.num_docs, dtype=bool)
+            new_doc = np.full(idx.num_docs, -1, dtype=np.int64)
+            new_doc[live] = np.arange(next_doc, next_doc + int(live.sum()))
+            next_doc += int(live.sum())
+            parts_appids.append(idx.doc_appids[live])
+            if with_attributes:
+                for name, parts in parts_attributes.items():
+                    parts.append(getattr(idx, name)[live])
+
+            local_to_global = np.array(
+                [term_ids.setdefault(term, len(term_ids)) for term in idx.terms], dtype=np.int64
+            )
+            posting_terms = np.repeat(np.arange(len(idx.terms), dtype=np.int64), np.diff(idx.term_offsets))
+            keep = live[idx.doc_ids]
+            ltf = idx.weights[keep].astype(np.float64) / idx.idf[posting_terms[keep]].astype(np.float64)
+            parts_terms.append(local_to_global[posting_terms[keep]])
+            parts_docs.append(new_doc[idx.doc_ids[keep]])
+            parts_tfs.append(np.rint(np.exp(ltf - 1.0)))
+            if with_bm25:
+                parts_bm25.append(idx.bm25_weights[keep])
+
+        avg_field_len = None
+        if with_bm25:
+            # field averages weighted by each segment's live documents
+            sizes = np.array([seg.num_live_docs for seg in self.segments], dtype=np.float64)
+            lens = np.stack([seg.index.bm25_avg_field_len for seg in self.segments])
+            avg_field_len = (lens * sizes[:, None]).sum(axis=0) / max(1.0, sizes.sum())
+
+        merged = build_columnar_index_from_postings(
+            list(term_ids),
+            np.concatenate(parts_terms),
+            np.concatenate(parts_docs),
+            np.concatenate(parts_tfs),
+            np.concatenate(parts_appids),
+            bm25_weights=np.concatenate(parts_bm25) if with_bm25 else None,
+            bm25_avg_field_len=avg_field_len,
+        )
+        if with_attributes:
+            attach_attributes(merged, {name: np.concatenate(parts) for name, parts in parts_attributes.items()})
+        return merged
+
+
+class SegmentStore:
+    """Reads and writes the segment files + manifest of one index directory."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.path.dirname(default_binary_index_path())
+        self._thread_lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST_NAME)
+
+    @contextmanager
+    def lock(self):
+        """Serialize writers across threads and gunicorn worker processes."""
+        os.makedirs(self.directory, exist_ok=True)
+        with self._thread_lock:
+            with open(os.path.join(self.directory, LOCK_NAME), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def read_manifest(self) -> Optional[dict]:
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @property
+    def single_file_path(self) -> str:
+        # index written by save_binary_index before segments existed
+        return os.path.join(self.directory, os.path.basename(default_binary_index_path()))
+
+    def exists(self) -> bool:
+        return self.read_manifest() is not None or os.path.exists(self.single_file_path)
+
+    def load(self) -> Optional[SegmentedTfidfIndex]:
+        manifest = self.read_manifest()
+        if manifest is None:
+            if not os.path.exists(self.single_file_path):
+                return None
+            main = load_binary_index(self.single_file_path)
+            return SegmentedTfidfIndex([Segment(main, os.path.basename(self.single_file_path))])
+
+        segments = [
+            Segment(
+                load_binary_index(os.path.join(self.directory, entry["file"])),
+                entry["file"],
+                list(entry.get("deleted_appids") or []),
+            )
+            for entry in manifest["segments"]
+        ]
+        return SegmentedTfidfIndex(
+            segments, version=int(manifest["version"]), num_shards=int(manifest.get("shards", 1))
+        )
+
+    def _write_manifest(
+        self,
+        version: int,
+        segments: List[Tuple[str, List[int]]],
+        shards: int = 1,
+        retired: Optional[List[str]] = None,
+    ):
+        payload = {
+            "version": version,
+            "shards": shards,
+            "segments": [{"file": name, "deleted_appids": deleted} for name, deleted in segments],
+            # files of the previous main generation, removed by the next _write_main
+            "retired": retired or [],
+        }
+        fd, tmp_path = tempfile.mkstemp(prefix=".manifest-", suffix=".tmp", dir=self.directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def _next_version(self) -> int:
+        manifest = self.read_manifest()
+        return (int(manifest["version"]) if manifest else 0) + 1
+
+    def _write_main(self, index: ColumnarTfidfIndex, shards: int = 1) -> int:
+        previous = self.read_manifest()
+        version = self._next_version()
+        parts = split_by_doc_range(index, shards) if shards > 1 else [index]
+        if len(parts) == 1:
+            names = [f"tfidf.seg-{version:06d}.idx"]
+        else:
+            names = [f"tfidf.seg-{version:06d}-s{i:02d}.idx" for i in range(len(parts))]
+        for name, part in zip(names, parts):
+            save_binary_index(part, os.path.join(self.directory, name))
+        previous = previous or {}
+        retired = [entry["file"] for entry in previous.get("segments", []) if entry["file"] not in names]
+        self._write_manifest(version, [(name, []) for name in names], shards=len(parts), retired=retired)
+
+        # a reader may still be loading the previous manifest (load() takes no
+        # lock), so its files stay one more generation; open mmaps in running
+        # workers stay valid after unlink
+        for name in previous.get("retired", []):
+            if name not in names and name not in retired:
+                try:
+                    os.unlink(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+        return version
+
+    def write_main(self, index: ColumnarTfidfIndex, shards: int = 1) -> int:
+        """
+        Replace the whole index (full rebuild) and return the new version.
+        shards > 1 writes the main index as that many doc-range shards.
+        """
+        with self.lock():
+            return self._write_main(index, shards)
+
+    def append(
+        self,
+        documents: List[str],
+        appids: List[int],
+        attributes: Optional[Dict[str, np.ndarray]] = None,
+    ) -> int:
+        """
+        Index documents as a new delta segment. Appids already indexed are
+        tombstoned in their old segment, so the new document wins.
+        attributes: attribute columns aligned with appids (game_attributes).
+        """
+        with self.lock():
+            current = self.load()
+            if current is None or not current.segments:
+                index = build_columnar_index_from_documents(documents, appids)
+                if attributes is not None:
+                    attach_attributes(index, attributes)
+                return self._write_main(index)
+
+            new_terms = set()
+            for doc in documents:
+                new_terms.update(tokenize(doc))
+            extra_df = {term: current.document_frequency(term) for term in new_terms}
+            delta = ColumnarTfidfIndex.from_tfidf_index(
+                build_index_from_documents(documents, appids, extra_df=extra_df, extra_docs=current.num_live_docs)
+            )
+            main = current.segments[0].index
+            if current.supports("bm25f"):
+                attach_bm25f(delta, documents, avg_field_len=main.bm25_avg_field_len)
+            if attributes is not None:
+                attach_attributes(delta, attributes)
+
+            new_appids = np.asarray(appids, dtype=np.int64)
+            entries = []
+            for seg in current.segments:
+                superseded = seg.index.doc_appids[np.isin(seg.index.doc_appids, new_appids)]
+                deleted = sorted(set(seg.deleted_appids) | set(superseded.tolist()))
+                entries.append((seg.file, deleted))
+
+            version = self._next_version()
+            name = f"tfidf.seg-{version:06d}.idx"
+            save_binary_index(delta, os.path.join(self.directory, name))
+            retired = (self.read_manifest() or {}).get("retired", [])
+            self._write_manifest(version, entries + [(name, [])], shards=current.num_shards, retired=retired)
+            return version
+
+    def merge(self) -> Optional[int]:
+        """Fold all deltas into a new main segment; None when already compact."""
+        with self.lock():
+            current = self.load()
+            if current is None or not current.needs_merge():
+                return None
+            return self._write_main(current.merged(), current.num_shards)
+
+
+_MERGE_THREADS: Dict[str, threading.Thread] = {}
+_MERGE_THREADS_LOCK = threading.Lock()
+
+
+def schedule_merge(store: SegmentStore) -> bool:
+    """Start a background merge unless one is already running for this store."""
+    with _MERGE_THREADS_LOCK:
+        running = _MERGE_THREADS.get(store.directory)
+        if running is not None and running.is_alive():
+            return False
+        thread = threading.Thread(target=store.merge, daemon=True)
+        _MERGE_THREADS[store.directory] = thread
+        thread.start()
+        return True
+
+
+def load_search_index(directory: Optional[str] = None):
+    """Open the serving index: segments when a manifest exists, else a single file."""
+    store = SegmentStore(directory)
+    if store.read_manifest() is not None:
+        return store.load()
+    if directory is None:
+        return open_index()
+    return open_index(store.single_file_path)
@@ -0,0 +1,67 @@
+"""
+Aho-Corasick matcher for a fixed set of keywords.
+
+The automaton is compiled once into a DFA (one transition dict per state),
+so a single pass over the text finds every keyword occurrence, including
+overlapping ones ("shooter" inside "arena shooter"). Matches are collected as
+a bitmask over the sorted keyword list. scan() also returns the final state,
+so text can be scanned in pieces: scanning "a" then " b" from its state is
+the same as scanning "a b".
+"""
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+
+class KeywordAutomaton:
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: Tuple[str, ...] = tuple(sorted({k for k in keywords if k}))
+        goto: List[Dict[str, int]] = [{}]
+        out: List[int] = [0]
+        for bit, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(0)
+                state = nxt
+            out[state] |= 1 << bit
+
+        # breadth-first: fail links, inherited outputs, then full transitions
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in range(len(goto) - 1)]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            out[state] |= out[fail[state]]
+            # transitions back to the root are left out, a miss means state 0
+            delta[state] = {ch: nxt for ch, nxt in delta[fail[state]].items()}
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                delta[state][ch] = nxt
+                queue.append(nxt)
+        self._delta = delta
+        self._out = out
+        self._bits = {keyword: bit for bit, keyword in enumerate(self.keywords)}
+
+    def scan(self, text: str, state: int = 0) -> Tuple[int, int]:
+        """(bitmask of keywords found, final state) for text scanned from state."""
+        delta = self._delta
+        out = self._out
+        found = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found, state
+
+    def bit(self, keyword: str) -> Optional[int]:
+        return self._bits.get(keyword)
+
+    def keywords_in(self, mask: int) -> FrozenSet[str]:
+        return frozenset(k for bit, k in enumerate(self.keywords) if mask >> bit & 1)
+
+    def find_all(self, text: str) -> FrozenSet[str]:
+        return self.keywords_in(self.scan(text)[0])
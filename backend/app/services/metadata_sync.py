@@ -0,0 +1,258 @@
+"""
+Concurrent metadata fetching for games missing from the catalog.
+
+Each missing game needs a SteamSpy appdetails call and, when SteamSpy knows
+the game, a Steam store appdetails call. Games are fetched on a thread pool
+and every upstream call first takes a token from that upstream's token
+bucket, so each API is polled at its own quota (SteamSpy asks for 1 request
+per second, the store allows about 200 requests per 5 minutes) instead of at
+serial latency plus fixed sleeps. Retries are made here rather than in the
+HTTP client, so every attempt takes a token, and a 429 pauses the whole
+bucket for its Retry-After. Results are yielded as they complete; building
+and committing catalog rows stays with the caller's thread.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Optional
+
+import requests
+
+from app.services.http_client import DEFAULT_MAX_RETRIES, RETRY_STATUSES, get_http_client, retry_after_seconds
+from app.services.steam_client import STORE_APPDETAILS_URL, get_app_details
+
+STEAMSPY_API_URL = "https://steamspy.com/api.php"
+DEFAULT_STEAMSPY_RATE = 1.0  # requests per second
+DEFAULT_STORE_RATE = 200 / 300
+DEFAULT_WORKERS = 8
+# a 429 without Retry-After pauses the bucket this long
+DEFAULT_THROTTLE_SECONDS = 60.0
+
+
+class TokenBucket:
+    """
+    rate tokens per second, at most burst banked. acquire() reserves a token
+    and sleeps until it is due, so concurrent callers queue up fairly.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Seconds waited for the token."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def pause(self, seconds: float):
+        """Hand out no new token for seconds (an upstream's Retry-After), on top of tokens already reserved."""
+        with self._lock:
+            now = self._clock()
+            tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._tokens = min(tokens, 0.0) - seconds * self.rate
+            self._updated = now
+
+
+def _retryable(exc: Exception) -> bool:
+    if isinstance(exc, requests.HTTPError):
+        return exc.response is not None and exc.response.status_code in RETRY_STATUSES
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+class Upstream:
+    """
+    One rate-limited API with call counts and timings. call() retries
+    connection errors, timeouts, 429 and 5xx (raised by raise_for_status())
+    up to max_retries times, taking a token for every attempt.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limiter: TokenBucket,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.name = name
+        self.limiter = limiter
+        self.max_retries = max(0, int(max_retries))
+        self._sleep = sleep
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self.busy_seconds = 0.0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def call(self, fn: Callable, *args, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                return self._attempt(fn, *args, **kwargs)
+            except Exception as exc:
+                if attempt >= self.max_retries or not _retryable(exc):
+                    raise
+                response = getattr(exc, "response", None)
+                if response is not None and response.status_code == 429:
+                    # throttled: every worker of this upstream holds off, not just this one
+                    retry_after = retry_after_seconds(response)
+                    self.limiter.pause(DEFAULT_THROTTLE_SECONDS if retry_after is None else retry_after)
+                    with self._lock:
+                        self.throttled += 1
+                else:
+                    self._sleep(get_http_client().backoff(attempt, response))
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+
+    def _attempt(self, fn: Callable, *args, **kwargs):
+        waited = self.limiter.acquire()
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as exc:
+            with self._lock:
+                self.errors += 1
+                self.last_error = str(exc)
+            raise
+        finally:
+            with self._lock:
+                self.calls += 1
+                self.wait_seconds += waited
+                self.busy_seconds += time.perf_counter() - started
+
+    def stats(self, elapsed: float) -> dict:
+        with self._lock:
+            return {
+                "rate_limit_per_second": round(self.limiter.rate, 4),
+                "calls": self.calls,
+                "errors": self.errors,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "error_rate": round(self.errors / self.calls, 4) if self.calls else 0.0,
+                "calls_per_second": round(self.calls / elapsed, 4) if elapsed > 0 else 0.0,
+                "avg_latency_ms": round(self.busy_seconds * 1000.0 / self.calls, 2) if self.calls else 0.0,
+                "limiter_wait_seconds": round(self.wait_seconds, 3),
+                "last_error": self.last_error,
+            }
+
+
+@dataclass
+class FetchedGame:
+    appid: int
+    steamspy: Optional[dict] = None  # None when SteamSpy does not know the game
+    store: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def fetch_steamspy(appid: int, url: str = STEAMSPY_API_URL, max_retries: Optional[int] = None) -> Optional[dict]:
+    r = get_http_client().get(
+        url, params={"request": "appdetails", "appid": appid}, timeout=10, max_retries=max_retries
+    )
+    r.raise_for_status()
+    data = r.json()
+    # SteamSpy answers unknown appids with an empty record rather than a 404
+    if not data or not data.get("name"):
+        return None
+    return data
+
+
+class MetadataSyncEngine:
+    def __init__(
+        self,
+        steamspy_rate: float = DEFAULT_STEAMSPY_RATE,
+        store_rate: float = DEFAULT_STORE_RATE,
+        workers: int = DEFAULT_WORKERS,
+        steamspy_url: str = STEAMSPY_API_URL,
+        store_url: str = STORE_APPDETAILS_URL,
+        fetch_store: bool = True,
+    ):
+        self.steamspy = Upstream("steamspy", TokenBucket(steamspy_rate))
+        self.store = Upstream("steam_store", TokenBucket(store_rate))
+        self.workers = max(1, int(workers))
+        self.steamspy_url = steamspy_url
+        self.store_url = store_url
+        self.fetch_store = fetch_store
+        # time spent inside run(); a long-lived engine is idle in between
+        self.active_seconds = 0.0
+        self._run_started: Optional[float] = None
+
+    def fetch(self, appid: int) -> FetchedGame:
+        game = FetchedGame(appid=appid)
+        try:
+            # retries go through Upstream.call, one token per attempt
+            game.steamspy = self.steamspy.call(fetch_steamspy, appid, self.steamspy_url, max_retries=0)
+            if game.steamspy is not None and self.fetch_store:
+                game.store = self.store.call(get_app_details, appid, url=self.store_url, max_retries=0)
+        except Exception as exc:
+            game.error = str(exc)
+        return game
+
+    def run(self, appids: Iterable[int]) -> Iterator[FetchedGame]:
+        """Fetch every appid, yielding each game as soon as both of its calls are done."""
+        self._run_started = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="metadata-sync") as pool:
+                futures = [pool.submit(self.fetch, appid) for appid in appids]
+                try:
+                    for future in as_completed(futures):
+                        yield future.result()
+                finally:
+                    for future in futures:
+                        future.cancel()
+        finally:
+            self.active_seconds += time.monotonic() - self._run_started
+            self._run_started = None
+
+    def stats(self) -> dict:
+        elapsed = self.active_seconds
+        if self._run_started is not None:
+            elapsed += time.monotonic() - self._run_started
+        return {
+            "active_seconds": round(elapsed, 3),
+            "workers": self.workers,
+            "upstreams": {u.name: u.stats(elapsed) for u in (self.steamspy, self.store)},
+        }
+
+
+_LAST_ENGINE: Optional[MetadataSyncEngine] = None
+
+
+def create_sync_engine(config: Optional[dict] = None, fetch_store: bool = True) -> MetadataSyncEngine:
+    """Engine with rates and workers from config (app.config); /health reports the latest one created."""
+    global _LAST_ENGINE
+    config = config or {}
+    _LAST_ENGINE = MetadataSyncEngine(
+        steamspy_rate=config.get("STEAMSPY_REQUESTS_PER_SECOND", DEFAULT_STEAMSPY_RATE),
+        store_rate=config.get("STEAM_STORE_REQUESTS_PER_SECOND", DEFAULT_STORE_RATE),
+        workers=config.get("METADATA_SYNC_WORKERS", DEFAULT_WORKERS),
+        fetch_store=fetch_store,
+    )
+    return _LAST_ENGINE
+
+
+def metadata_sync_stats() -> Optional[dict]:
+    return _LAST_ENGINE.stats() if _LAST_ENGINE is not None else None
@@ -0,0 +1,37 @@
+"""
+Owned appids without a catalog row, found in the database.
+
+The anti-join (user_game_stats LEFT JOIN game_catalog ... WHERE
+game_catalog.appid IS NULL) runs in SQL, so only the missing appids leave
+the database instead of every owned appid and the whole catalog. The query
+also counts each appid's owners; sync_queue.enqueue_missing() writes those
+counts into metadata_fetch_queue with one INSERT ... SELECT, so the games
+that matter to the most users are claimed and fetched first and a huge
+backlog is never grouped more than once per sync.
+"""
+from typing import Optional
+
+from app import db
+from app.models import UserGameStat
+from app.models_catalog import GameCatalog
+
+
+def missing_appids_query(steamid: Optional[str] = None):
+    """(appid, owners) of owned appids with no catalog row, grouped by appid; only steamid's library if given."""
+    owners = db.func.count(UserGameStat.id).label("owners")
+    query = (
+        db.session.query(UserGameStat.appid, owners)
+        .outerjoin(GameCatalog, GameCatalog.appid == UserGameStat.appid)
+        .filter(GameCatalog.appid.is_(None))
+    )
+    if steamid is not None:
+        mine = db.aliased(UserGameStat)
+        query = query.filter(
+            db.session.query(mine.id).filter(mine.steamid == steamid, mine.appid == UserGameStat.appid).exists()
+        )
+    return query.group_by(UserGameStat.appid), owners
+
+
+def count_missing(steamid: Optional[str] = None) -> int:
+    query, _ = missing_appids_query(steamid)
+    return query.order_by(None).count()
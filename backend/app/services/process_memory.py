@@ -0,0 +1,31 @@
+"""
+Resident memory of a process, split into what it shares with other workers
+and what it owns. Pss charges each shared page to all processes mapping it,
+so summing Pss over gunicorn workers gives their real combined footprint.
+"""
+from typing import Dict, Optional, Union
+
+_FIELDS = {
+    "Rss": "rss_kb",
+    "Pss": "pss_kb",
+    "Shared_Clean": "shared_kb",
+    "Shared_Dirty": "shared_kb",
+    "Private_Clean": "private_kb",
+    "Private_Dirty": "private_kb",
+}
+
+
+def process_memory(pid: Union[int, str] = "self") -> Optional[Dict[str, int]]:
+    """rss/pss/shared/private kB from /proc/<pid>/smaps_rollup; None where unavailable."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r", encoding="ascii") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    stats = {key: 0 for key in _FIELDS.values()}
+    for line in lines:
+        name, _, rest = line.partition(":")
+        key = _FIELDS.get(name)
+        if key is not None:
+            stats[key] += int(rest.split()[0])
+    return stats
@@ -5,25 +5,16 @@ import time
 from dataclasses import dataclass
 
 from app.models import Feedback, UserPreference
-from app.services.context_ranking import (
-    clamp,
-    compose_game_text,
-    create_standard_reasons,
-    get_device_fit,
-    get_goal_boost,
-    get_intensity_by_text,
-    get_session_length_by_text,
-    get_title_signal_terms,
-    is_social_game,
-)
+from app.services.context_ranking import clamp, get_device_fit, goal_boost_from_hits, standard_reasons
+from app.services.game_attributes import review_count
+from app.services.game_features import game_features, normalize_genres
 
 
 MIN_PRIVATE_REVIEW_COUNT = 5000
 
 
 def has_minimum_review_count(catalog, minimum_reviews: int = MIN_PRIVATE_REVIEW_COUNT) -> bool:
-    total_reviews = (getattr(catalog, "positive", 0) or 0) + (getattr(catalog, "negative", 0) or 0)
-    return total_reviews >= minimum_reviews
+    return review_count(catalog) >= minimum_reviews
 
 
 @dataclass
@@ -37,19 +28,6 @@ class RecommendationContext:
     friends_online_count: int
 
 
-def normalize_genres(raw_genres: str):
-    if not raw_genres:
-        return []
-    parts = []
-    for sep in [",", ";", "|"]:
-        if sep in raw_genres:
-            parts = [p.strip().lower() for p in raw_genres.split(sep)]
-            break
-    if not parts:
-        parts = [raw_genres.strip().lower()]
-    return [p for p in parts if p]
-
-
 def parse_preference(pref: UserPreference):
     if not pref or not pref.genre_weights:
         return {}
@@ -61,47 +39,31 @@ def parse_preference(pref: UserPreference):
 
 
 
-def recency_days(last_played_ts: int | None):
+def platform_label(windows, mac, linux) -> str:
+    return " ".join(
+        label
+        for enabled, label in ((windows, "pc windows"), (mac, "pc mac"), (linux, "pc linux"))
+        if enabled
+    )
+
+
+def recency_days(last_played_ts: int | None, now: int | None = None):
     if not last_played_ts:
         return None
-    now = int(time.time())
+    now = int(time.time()) if now is None else now
     if last_played_ts > now:
         return 0
     return (now - last_played_ts) / 86400
 
 
-def quality_signal(catalog):
-    score = 0.0
-
-    metacritic = getattr(catalog, "metacritic_score", None)
-    if metacritic is not None:
-        score += clamp((float(metacritic) - 75.0) / 10.0, -2.0, 2.5)
-
-    positive = getattr(catalog, "positive", 0) or 0
-    negative = getattr(catalog, "negative", 0) or 0
-    total = positive + negative
-    if total > 0:
-        approval = positive / total
-        confidence = min(1.0, math.log10(total + 1) / 3.0)
-        score += clamp((approval - 0.72) * 18.0 * confidence, -2.5, 3.5)
-
-    return score
-
-
 def score_candidate(game_stat, catalog, ctx: RecommendationContext, genre_weights: dict, comfort_bias: float):
     score = 0.0
     reasons = []
 
-    descriptor_text = compose_game_text(
-        catalog.name,
-        catalog.genres,
-        catalog.tags,
-        catalog.categories,
-        get_title_signal_terms(catalog.name),
-    )
-    session_length = catalog.avg_session_minutes or get_session_length_by_text(descriptor_text)
-    intensity = get_intensity_by_text(descriptor_text, catalog.difficulty or "")
-    social_game = is_social_game(descriptor_text, catalog.multiplayer_mode or "")
+    features = game_features(catalog)
+    session_length = catalog.avg_session_minutes or features.session_minutes
+    intensity = features.intensity
+    social_game = features.social_game
 
     time_fit = 40 - clamp(abs(ctx.time_available_min - session_length), 0, 40)
     score += time_fit
@@ -115,32 +77,31 @@ def score_candidate(game_stat, catalog, ctx: RecommendationContext, genre_weight
     social_fit = 14 if friends_online and social_game else (-5 if friends_online else (-2 if social_game else 8))
     score += social_fit
 
-    score += get_goal_boost(ctx.goal, descriptor_text, catalog.multiplayer_mode or "")
+    goal_hits = features.goal_alignment(ctx.goal)
+    score += goal_boost_from_hits(ctx.goal, *goal_hits, features.fps_hits)
 
-    platform_text = " ".join(
-        label
-        for enabled, label in ((catalog.windows, "pc windows"), (catalog.mac, "pc mac"), (catalog.linux, "pc linux"))
-        if enabled
-    )
+    platform_text = platform_label(catalog.windows, catalog.mac, catalog.linux)
     score += get_device_fit("pc", platform_text or "pc")
 
     reasons.extend(
-        create_standard_reasons(
+        standard_reasons(
             {"platform": platform_text or "pc"},
-            descriptor_text=descriptor_text,
+            session_length=features.session_minutes,
+            intensity=intensity,
+            social_game=social_game,
+            goal_hits=goal_hits,
+            fps_hits=features.fps_hits,
             time_available=ctx.time_available_min,
             energy=ctx.energy_level,
             goal=ctx.goal,
             friends_online=friends_online,
             device="pc",
-            multiplayer_mode=catalog.multiplayer_mode or "",
-            difficulty=catalog.difficulty or "",
         )
     )
 
     # Genre preference fit.
     gfit = 0.0
-    for g in normalize_genres(catalog.genres):
+    for g in features.genres:
         gfit = max(gfit, float(genre_weights.get(g, 0.0)))
     if gfit > 0:
         score += clamp(gfit, 0, 4) * 6
@@ -181,7 +142,7 @@ def score_candidate(game_stat, catalog, ctx: RecommendationContext, genre_weight
     if game_stat.playtime_2weeks and game_stat.playtime_2weeks > 0:
         score += min(5, math.log2(1 + game_stat.playtime_2weeks / 30))
 
-    signal = quality_signal(catalog)
+    signal = features.quality
     score += signal
     if signal >= 2:
         reasons.append("Strong overall quality signal")
@@ -0,0 +1,110 @@
+"""
+LRU + TTL cache of fully hydrated /api/search result payloads.
+
+Keys are (sorted query tokens, topk, index version, scorer, filters), so
+"Coop Survival" and "survival coop" share an entry and a new index version
+can never serve old results. The whole cache is also dropped when the
+index manager swaps in a new snapshot, freeing entries that could no longer
+be hit.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional, Tuple
+
+from app.services.index_manager import get_index_manager
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 300
+
+
+def make_cache_key(
+    tokens: Iterable[str],
+    topk: int,
+    index_version: str,
+    scorer: str = "tfidf",
+    filters: Hashable = None,
+) -> Tuple[Hashable, ...]:
+    # sorted tuple keeps multiplicity: "coop coop" is a different query than "coop"
+    return (tuple(sorted(tokens)), int(topk), index_version, scorer, filters)
+
+
+class QueryResultCache:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+_CACHE: Optional[QueryResultCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_search_cache(config: Optional[dict] = None) -> QueryResultCache:
+    """Process-wide cache; config (app.config) sizes it on first use."""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                config = config or {}
+                _CACHE = QueryResultCache(
+                    max_entries=config.get("SEARCH_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES),
+                    ttl_seconds=config.get("SEARCH_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS),
+                )
+                get_index_manager().add_listener(lambda snapshot: _CACHE.clear())
+    return _CACHE
+
+
+def search_cache_stats() -> Optional[dict]:
+    return _CACHE.stats() if _CACHE is not None else None
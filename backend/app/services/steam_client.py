@@ -1,10 +1,11 @@
-import requests
+from app.services.http_client import get_http_client
 
 STEAM_BASE = "https://api.steampowered.com"
+STORE_APPDETAILS_URL = "https://store.steampowered.com/api/appdetails"
 
-def get_player_summaries(api_key: str, steamid: str):
+def get_player_summaries(api_key: str, steamid: str, interactive: bool = False):
     url = f"{STEAM_BASE}/ISteamUser/GetPlayerSummaries/v2/"
-    r = requests.get(url, params={"key": api_key, "steamids": steamid}, timeout=15)
+    r = get_http_client().get(url, params={"key": api_key, "steamids": steamid}, timeout=15, interactive=interactive)
     r.raise_for_status()
     players = r.json().get("response", {}).get("players", [])
     if "," in steamid:
@@ -13,22 +14,22 @@ def get_player_summaries(api_key: str, steamid: str):
 
 def get_owned_games(api_key: str, steamid: str) -> list[dict]:
     url = f"{STEAM_BASE}/IPlayerService/GetOwnedGames/v1/"
-    r = requests.get(url, params={
+    r = get_http_client().get(url, params={
         "key": api_key,
         "steamid": steamid,
         "include_appinfo": False,
         "include_played_free_games": True
-    }, timeout=20)
+    }, timeout=20, interactive=True)
     r.raise_for_status()
     return r.json().get("response", {}).get("games", [])
 
 
-def get_friends_with_status(api_key: str, steamid: str, max_friends: int = 200) -> list[dict]:
-    if not api_key:
-        return []
+MAX_FRIENDS = 200
+
 
+def get_friend_ids(api_key: str, steamid: str, max_friends: int = MAX_FRIENDS) -> list[str]:
     friends_url = f"{STEAM_BASE}/ISteamUser/GetFriendList/v1/"
-    fr = requests.get(
+    fr = get_http_client().get(
         friends_url,
         params={"key": api_key, "steamid": steamid, "relationship": "friend"},
         timeout=15,
@@ -36,11 +37,12 @@ def get_friends_with_status(api_key: str, steamid: str, max_friends: int = 200)
     fr.raise_for_status()
 
     friends = fr.json().get("friendslist", {}).get("friends", [])
-    if not friends:
-        return []
-
     ids = [f.get("steamid") for f in friends if f.get("steamid")]
-    ids = ids[:max_friends]
+    return ids[:max_friends]
+
+
+def get_friend_summaries(api_key: str, ids: list[str]) -> list[dict]:
+    """Player summaries (presence included) for friend ids, in friend list order."""
     if not ids:
         return []
 
@@ -49,40 +51,28 @@ def get_friends_with_status(api_key: str, steamid: str, max_friends: int = 200)
     players: list[dict] = []
     for chunk in chunks:
         summaries = get_player_summaries(api_key, ",".join(chunk))
+        # a single id (no comma) comes back as one player dict
         if isinstance(summaries, list):
             players.extend(summaries)
+        elif summaries:
+            players.append(summaries)
 
     # Preserve friend list order.
     by_id = {p.get("steamid"): p for p in players}
     ordered = [by_id[sid] for sid in ids if sid in by_id]
     return ordered
 
-def get_friend_online_count(api_key: str, steamid: str) -> int:
-    if not api_key:
-        return 0
-
-    try:
-        friends_url = f"{STEAM_BASE}/ISteamUser/GetFriendList/v1/"
-        fr = requests.get(friends_url, params={"key": api_key, "steamid": steamid, "relationship": "friend"}, timeout=15)
-        fr.raise_for_status()
-        friends = fr.json().get("friendslist", {}).get("friends", [])
-        if not friends:
-            return 0
 
-        ids = ",".join([f.get("steamid") for f in friends[:100] if f.get("steamid")])
-        if not ids:
-            return 0
+def count_online(players: list[dict]) -> int:
+    return sum(1 for p in players if int(p.get("personastate", 0)) > 0)
 
-        summaries = get_player_summaries(api_key, ids)
-        players = summaries if isinstance(summaries, list) else [summaries]
-        return sum(1 for p in players if int(p.get("personastate", 0)) > 0)
-    except Exception:
-        return 0
 
-
-def get_app_details(appid: int, country: str = "us") -> dict:
-    url = "https://store.steampowered.com/api/appdetails"
-    r = requests.get(url, params={"appids": int(appid), "cc": country, "l": "english"}, timeout=20)
+def get_app_details(
+    appid: int, country: str = "us", url: str = STORE_APPDETAILS_URL, max_retries: int | None = None
+) -> dict:
+    r = get_http_client().get(
+        url, params={"appids": int(appid), "cc": country, "l": "english"}, timeout=20, max_retries=max_retries
+    )
     r.raise_for_status()
     payload = r.json().get(str(appid), {})
     if not payload.get("success"):
@@ -0,0 +1,484 @@
+"""
+DB-backed queue for library metadata syncs.
+
+POST /api/steam/sync records a SyncJob for the user and enqueues the user's
+owned appids that are missing from the catalog (found with an anti-join, see
+missing_metadata.py), or whose synced catalog row is older than the refresh
+age, into metadata_fetch_queue. That table is keyed by appid, so an appid
+needed by many users is fetched once, and appids owned by more users are
+claimed first. One process per host runs a SyncQueueRunner thread (it holds
+an flock on a lock file, so gunicorn workers do not each poll the upstreams
+at the full quota): it claims a batch of queued appids under a lease (a
+claim token written with a conditional UPDATE, so two runners never get the
+same appid), fetches them through the metadata sync engine's fixed pool of
+fetch workers, upserts the catalog rows and records the batch outcome in one
+commit, then indexes the rows. Claims of a runner that died are taken over
+once their lease runs out, so a restart resumes where it stopped. Job
+progress (the user's appids still queued and not yet in the catalog) and
+state live in sync_jobs, readable by every worker; refreshes of existing
+rows do not hold a job up.
+"""
+import fcntl
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app import db
+from app.models import MetadataFetchTask, SyncJob, UserGameStat
+from app.models_catalog import GameCatalog
+from app.services.bulk_upsert import insert_ignore, upsert_from_select
+from app.services.catalog_writer import CatalogWriter, catalog_values
+from app.services.index_format import default_binary_index_path
+from app.services.metadata_sync import create_sync_engine
+from app.services.missing_metadata import missing_appids_query
+
+PENDING = "pending"
+CLAIMED = "claimed"
+DONE = "done"
+MISSING = "missing"  # SteamSpy does not know the appid
+FAILED = "failed"
+
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+
+MAX_ATTEMPTS = 3
+# missing and failed appids are queued again by a sync after this long
+RETRY_AFTER_SECONDS = 24 * 3600
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_LEASE_SECONDS = 1800
+# synced catalog rows older than this are fetched again by the owner's next sync
+DEFAULT_REFRESH_SECONDS = 30 * 24 * 3600
+POLL_INTERVAL_SECONDS = 5
+IN_CLAUSE_CHUNK = 500
+RUNNER_LOCK_NAME = "sync_runner.lock"
+
+
+def _chunks(items: List, size: int = IN_CLAUSE_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def stale_appids(steamid: str, refresh_after: int, now: int) -> List[int]:
+    """The user's owned appids whose catalog row a sync wrote more than refresh_after seconds ago."""
+    return sorted(
+        appid for (appid,) in db.session.query(GameCatalog.appid)
+        .join(UserGameStat, UserGameStat.appid == GameCatalog.appid)
+        .filter(UserGameStat.steamid == steamid, GameCatalog.metadata_synced_at < now - refresh_after)
+    )
+
+
+def _requeue_stale(now: int):
+    return db.and_(MetadataFetchTask.state.in_((MISSING, FAILED)), MetadataFetchTask.updated_at < now - RETRY_AFTER_SECONDS)
+
+
+def enqueue_appids(appids: Iterable[int], now: Optional[int] = None, refresh: bool = False):
+    """
+    Queue appids for fetching. An appid already queued keeps its row;
+    missing and failed ones are queued again once stale, done ones only
+    with refresh.
+    """
+    now = int(time.time()) if now is None else now
+    appids = sorted(set(int(a) for a in appids))
+    if not appids:
+        return
+    insert_ignore(MetadataFetchTask, [
+        {"appid": appid, "state": PENDING, "priority": 0, "attempts": 0, "created_at": now, "updated_at": now}
+        for appid in appids
+    ])
+    requeue = _requeue_stale(now)
+    if refresh:
+        requeue = db.or_(requeue, MetadataFetchTask.state == DONE)
+    for chunk in _chunks(appids):
+        MetadataFetchTask.query.filter(MetadataFetchTask.appid.in_(chunk), requeue).update(
+            {"state": PENDING, "attempts": 0, "updated_at": now}, synchronize_session=False
+        )
+
+
+def enqueue_missing(steamid: Optional[str] = None, now: Optional[int] = None):
+    """
+    Queue the owned appids with no catalog row (only steamid's library if
+    given) with their owner count as priority, in one INSERT ... SELECT ...
+    GROUP BY: appids already queued get the fresh count, missing and failed
+    ones are queued again once stale.
+    """
+    now = int(time.time()) if now is None else now
+    query, owners = missing_appids_query(steamid)
+    rows = query.with_entities(
+        UserGameStat.appid,
+        db.literal(PENDING),
+        owners,
+        db.literal(0),
+        db.literal(now, db.BigInteger),
+        db.literal(now, db.BigInteger),
+    ).statement
+    upsert_from_select(
+        MetadataFetchTask,
+        ["appid", "state", "priority", "attempts", "created_at", "updated_at"],
+        rows,
+        ["appid"],
+        ["priority"],
+    )
+    MetadataFetchTask.query.filter(
+        MetadataFetchTask.appid.in_(query.with_entities(UserGameStat.appid).statement),
+        _requeue_stale(now),
+    ).update({"state": PENDING, "attempts": 0, "updated_at": now}, synchronize_session=False)
+
+
+def queued_for(steamid: str) -> int:
+    """The user's owned appids still pending or being fetched that have no catalog row yet."""
+    return (
+        db.session.query(db.func.count(MetadataFetchTask.appid))
+        .join(UserGameStat, UserGameStat.appid == MetadataFetchTask.appid)
+        .outerjoin(GameCatalog, GameCatalog.appid == MetadataFetchTask.appid)
+        .filter(
+            UserGameStat.steamid == steamid,
+            MetadataFetchTask.state.in_((PENDING, CLAIMED)),
+            GameCatalog.appid.is_(None),
+        )
+        .scalar()
+    ) or 0
+
+
+def latest_job(steamid: str) -> Optional[SyncJob]:
+    return SyncJob.query.filter_by(steamid=steamid).order_by(SyncJob.id.desc()).first()
+
+
+def start_sync_job(
+    steamid: str,
+    owned: int,
+    now: Optional[int] = None,
+    refresh_after: int = DEFAULT_REFRESH_SECONDS,
+) -> SyncJob:
+    """
+    Enqueue the user's missing and stale appids and return their running job:
+    a sync while one is running joins it instead of starting a second. Commits.
+    """
+    now = int(time.time()) if now is None else now
+    enqueue_missing(steamid, now)
+    enqueue_appids(stale_appids(steamid, refresh_after, now), now, refresh=True)
+    remaining = queued_for(steamid)
+
+    job = latest_job(steamid)
+    if job is None or job.state != JOB_RUNNING:
+        job = SyncJob(steamid=steamid, state=JOB_RUNNING, total=0, remaining=0, created_at=now)
+        db.session.add(job)
+    job.total = (job.total - job.remaining) + remaining
+    job.remaining = remaining
+    job.owned = owned
+    job.updated_at = now
+    if remaining == 0:
+        job.state, job.finished_at = JOB_DONE, now
+    db.session.commit()
+    return job
+
+
+def refresh_jobs(now: Optional[int] = None) -> int:
+    """Recount the progress of running jobs and finish those with nothing left; the number finished. Commits."""
+    now = int(time.time()) if now is None else now
+    finished = 0
+    for job in SyncJob.query.filter_by(state=JOB_RUNNING).all():
+        remaining = queued_for(job.steamid)
+        if remaining != job.remaining:
+            job.remaining = min(remaining, job.total)
+            job.updated_at = now
+        if remaining == 0:
+            job.state, job.finished_at, job.updated_at = JOB_DONE, now, now
+            finished += 1
+    db.session.commit()
+    return finished
+
+
+def claim_batch(limit: int, lease_seconds: int = DEFAULT_LEASE_SECONDS, now: Optional[int] = None) -> Tuple[str, List[int]]:
+    """
+    (claim token, appids claimed): pending appids, highest priority then
+    oldest first, plus claims whose lease ran out. Commits.
+    """
+    now = int(time.time()) if now is None else now
+    claimable = db.or_(
+        MetadataFetchTask.state == PENDING,
+        db.and_(MetadataFetchTask.state == CLAIMED, MetadataFetchTask.claimed_at < now - lease_seconds),
+    )
+    candidates = [
+        appid for (appid,) in db.session.query(MetadataFetchTask.appid)
+        .filter(claimable)
+        .order_by(MetadataFetchTask.priority.desc(), MetadataFetchTask.created_at, MetadataFetchTask.appid)
+        .limit(limit)
+    ]
+    token = uuid.uuid4().hex
+    if candidates:
+        # re-checks the state, so an appid another runner claimed in between is skipped
+        MetadataFetchTask.query.filter(MetadataFetchTask.appid.in_(candidates), claimable).update({
+            "state": CLAIMED,
+            "claim_token": token,
+            "claimed_at": now,
+            "attempts": MetadataFetchTask.attempts + 1,
+            "updated_at": now,
+        }, synchronize_session=False)
+    db.session.commit()
+    claimed = [
+        appid for (appid,) in db.session.query(MetadataFetchTask.appid)
+        .filter_by(claim_token=token, state=CLAIMED)
+        .order_by(MetadataFetchTask.appid)
+    ] if candidates else []
+    return token, claimed
+
+
+def finish_batch(token: str, outcomes: Dict[int, Tuple[Optional[str], Optional[str]]], now: Optional[int] = None):
+    """
+    Record appid -> (state, error) for appids still held under token; a None
+    state is a failed attempt, queued again until MAX_ATTEMPTS. The caller commits.
+    """
+    now = int(time.time()) if now is None else now
+    tasks = MetadataFetchTask.query.filter(
+        MetadataFetchTask.claim_token == token,
+        MetadataFetchTask.state == CLAIMED,
+        MetadataFetchTask.appid.in_(list(outcomes)),
+    ).all()
+    for task in tasks:
+        state, error = outcomes[task.appid]
+        if state is None:
+            state = FAILED if task.attempts >= MAX_ATTEMPTS else PENDING
+        task.state = state
+        task.last_error = error
+        task.claim_token = None
+        task.claimed_at = None
+        task.updated_at = now
+
+
+def release_batch(token: str, error: str, now: Optional[int] = None):
+    """Put every appid held under token back as a failed attempt. Commits."""
+    now = int(time.time()) if now is None else now
+    appids = [a for (a,) in db.session.query(MetadataFetchTask.appid).filter_by(claim_token=token, state=CLAIMED)]
+    finish_batch(token, {appid: (None, error) for appid in appids}, now)
+    db.session.commit()
+
+
+def sync_status_payload(steamid: str) -> dict:
+    job = latest_job(steamid)
+    if job is None:
+        return {"state": "idle", "pending": False}
+    if job.state == JOB_DONE:
+        message = "Steam library sync is fully complete."
+        if job.total:
+            message += f" Metadata checked for {job.total} games."
+        return {"state": "ready", "pending": False, "message": message, "remaining": 0, "updated_at": job.updated_at}
+    done = job.total - job.remaining
+    return {
+        "state": "metadata_syncing",
+        "pending": True,
+        "message": f"Imported {job.owned} owned games. Still syncing metadata... {done}/{job.total} completed.",
+        "remaining": job.remaining,
+        "updated_at": job.updated_at,
+    }
+
+
+class SyncQueueRunner:
+    """
+    Drains metadata_fetch_queue on one background thread.
+    index_games(docs, appids, attribute_rows) indexes the catalog rows of a
+    batch after it is committed. on_synced() runs once a job finishes or the
+    queue drains after batches were indexed, for work that covers the whole
+    index (the autocomplete tables) and so should not run per batch.
+    """
+
+    def __init__(
+        self,
+        app,
+        index_games: Callable[[List[str], List[int], List[tuple]], None],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        lease_seconds: int = DEFAULT_LEASE_SECONDS,
+        refresh_after: int = DEFAULT_REFRESH_SECONDS,
+        poll_interval: float = POLL_INTERVAL_SECONDS,
+        engine=None,
+        on_synced: Optional[Callable[[], None]] = None,
+    ):
+        self.app = app
+        self.index_games = index_games
+        self.on_synced = on_synced
+        self._unsynced = False
+        self.batch_size = max(1, int(batch_size))
+        self.lease_seconds = int(lease_seconds)
+        self.refresh_after = int(refresh_after)
+        self.poll_interval = poll_interval
+        self.engine = engine or create_sync_engine(app.config)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.fetched = 0
+        self.written = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+
+    def run_once(self) -> int:
+        """Claim and process one batch inside an app context; the number of appids claimed."""
+        now = int(time.time())
+        token, appids = claim_batch(self.batch_size, self.lease_seconds, now)
+        if not appids:
+            refresh_jobs()
+            self._synced()
+            return 0
+
+        indexed = []
+        writer = CatalogWriter(chunk_size=self.batch_size, on_commit=lambda *args: indexed.append(args))
+        try:
+            # rows imported or synced within the refresh age (by another runner, say) are not fetched again
+            current = {
+                a for (a,) in db.session.query(GameCatalog.appid).filter(
+                    GameCatalog.appid.in_(appids),
+                    db.or_(
+                        GameCatalog.metadata_synced_at.is_(None),
+                        GameCatalog.metadata_synced_at >= now - self.refresh_after,
+                    ),
+                )
+            }
+            outcomes: Dict[int, Tuple[Optional[str], Optional[str]]] = {a: (DONE, None) for a in current}
+            rows = []
+            for game in self.engine.run([a for a in appids if a not in current]):
+                if game.error is not None:
+                    outcomes[game.appid] = (None, game.error)
+                    continue
+                if game.steamspy is None:
+                    outcomes[game.appid] = (MISSING, None)
+                    continue
+                try:
+                    rows.append(catalog_values(game.appid, game.steamspy, game.store))
+                except Exception as exc:
+                    outcomes[game.appid] = (None, str(exc))
+                    continue
+                outcomes[game.appid] = (DONE, None)
+            finish_batch(token, outcomes)
+            # at most batch_size rows: one upsert and one commit, together with the outcomes
+            for values in rows:
+                writer.add(values)
+            writer.flush()
+        except Exception as exc:
+            db.session.rollback()
+            self._note_error(exc)
+            release_batch(token, str(exc))
+            return len(appids)
+
+        with self._lock:
+            self.batches += 1
+            self.fetched += len(appids) - len(current)
+            self.written += writer.written
+            self.failed += sum(1 for state, _ in outcomes.values() if state is None)
+        print(f"[Sync Queue] Batch of {len(appids)} done: {writer.written} catalog rows written.")
+        for args in indexed:
+            try:
+                self.index_games(*args)
+            except Exception as exc:
+                # rows are committed; the next full rebuild picks them up
+                self._note_error(exc)
+        self._unsynced = self._unsynced or bool(indexed)
+        if refresh_jobs():
+            self._synced()
+        return len(appids)
+
+    def _synced(self):
+        if not self._unsynced or self.on_synced is None:
+            return
+        self._unsynced = False
+        try:
+            self.on_synced()
+        except Exception as exc:
+            self._note_error(exc)
+
+    def _note_error(self, exc: Exception):
+        print(f"[Sync Queue] Batch failed: {exc}")
+        with self._lock:
+            self.last_error = str(exc)
+
+    def wake(self) -> "SyncQueueRunner":
+        self._wake.set()
+        return self
+
+    def start(self) -> "SyncQueueRunner":
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run_forever, daemon=True, name="sync-queue")
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    claimed = self.run_once()
+            except Exception as exc:
+                self._note_error(exc)
+                claimed = 0
+            if not claimed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "fetched": self.fetched,
+                "written": self.written,
+                "failed_attempts": self.failed,
+                "last_error": self.last_error,
+            }
+
+
+def default_runner_lock_path() -> str:
+    return os.path.join(os.path.dirname(default_binary_index_path()), RUNNER_LOCK_NAME)
+
+
+def acquire_runner_lock(path: Optional[str] = None):
+    """
+    The lock file, open and exclusively flocked, or None when another process
+    holds it. The lock lasts while the file stays open (or the process lives).
+    """
+    path = path or default_runner_lock_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock_file = open(path, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+_RUNNER: Optional[SyncQueueRunner] = None
+_RUNNER_LOCK = threading.Lock()
+_RUNNER_LOCK_FILE = None
+
+
+def get_sync_runner(app, index_games, on_synced=None) -> Optional[SyncQueueRunner]:
+    """
+    This process's runner, started on first use; None while another process
+    on the host holds the runner lock (asked again on the next call, so a
+    worker takes over when the holder exits). app.config supplies batch
+    size, lease and refresh age.
+    """
+    global _RUNNER, _RUNNER_LOCK_FILE
+    if _RUNNER is None:
+        with _RUNNER_LOCK:
+            if _RUNNER is None:
+                _RUNNER_LOCK_FILE = acquire_runner_lock()
+                if _RUNNER_LOCK_FILE is None:
+                    return None
+                _RUNNER = SyncQueueRunner(
+                    app,
+                    index_games=index_games,
+                    on_synced=on_synced,
+                    batch_size=app.config.get("METADATA_SYNC_COMMIT_BATCH", DEFAULT_BATCH_SIZE),
+                    lease_seconds=app.config.get("SYNC_CLAIM_LEASE_SECONDS", DEFAULT_LEASE_SECONDS),
+                    refresh_after=app.config.get("CATALOG_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS),
+                ).start()
+    return _RUNNER
+
+
+def sync_runner_stats() -> Optional[dict]:
+    return _RUNNER.stats() if _RUNNER is not None else None
@@ -1,22 +1,13 @@
 import os
-import re
 import math
 import pickle
+from bisect import bisect_left
 from collections import Counter, defaultdict
 from dataclasses import dataclass
+from functools import cached_property
 from typing import Dict, List, Tuple, Optional
 
-TOKEN_RE = re.compile(r"[a-z0-9]+")
-
-STOPWORDS = {
-    "the","a","an","and","or","to","of","in","on","for","with","as","is","are","be","by","at","from",
-    "this","that","it","its","you","your","we","our","they","their","i","me","my",
-}
-
-def tokenize(text: str) -> List[str]:
-    text = (text or "").lower()
-    terms = TOKEN_RE.findall(text)
-    return [t for t in terms if t not in STOPWORDS and len(t) >= 2]
+from app.services.analyzer import tokenize
 
 @dataclass
 class TfidfIndex:
@@ -31,7 +22,23 @@ class TfidfIndex:
     # idf: term_id -> idf
     idf: List[float]
 
-    def search(self, query: str, topk: int = 20) -> List[Tuple[int, float, Dict[str, float]]]:
+    # pickled indexes only carry the cosine model, without attribute columns
+    has_attributes = False
+
+    def supports(self, scorer: str) -> bool:
+        return scorer == "tfidf"
+
+    def search(
+        self,
+        query: str,
+        topk: int = 20,
+        scorer: str = "tfidf",
+        filters=None,
+    ) -> List[Tuple[int, float, Dict[str, float]]]:
+        if not self.supports(scorer):
+            raise ValueError(f"index was built without {scorer} statistics")
+        if filters is not None and not filters.is_empty():
+            raise ValueError("index was built without attribute columns")
         q_terms = tokenize(query)
         if not q_terms:
             return []
@@ -54,14 +61,11 @@ class TfidfIndex:
 
         # accumulate scores: doc_id -> dot product
         scores = defaultdict(float)
-        # for "why": keep top contributing query terms per doc
-        contrib = defaultdict(lambda: defaultdict(float))
 
         for tid, qw in q_weights.items():
             plist = self.postings.get(tid, [])
             for doc_id, dw in plist:
                 scores[doc_id] += qw * dw
-                contrib[doc_id][tid] += qw * dw
 
         # cosine normalize
         results = []
@@ -73,25 +77,46 @@ class TfidfIndex:
         results.sort(key=lambda x: x[1], reverse=True)
         results = results[:topk]
 
-        # build why terms (top 3 contributors)
-        out = []
-        for doc_id, score in results:
-            term_scores = contrib[doc_id]
-            top_terms = sorted(term_scores.items(), key=lambda x: x[1], reverse=True)[:3]
-            why = {}
-            for tid, cs in top_terms:
-                # reverse lookup term
-                # We'll store only the term weight contributions; frontend can show term names.
-                why[str(tid)] = float(cs)
-            out.append((doc_id, float(score), why))
-        return out
+        # "why" terms are only needed for the surviving hits, so look their
+        # contributions up afterwards instead of tracking them per candidate.
+        return [(doc_id, float(score), self.explain(doc_id, q_weights)) for doc_id, score in results]
+
+    def explain(self, doc_id: int, q_weights: Dict[int, float], limit: int = 3) -> Dict[str, float]:
+        """Top contributing query terms for one document: term -> qw * dw."""
+        term_scores = {}
+        for tid, qw in q_weights.items():
+            plist = self.postings.get(tid, [])
+            # postings are appended in doc_id order, so bisect finds the entry
+            pos = bisect_left(plist, (doc_id,))
+            if pos < len(plist) and plist[pos][0] == doc_id:
+                term_scores[tid] = qw * plist[pos][1]
+        top_terms = sorted(term_scores.items(), key=lambda x: x[1], reverse=True)[:limit]
+        return {self.term_for(tid): float(cs) for tid, cs in top_terms}
+
+    @cached_property
+    def terms(self) -> List[str]:
+        # term_id -> term, built once per loaded index
+        terms = [""] * len(self.vocab)
+        for term, tid in self.vocab.items():
+            terms[tid] = term
+        return terms
+
+    def term_for(self, tid: int) -> str:
+        return self.terms[tid]
 
 def build_index_from_documents(
     documents: List[str],
-    appids: List[int]
+    appids: List[int],
+    extra_df: Optional[Dict[str, int]] = None,
+    extra_docs: int = 0,
 ) -> TfidfIndex:
+    """
+    extra_df / extra_docs add document frequencies from documents indexed
+    elsewhere (other index segments), so idf reflects the whole catalog.
+    """
     assert len(documents) == len(appids)
-    N = len(documents)
+    N = len(documents) + extra_docs
+    extra_df = extra_df or {}
 
     vocab: Dict[str, int] = {}
     df = Counter()
@@ -113,11 +138,12 @@ def build_index_from_documents(
     idf = [0.0] * len(vocab)
     for term, dfi in df.items():
         tid = vocab[term]
+        dfi += extra_df.get(term, 0)
         idf[tid] = math.log((N + 1) / (dfi + 1)) + 1.0  # smooth
 
     # 4) build postings and doc norms
     postings: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
-    doc_norms = [0.0] * N
+    doc_norms = [0.0] * len(documents)
 
     for doc_id, c in enumerate(doc_term_counts):
         norm_sq = 0.0
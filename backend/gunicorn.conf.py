@@ -0,0 +1,29 @@
+"""
+Gunicorn settings; `gunicorn run:app` from backend/ picks this file up.
+
+With SEARCH_INDEX_PRELOAD=1 (default) the master imports the app and loads
+the search index and autocomplete tables before forking, so workers share
+one copy instead of each loading their own (see preload_shared_index).
+GET /api/health reports each worker's rss/pss; scripts/index_memory_report.py
+compares the modes.
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = os.getenv("SEARCH_INDEX_PRELOAD", "1") == "1"
+
+
+def when_ready(server):
+    # runs in the master after the (preloaded) app import, before workers fork
+    if not preload_app:
+        return
+    from app.services.autocomplete import get_autocomplete
+    from app.services.index_manager import preload_shared_index
+
+    get_autocomplete()
+    snap = preload_shared_index()
+    if snap is not None:
+        server.log.info("Preloaded search index %s for workers", snap.version)
@@ -0,0 +1,59 @@
+"""add sync_jobs and metadata_fetch_queue
+
+Revision ID: a41c7e9d2b60
+Revises: f78403dec205
+Create Date: 2026-10-17 15:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a41c7e9d2b60"
+down_revision = "f78403dec205"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sync_jobs',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('steamid', sa.String(length=32), nullable=False),
+    sa.Column('state', sa.String(length=16), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('remaining', sa.Integer(), nullable=False),
+    sa.Column('owned', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.BigInteger(), nullable=False),
+    sa.Column('finished_at', sa.BigInteger(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('sync_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_sync_jobs_steamid'), ['steamid'], unique=False)
+
+    op.create_table('metadata_fetch_queue',
+    sa.Column('appid', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('state', sa.String(length=16), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('claim_token', sa.String(length=32), nullable=True),
+    sa.Column('claimed_at', sa.BigInteger(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('appid')
+    )
+    with op.batch_alter_table('metadata_fetch_queue', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_metadata_fetch_queue_state'), ['state'], unique=False)
+        batch_op.create_index(batch_op.f('ix_metadata_fetch_queue_claim_token'), ['claim_token'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('metadata_fetch_queue', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_metadata_fetch_queue_claim_token'))
+        batch_op.drop_index(batch_op.f('ix_metadata_fetch_queue_state'))
+    op.drop_table('metadata_fetch_queue')
+
+    with op.batch_alter_table('sync_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_sync_jobs_steamid'))
+    op.drop_table('sync_jobs')
@@ -0,0 +1,27 @@
+"""add metadata_synced_at to game_catalog
+
+Revision ID: c5d2e8f14a37
+Revises: a41c7e9d2b60
+Create Date: 2026-10-17 18:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c5d2e8f14a37"
+down_revision = "a41c7e9d2b60"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # existing rows stay NULL: imported data is not re-fetched by syncs
+    with op.batch_alter_table("game_catalog", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("metadata_synced_at", sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("game_catalog", schema=None) as batch_op:
+        batch_op.drop_column("metadata_synced_at")
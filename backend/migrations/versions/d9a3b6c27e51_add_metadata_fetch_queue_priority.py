@@ -0,0 +1,28 @@
+"""add priority to metadata_fetch_queue
+
+Revision ID: d9a3b6c27e51
+Revises: c5d2e8f14a37
+Create Date: 2026-10-17 20:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d9a3b6c27e51"
+down_revision = "c5d2e8f14a37"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("metadata_fetch_queue", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("priority", sa.Integer(), nullable=False, server_default="0"))
+        batch_op.create_index("ix_metadata_fetch_queue_claim_order", ["state", "priority"], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table("metadata_fetch_queue", schema=None) as batch_op:
+        batch_op.drop_index("ix_metadata_fetch_queue_claim_order")
+        batch_op.drop_column("priority")
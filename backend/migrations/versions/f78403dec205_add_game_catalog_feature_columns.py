@@ -0,0 +1,40 @@
+"""add precomputed ranking feature columns to game_catalog
+
+Revision ID: f78403dec205
+Revises: 8b9f5e1a2c1d
+Create Date: 2026-10-17 10:12:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f78403dec205"
+down_revision = "8b9f5e1a2c1d"
+branch_labels = None
+depends_on = None
+
+FEATURE_COLUMNS = (
+    ("feature_version", sa.SmallInteger()),
+    ("feature_session_minutes", sa.Integer()),
+    ("feature_intensity", sa.SmallInteger()),
+    ("feature_social", sa.Boolean()),
+    ("feature_goal_hits", sa.Text()),
+    ("feature_fps_hits", sa.SmallInteger()),
+    ("feature_genres", sa.Text()),
+    ("feature_quality", sa.Float(precision=53)),
+)
+
+
+def upgrade():
+    # rows are filled by scripts/backfill_game_features.py; until then features are computed per request
+    with op.batch_alter_table("game_catalog", schema=None) as batch_op:
+        for name, type_ in FEATURE_COLUMNS:
+            batch_op.add_column(sa.Column(name, type_, nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("game_catalog", schema=None) as batch_op:
+        for name, _ in reversed(FEATURE_COLUMNS):
+            batch_op.drop_column(name)
@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+import argparse
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+
+from app import create_app
+from app import db
+from app.models_catalog import GameCatalog
+from app.services.game_features import FEATURES_VERSION, apply_game_features
+
+
+def iter_catalog_batches(batch_size, force=False):
+    """Keyset-paginate catalog rows whose stored features are missing or stale (all rows with force)."""
+    last_appid = None
+    while True:
+        q = GameCatalog.query
+        if not force:
+            q = q.filter(db.or_(GameCatalog.feature_version.is_(None), GameCatalog.feature_version != FEATURES_VERSION))
+        if last_appid is not None:
+            q = q.filter(GameCatalog.appid > last_appid)
+        rows = q.order_by(GameCatalog.appid).limit(batch_size).all()
+        if not rows:
+            return
+        # read before yielding: the caller commits, which expires the rows
+        last_appid = rows[-1].appid
+        yield rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compute and store per-game ranking features on game_catalog.")
+    ap.add_argument("--batch-size", type=int, default=1000, help="rows updated per commit")
+    ap.add_argument("--force", action="store_true", help="recompute rows that are already current")
+    args = ap.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        updated = 0
+        for rows in iter_catalog_batches(args.batch_size, args.force):
+            for row in rows:
+                apply_game_features(row)
+            db.session.commit()
+            db.session.expunge_all()
+            updated += len(rows)
+            print(f"  updated {updated} games", end="\r", flush=True)
+        print()
+        print(f"Stored version {FEATURES_VERSION} features for {updated} games in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+import tempfile
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+
+from app.services.autocomplete import build_autocomplete, load_autocomplete, save_autocomplete, term_document_frequencies
+from app.services.columnar_index import build_columnar_index_from_documents
+from synthetic_catalog import make_documents
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Autocomplete build size and per-keystroke latency.")
+    ap.add_argument("--docs", type=int, default=100000, help="number of synthetic games")
+    ap.add_argument("--lookups", type=int, default=20000)
+    args = ap.parse_args()
+
+    docs, appids = make_documents(args.docs)
+    rng = random.Random(11)
+    games = [(appid, doc.split("\n", 1)[0], rng.randint(0, 100000)) for appid, doc in zip(appids, docs)]
+    index = build_columnar_index_from_documents(docs, appids)
+
+    t0 = time.perf_counter()
+    ac = build_autocomplete(games, term_document_frequencies(index))
+    build_s = time.perf_counter() - t0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = save_autocomplete(ac, os.path.join(tmp, "autocomplete.npz"))
+        size_mb = os.path.getsize(path) / 1e6
+        t0 = time.perf_counter()
+        ac = load_autocomplete(path)
+        load_ms = (time.perf_counter() - t0) * 1000.0
+
+    # every keystroke of random names and tags
+    prefixes = []
+    while len(prefixes) < args.lookups:
+        text = rng.choice(games)[1] if rng.random() < 0.7 else rng.choice(docs).split("\n")[2].split(", ")[0]
+        prefixes.extend(text[:i] for i in range(1, len(text) + 1))
+    prefixes = prefixes[:args.lookups]
+
+    samples = []
+    for prefix in prefixes:
+        t0 = time.perf_counter()
+        ac.complete(prefix)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+
+    print(f"games={len(games)}  keys={ac.games.num_keys}  terms={ac.terms.num_keys}")
+    print(f"build {build_s:.2f}s  file {size_mb:.1f} MB  load {load_ms:.1f} ms")
+    print(f"complete() over {len(samples)} keystrokes: "
+          f"p50 {statistics.median(samples):.0f} us  p99 {samples[int(len(samples) * 0.99)]:.0f} us  "
+          f"max {samples[-1]:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+
+from app.services import context_ranking as ranking
+from app.services.context_ranking import (
+    FPS_PRIORITY_KEYWORDS,
+    GOAL_KEYWORDS,
+    HIGH_INTENSITY_KEYWORDS,
+    LOW_INTENSITY_KEYWORDS,
+    MID_INTENSITY_KEYWORDS,
+    SOCIAL_KEYWORDS,
+    compose_game_text,
+    get_title_signal_terms,
+    keyword_matches,
+    normalize_terms,
+)
+from synthetic_catalog import make_documents
+
+CATEGORIES = ["Single-player", "Multi-player", "Online Co-op", "Steam Achievements", "Full controller support",
+              "Steam Cloud", "PvP", "Online PvP", "Steam Trading Cards", "In-App Purchases"]
+GOALS = tuple(GOAL_KEYWORDS)
+
+
+# substring-scan helpers as they were before the keyword automaton, for timing and parity
+def legacy_session_length(text):
+    key = text.lower()
+    for keywords, minutes in ranking.SESSION_LENGTH_RULES:
+        if any(x in key for x in keywords):
+            return minutes
+    return ranking.DEFAULT_SESSION_LENGTH
+
+
+def legacy_intensity(text, difficulty=""):
+    key = compose_game_text(text, difficulty)
+    if any(k in key for k in HIGH_INTENSITY_KEYWORDS) or any(x in key for x in ("hard", "high difficulty")):
+        return 3
+    if any(x in key for x in ("shooter", "action", "sports", "competitive", "pvp", "medium")):
+        return 2
+    if any(k in key for k in MID_INTENSITY_KEYWORDS):
+        return 1
+    if any(k in key for k in LOW_INTENSITY_KEYWORDS) or any(x in key for x in ("easy", "low difficulty")):
+        return 0
+    return 1
+
+
+def legacy_social(text, multiplayer_mode=""):
+    key = compose_game_text(text, multiplayer_mode)
+    return any(k in key for k in SOCIAL_KEYWORDS)
+
+
+def legacy_hits(keywords, text, multiplayer_mode=""):
+    haystack = compose_game_text(text, multiplayer_mode)
+    terms = normalize_terms(haystack)
+    return sum(1 for keyword in keywords if keyword_matches(keyword, terms, haystack))
+
+
+def legacy_alignment(goal, text, multiplayer_mode=""):
+    haystack = compose_game_text(text, multiplayer_mode)
+    terms = normalize_terms(haystack)
+    config = GOAL_KEYWORDS[goal]
+    return (
+        sum(1 for keyword in config["positive"] if keyword_matches(keyword, terms, haystack)),
+        sum(1 for keyword in config["negative"] if keyword_matches(keyword, terms, haystack)),
+    )
+
+
+def legacy_game(desc, mm, difficulty, goal):
+    # the helper calls score_candidate + create_standard_reasons make per game
+    session = legacy_session_length(desc)
+    intensity = legacy_intensity(desc, difficulty)
+    social = legacy_social(desc, mm)
+    positive, negative = legacy_alignment(goal, desc, mm)
+    fps = legacy_hits(FPS_PRIORITY_KEYWORDS, desc, mm)
+    legacy_session_length(desc), legacy_social(desc, mm), legacy_intensity(desc, difficulty)
+    legacy_alignment(goal, desc, mm), legacy_hits(FPS_PRIORITY_KEYWORDS, desc, mm)
+    return session, intensity, social, positive, negative, fps
+
+
+def automaton_game(desc, mm, difficulty, goal):
+    session = ranking.get_session_length_by_text(desc)
+    intensity = ranking.get_intensity_by_text(desc, difficulty)
+    social = ranking.is_social_game(desc, mm)
+    positive, negative = ranking.get_goal_alignment(goal, desc, mm)
+    fps = ranking.get_priority_keyword_hits(FPS_PRIORITY_KEYWORDS, desc, mm)
+    ranking.get_session_length_by_text(desc), ranking.is_social_game(desc, mm)
+    ranking.get_intensity_by_text(desc, difficulty), ranking.get_goal_alignment(goal, desc, mm)
+    ranking.get_priority_keyword_hits(FPS_PRIORITY_KEYWORDS, desc, mm)
+    return session, intensity, social, positive, negative, fps
+
+
+def make_games(n):
+    rng = random.Random(3)
+    docs, _ = make_documents(n)
+    games = []
+    for doc in docs:
+        name, genres, tags = doc.split("\n")
+        categories = ", ".join(rng.sample(CATEGORIES, rng.randint(1, 5)))
+        desc = compose_game_text(name, genres, tags, categories, get_title_signal_terms(name))
+        games.append((desc, rng.choice(["", "solo", "coop", "pvp", "mmo"]), rng.choice(["", "low", "medium", "high"]),
+                      rng.choice(GOALS)))
+    return games
+
+
+def us_per_game(fn, games):
+    t0 = time.perf_counter()
+    results = [fn(*game) for game in games]
+    return (time.perf_counter() - t0) / len(games) * 1e6, results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-game keyword scoring cost: substring scans vs the keyword automaton.")
+    ap.add_argument("--games", type=int, default=20000)
+    args = ap.parse_args()
+
+    # distinct games, so every descriptor is scanned cold like in one recommendation request
+    games = make_games(args.games)
+    legacy_us, legacy = us_per_game(legacy_game, games)
+    automaton_us, fast = us_per_game(automaton_game, games)
+    if legacy != fast:
+        raise SystemExit("keyword automaton results differ from the substring scans")
+    print(f"{args.games} games, avg descriptor {sum(len(g[0]) for g in games) / len(games):.0f} chars")
+    print(f"substring scans   {legacy_us:>8.1f} us/game")
+    print(f"keyword automaton {automaton_us:>8.1f} us/game  ({legacy_us / automaton_us:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
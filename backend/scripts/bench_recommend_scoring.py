@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+from types import SimpleNamespace
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+
+from app.services.batch_scorer import rank_library
+from app.services.game_features import apply_game_features
+from app.services.recommender import RecommendationContext, score_candidate
+from synthetic_catalog import make_documents
+
+CATEGORIES = ["Single-player", "Multi-player", "Online Co-op", "Steam Achievements", "PvP", "Steam Cloud"]
+
+
+def make_library(n: int, seed: int = 5):
+    """(game_stat, catalog) pairs with stored features, as after the feature backfill."""
+    rng = random.Random(seed)
+    docs, appids = make_documents(n, seed=seed)
+    now = int(time.time())
+    candidates = []
+    for doc, appid in zip(docs, appids):
+        name, genres, tags = doc.split("\n")
+        catalog = SimpleNamespace(
+            name=name, genres=genres, tags=tags, categories=", ".join(rng.sample(CATEGORIES, 2)),
+            windows=True, mac=rng.random() < 0.3, linux=rng.random() < 0.2,
+            avg_session_minutes=rng.choice([None, 30, 60, 120]),
+            multiplayer_mode=rng.choice(["solo", "coop", "pvp", "mmo"]),
+            difficulty=rng.choice(["low", "medium", "high"]),
+            metacritic_score=rng.choice([None, 72, 85]),
+            positive=rng.randint(0, 50000), negative=rng.randint(0, 8000),
+            header_image="", appid=appid,
+        )
+        apply_game_features(catalog)
+        stat = SimpleNamespace(
+            appid=appid,
+            playtime_forever=rng.choice([0, 0, 20, 300, 900, 3000]),
+            playtime_2weeks=rng.choice([0] * 9 + [60]),
+            last_played=rng.choice([None, now - rng.randint(0, 700) * 86400]),
+        )
+        candidates.append((stat, catalog))
+    return candidates
+
+
+def response_item(stat, catalog, score, reasons):
+    return {
+        "appid": stat.appid,
+        "name": catalog.name,
+        "header_image": catalog.header_image,
+        "genres": catalog.genres,
+        "avg_session_minutes": catalog.avg_session_minutes,
+        "difficulty": catalog.difficulty,
+        "multiplayer_mode": catalog.multiplayer_mode,
+        "playtime_forever": stat.playtime_forever,
+        "score": score,
+        "why": reasons,
+    }
+
+
+def per_game(candidates, ctx, weights, bias):
+    # the loop recommend_games ran before the batch scorer
+    scored = []
+    for stat, catalog in candidates:
+        score, reasons = score_candidate(stat, catalog, ctx, weights, bias)
+        scored.append(response_item(stat, catalog, round(score, 4), reasons))
+    scored.sort(key=lambda x: x["score"], reverse=True)
+    return scored[:8]
+
+
+def batched(candidates, ctx, weights, bias):
+    ranked, _ = rank_library(candidates, ctx, weights, bias, limit=8)
+    return [response_item(g.game_stat, g.catalog, g.score, g.reasons) for g in ranked]
+
+
+def median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-game vs vectorized scoring of a user's library for /api/recommend.")
+    ap.add_argument("--sizes", type=str, default="100,1000,5000,20000", help="comma-separated library sizes")
+    ap.add_argument("--repeat", type=int, default=7)
+    args = ap.parse_args()
+
+    ctx = RecommendationContext(
+        time_available_min=60, energy_level="low", goal="competitive", platform="windows",
+        social_mode="any", prefer_installed=True, friends_online_count=0,
+    )
+    weights = {"action": 1.5, "indie": 0.4, "strategy": -0.6}
+
+    print(f"{'library':>8} {'per-game ms':>12} {'batched ms':>11} {'speedup':>8}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        candidates = make_library(size)
+        if per_game(candidates, ctx, weights, 0.5) != batched(candidates, ctx, weights, 0.5):
+            raise SystemExit(f"results differ for a library of {size} games")
+        legacy_ms = median_ms(lambda: per_game(candidates, ctx, weights, 0.5), args.repeat)
+        batch_ms = median_ms(lambda: batched(candidates, ctx, weights, 0.5), args.repeat)
+        print(f"{size:>8} {legacy_ms:>12.2f} {batch_ms:>11.2f} {legacy_ms / batch_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
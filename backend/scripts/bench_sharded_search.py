@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+
+from app.services.columnar_index import SCORERS, build_columnar_index_from_documents
+from app.services.index_segments import SEGMENT_SEARCH_WORKERS, SegmentStore
+from synthetic_catalog import make_documents
+
+QUERIES = [
+    "action",
+    "indie",
+    "action adventure",
+    "indie singleplayer multiplayer",
+    "action indie rpg strategy",
+    "puzzle platformer",
+    "survival crafting open world",
+]
+
+
+def latencies_ms(index, args) -> np.ndarray:
+    samples = []
+    for _ in range(args.repeat):
+        for query in QUERIES:
+            t0 = time.perf_counter()
+            index.search(query, topk=args.topk, exhaustive=args.exhaustive, scorer=args.scorer)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+    return np.asarray(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Query latency of the segmented index vs number of doc-range shards.")
+    ap.add_argument("--docs", type=int, default=100000, help="number of synthetic games")
+    ap.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--topk", type=int, default=10)
+    ap.add_argument("--repeat", type=int, default=30)
+    ap.add_argument("--scorer", choices=SCORERS, default="tfidf")
+    ap.add_argument("--exhaustive", action="store_true", help="score every posting instead of pruning")
+    args = ap.parse_args()
+
+    docs, appids = make_documents(args.docs)
+    index = build_columnar_index_from_documents(docs, appids)
+    print(f"{args.docs} docs, {len(QUERIES)} queries x {args.repeat}, "
+          f"{SEGMENT_SEARCH_WORKERS} search thread(s) (SEARCH_SEGMENT_WORKERS)")
+
+    print(f"{'shards':>6} {'p50':>9} {'p99':>9} {'mean':>9}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SegmentStore(tmp)
+        for shards in args.shards:
+            store.write_main(index, shards=shards)
+            sharded = store.load()
+            hits = [sharded.search(q, topk=args.topk, exhaustive=args.exhaustive, scorer=args.scorer) for q in QUERIES]
+            if baseline is None:
+                baseline = hits
+            elif hits != baseline:
+                raise SystemExit(f"results with {shards} shards differ from {args.shards[0]} shard(s)")
+
+            samples = latencies_ms(sharded, args)
+            print(f"{shards:>6} {np.percentile(samples, 50):>7.2f}ms {np.percentile(samples, 99):>7.2f}ms "
+                  f"{samples.mean():>7.2f}ms")
+            del sharded
+
+
+if __name__ == "__main__":
+    main()
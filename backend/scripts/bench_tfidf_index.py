@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+import pickle
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+
+from app.services.columnar_index import ColumnarTfidfIndex
+from app.services.index_format import load_binary_index, save_binary_index
+from app.services.tfidf_index import build_index_from_documents
+from synthetic_catalog import make_documents
+
+QUERIES = [
+    "action",
+    "indie",
+    "coop survival",
+    "roguelike deckbuilding",
+    "story rich mystery detective",
+    "open world fantasy rpg",
+    "cozy farming sim relaxing",
+    "competitive team-based fps shooter",
+]
+
+
+def deep_size(obj, seen=None) -> int:
+    """Rough recursive sys.getsizeof for dict/list/tuple/ndarray structures."""
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes + sys.getsizeof(obj[:0])
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_size(v, seen) for v in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+def time_search(index, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        for q in QUERIES:
+            t0 = time.perf_counter()
+            index.search(q, topk=10)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+    return samples
+
+
+def time_load(blob: bytes) -> float:
+    t0 = time.perf_counter()
+    pickle.loads(blob)
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def latency_summary(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"search p50={statistics.median(samples):7.3f} ms  p99={p99:7.3f} ms"
+
+
+def report(label: str, index, repeat: int):
+    blob = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+    print(
+        f"{label:<10} mem={deep_size(index) / 1e6:8.1f} MB  file={len(blob) / 1e6:7.1f} MB  "
+        f"load={time_load(blob):8.1f} ms  {latency_summary(time_search(index, repeat))}"
+    )
+
+
+def report_binary(index: ColumnarTfidfIndex, repeat: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = save_binary_index(index, os.path.join(tmp, "tfidf.idx"))
+        t0 = time.perf_counter()
+        mapped = load_binary_index(path)
+        load_ms = (time.perf_counter() - t0) * 1000.0
+        # only the vocab dict lives on the heap; arrays are shared page cache
+        print(
+            f"{'binary':<10} mem={deep_size(mapped.vocab) / 1e6:8.1f} MB  file={os.path.getsize(path) / 1e6:7.1f} MB  "
+            f"load={load_ms:8.1f} ms  {latency_summary(time_search(mapped, repeat))}"
+        )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare dict-of-tuples TfidfIndex with the columnar CSR index.")
+    ap.add_argument("--docs", type=int, default=50000, help="number of synthetic games")
+    ap.add_argument("--repeat", type=int, default=20, help="passes over the query set")
+    args = ap.parse_args()
+
+    docs, appids = make_documents(args.docs)
+    t0 = time.perf_counter()
+    legacy = build_index_from_documents(docs, appids)
+    print(f"Built legacy index for {len(docs)} docs in {time.perf_counter() - t0:.1f}s (vocab={len(legacy.vocab)})")
+
+    columnar = ColumnarTfidfIndex.from_tfidf_index(legacy)
+    print(f"Postings: {columnar.doc_ids.size}")
+
+    report("legacy", legacy, args.repeat)
+    report("columnar", columnar, args.repeat)
+    report_binary(columnar, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import os
+import re
+import sys
+import time
+import argparse
+from collections import Counter
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+
+from app.services.analyzer import STOPWORDS, Analyzer, tokenize, tokenize_many
+from app.services.bm25f import field_term_counts, split_fields
+from app.services.index_builder import count_batch
+from synthetic_catalog import make_documents
+
+LEGACY_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def legacy_tokenize(text):
+    # tfidf_index.tokenize before the shared analyzer
+    text = (text or "").lower()
+    terms = LEGACY_TOKEN_RE.findall(text)
+    return [t for t in terms if t not in STOPWORDS and len(t) >= 2]
+
+
+def legacy_count(docs):
+    # old count_batch: whole document plus every field tokenized separately
+    for doc in docs:
+        [Counter(legacy_tokenize(text)) for text in split_fields(doc)]
+        Counter(legacy_tokenize(doc))
+
+
+def docs_per_second(fn, docs, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(docs)
+        best = min(best, time.perf_counter() - t0)
+    return len(docs) / best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Tokenizer and per-batch counting throughput, old vs shared analyzer.")
+    ap.add_argument("--docs", type=int, default=100000, help="number of synthetic games")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    docs, appids = make_documents(args.docs)
+    rows = list(zip(appids, docs))
+    stemmed = Analyzer(stem=True)
+    with_hyphens = sum("-" in doc for doc in docs)
+    print(f"{args.docs} docs, {with_hyphens} with hyphenated words")
+
+    cases = [
+        ("legacy tokenize", lambda d: [legacy_tokenize(x) for x in d]),
+        ("tokenize", lambda d: [tokenize(x) for x in d]),
+        ("tokenize_many", tokenize_many),
+        ("tokenize_many (stem)", stemmed.tokenize_many),
+        ("legacy doc+field counts", legacy_count),
+        ("field_term_counts", lambda d: [field_term_counts(x) for x in d]),
+        ("count_batch", lambda d: count_batch(rows)),
+    ]
+    for label, fn in cases:
+        print(f"{label:<24} {docs_per_second(fn, docs, args.repeat):>10.0f} docs/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+
+from app.services.columnar_index import SCORERS, ColumnarTfidfIndex, attach_bm25f
+from app.services.tfidf_index import build_index_from_documents
+from synthetic_catalog import make_documents
+
+# broad queries: every term hits a large share of the catalog
+BROAD_QUERIES = [
+    "action",
+    "indie",
+    "action adventure",
+    "indie singleplayer multiplayer",
+    "action indie rpg strategy",
+]
+
+
+def median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Exhaustive vs pruned top-k search on broad queries.")
+    ap.add_argument("--docs", type=int, default=100000, help="number of synthetic games")
+    ap.add_argument("--topk", type=int, default=10)
+    ap.add_argument("--repeat", type=int, default=15)
+    ap.add_argument("--skip-legacy", action="store_true", help="skip the slow dict-of-tuples baseline")
+    ap.add_argument("--scorer", choices=SCORERS, default="tfidf", help="the legacy baseline only runs for tfidf")
+    args = ap.parse_args()
+
+    docs, appids = make_documents(args.docs)
+    legacy = build_index_from_documents(docs, appids)
+    index = ColumnarTfidfIndex.from_tfidf_index(legacy)
+    if args.scorer == "bm25f":
+        attach_bm25f(index, docs)
+    skip_legacy = args.skip_legacy or args.scorer != "tfidf"
+
+    print(f"{'query':<34} {'postings':>9} {'legacy':>10} {'exhaustive':>11} {'pruned':>9} {'speedup':>8}")
+    for query in BROAD_QUERIES:
+        pruned = index.search(query, topk=args.topk, scorer=args.scorer)
+        exhaustive = index.search(query, topk=args.topk, exhaustive=True, scorer=args.scorer)
+        if pruned != exhaustive:
+            raise SystemExit(f"pruned results differ from exhaustive for {query!r}")
+
+        postings = sum(int(index.term_offsets[tid + 1] - index.term_offsets[tid]) for tid, _ in index.query_weights(query))
+        legacy_ms = float("nan") if skip_legacy else median_ms(lambda: legacy.search(query, topk=args.topk), 3)
+        exhaustive_ms = median_ms(
+            lambda: index.search(query, topk=args.topk, exhaustive=True, scorer=args.scorer), args.repeat
+        )
+        pruned_ms = median_ms(lambda: index.search(query, topk=args.topk, scorer=args.scorer), args.repeat)
+        print(
+            f"{query:<34} {postings:>9} {legacy_ms:>8.2f}ms {exhaustive_ms:>9.2f}ms "
+            f"{pruned_ms:>7.2f}ms {exhaustive_ms / pruned_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+
+from app.services.compact_vocab import CompactVocab
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789"
+
+
+def make_terms(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    terms = set()
+    while len(terms) < n:
+        terms.add("".join(rng.choice(ALPHABET) for _ in range(rng.randint(3, 12))))
+    return sorted(terms)
+
+
+def heap_bytes(build) -> tuple:
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def lookup_ns(vocab, probes) -> float:
+    t0 = time.perf_counter()
+    for term in probes:
+        vocab.get(term)
+    return (time.perf_counter() - t0) / len(probes) * 1e9
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Memory and lookup cost of dict vs CompactVocab.")
+    ap.add_argument("--terms", type=int, default=300000)
+    ap.add_argument("--lookups", type=int, default=200000)
+    args = ap.parse_args()
+
+    # strings are decoded from bytes, like a vocab read from an index file
+    raw = [t.encode("utf-8") for t in make_terms(args.terms)]
+    as_dict, dict_bytes = heap_bytes(lambda: {b.decode("utf-8"): i for i, b in enumerate(raw)})
+    compact, _ = heap_bytes(lambda: CompactVocab.from_dict(as_dict))
+
+    rng = random.Random(1)
+    keys = list(as_dict)
+    probes = [rng.choice(keys) for _ in range(args.lookups // 2)] + ["zz-missing-%d" % i for i in range(args.lookups // 2)]
+    rng.shuffle(probes)
+    for term in probes[:1000]:
+        if as_dict.get(term) != compact.get(term):
+            raise SystemExit(f"lookup mismatch for {term!r}")
+
+    print(f"{args.terms} terms")
+    print(f"{'':<14} {'memory':>10} {'lookup':>10} {'id->term':>10}")
+    tids = [rng.randrange(args.terms) for _ in range(args.lookups)]
+    terms_list = list(as_dict)
+    t0 = time.perf_counter()
+    for tid in tids:
+        terms_list[tid]
+    list_ns = (time.perf_counter() - t0) / len(tids) * 1e9
+    t0 = time.perf_counter()
+    for tid in tids:
+        compact.term(tid)
+    compact_ns = (time.perf_counter() - t0) / len(tids) * 1e9
+    print(f"{'dict + list':<14} {(dict_bytes + sys.getsizeof(terms_list)) / 2**20:>8.1f}MB "
+          f"{lookup_ns(as_dict, probes):>8.0f}ns {list_ns:>8.0f}ns")
+    print(f"{'CompactVocab':<14} {compact.nbytes() / 2**20:>8.1f}MB "
+          f"{lookup_ns(compact, probes):>8.0f}ns {compact_ns:>8.0f}ns")
+
+
+if __name__ == "__main__":
+    main()
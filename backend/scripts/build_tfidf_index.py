@@ -1,6 +1,8 @@
 import os
 import sys
+import time
 import argparse
+import resource
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, BASE_DIR)
@@ -8,34 +10,120 @@ sys.path.insert(0, BASE_DIR)
 from app import create_app
 from app import db
 from app.models_catalog import GameCatalog
+from app.services.autocomplete import build_autocomplete, save_autocomplete, term_document_frequencies
+from app.services.game_attributes import CATALOG_COLUMNS, attach_attributes, attribute_columns
+from app.services.index_builder import build_index_streaming
+from app.services.index_format import save_binary_index
+from app.services.index_segments import SegmentStore
 from app.services.tfidf_index import build_index_from_documents, save_index
 
 
+def iter_document_batches(batch_size, limit=None):
+    """Keyset-paginate (appid, document) rows so only one batch is held at a time."""
+    last_appid = None
+    remaining = limit
+    while remaining is None or remaining > 0:
+        q = db.session.query(GameCatalog.appid, GameCatalog.document).filter(GameCatalog.document.isnot(None))
+        if last_appid is not None:
+            q = q.filter(GameCatalog.appid > last_appid)
+        size = batch_size if remaining is None else min(batch_size, remaining)
+        rows = [(int(r[0]), r[1] or "") for r in q.order_by(GameCatalog.appid).limit(size).all()]
+        db.session.expunge_all()
+        if not rows:
+            return
+        yield rows
+        last_appid = rows[-1][0]
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+def build_autocomplete_tables(index):
+    rows = db.session.query(GameCatalog.appid, GameCatalog.name, GameCatalog.positive, GameCatalog.negative).all()
+    games = [(int(appid), name or "", (positive or 0) + (negative or 0)) for appid, name, positive, negative in rows]
+    out_path = save_autocomplete(build_autocomplete(games, term_document_frequencies(index)))
+    print(f"Saved autocomplete for {len(games)} games to: {out_path}")
+
+
+def build_legacy(args):
+    q = db.session.query(GameCatalog.appid, GameCatalog.document).filter(GameCatalog.document.isnot(None))
+    if args.limit:
+        q = q.limit(args.limit)
+    rows = q.all()
+
+    if not rows:
+        print("No documents found. Make sure you imported catalog and document field is set.")
+        return
+
+    appids = [int(r[0]) for r in rows]
+    docs = [r[1] or "" for r in rows]
+
+    print(f"Building TF-IDF index for {len(docs)} games...")
+    index = build_index_from_documents(docs, appids)
+    out_path = save_index(index, args.path)
+    print(f"Saved index to: {out_path}")
+    print(f"Vocab size: {len(index.vocab)}")
+    build_autocomplete_tables(index)
+
+
+def build_binary(args):
+    started = time.perf_counter()
+    print(f"Streaming documents in batches of {args.batch_size} with {args.workers} worker(s)...")
+
+    def progress(docs_seen):
+        print(f"  counted {docs_seen} documents", end="\r", flush=True)
+
+    index, work_dir = build_index_streaming(
+        iter_document_batches(args.batch_size, args.limit),
+        workers=args.workers,
+        work_dir=args.tmp_dir,
+        on_batch=progress,
+    )
+    try:
+        print()
+        if index.num_docs == 0:
+            print("No documents found. Make sure you imported catalog and document field is set.")
+            return
+
+        vocab_size = len(index.vocab)
+        rows = db.session.query(*[getattr(GameCatalog, c) for c in CATALOG_COLUMNS]).all()
+        attach_attributes(index, attribute_columns(rows, index.doc_appids.tolist()))
+        if args.path:
+            out_path = save_binary_index(index, args.path)
+        else:
+            store = SegmentStore()
+            version = store.write_main(index, shards=args.shards)
+            out_path = f"{store.manifest_path} (version {version}, {args.shards} shard(s))"
+        build_autocomplete_tables(index)
+    finally:
+        del index
+        work_dir.cleanup()
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Saved index to: {out_path}")
+    print(f"Vocab size: {vocab_size}")
+    print(f"Built in {time.perf_counter() - started:.1f}s, peak RSS of the parent process {peak_mb:.0f} MB")
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--limit", type=int, default=None, help="limit number of docs (for quick test)")
     ap.add_argument("--path", type=str, default=None, help="output index path (optional)")
+    ap.add_argument("--format", choices=["binary", "legacy"], default="binary",
+                    help="binary = streaming build of the mmap-able index (default), legacy = pickled tfidf.pkl")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="tokenizer processes for the binary build (1 = in-process)")
+    ap.add_argument("--batch-size", type=int, default=2000, help="documents fetched and tokenized per batch")
+    ap.add_argument("--shards", type=int, default=int(os.getenv("SEARCH_INDEX_SHARDS", "1")),
+                    help="doc-range shards for the segmented index (searched in parallel)")
+    ap.add_argument("--tmp-dir", type=str, default=None, help="directory for spill files (defaults to system temp)")
     args = ap.parse_args()
 
     app = create_app()
     with app.app_context():
-        q = db.session.query(GameCatalog.appid, GameCatalog.document).filter(GameCatalog.document.isnot(None))
-        if args.limit:
-            q = q.limit(args.limit)
-        rows = q.all()
-
-        if not rows:
-            print("No documents found. Make sure you imported catalog and document field is set.")
-            return
-
-        appids = [int(r[0]) for r in rows]
-        docs = [r[1] or "" for r in rows]
-
-        print(f"Building TF-IDF index for {len(docs)} games...")
-        index = build_index_from_documents(docs, appids)
-        out_path = save_index(index, args.path)
-        print(f"Saved index to: {out_path}")
-        print(f"Vocab size: {len(index.vocab)}")
+        if args.format == "binary":
+            build_binary(args)
+        else:
+            build_legacy(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+import os
+import sys
+import argparse
+import tempfile
+import multiprocessing as mp
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+
+from app.services.columnar_index import build_columnar_index_from_documents
+from app.services.index_manager import IndexManager
+from app.services.index_segments import SegmentStore
+from app.services.process_memory import process_memory
+from app.services.tfidf_index import build_index_from_documents, load_index, save_index
+from synthetic_catalog import make_documents
+
+QUERIES = ["action", "indie rpg", "survival crafting open world", "puzzle platformer", "story rich mystery"]
+MODES = {
+    "legacy": "every worker unpickles tfidf.pkl",
+    "mmap": "every worker opens the mmapped segments",
+    "preload": "master opens the segments, workers fork with them",
+}
+
+
+def worker(mode, paths, manager, ready, done):
+    if mode == "legacy":
+        index = load_index(paths["legacy"])
+    elif mode == "mmap":
+        index = IndexManager(paths["segments"]).reload().index
+    else:
+        index = manager.current().index
+    for query in QUERIES:
+        index.search(query, topk=10)
+    ready.set()
+    done.wait()
+
+
+def measure(mode, workers, paths):
+    ctx = mp.get_context("fork")
+    manager = None
+    if mode == "preload":
+        import gc
+
+        manager = IndexManager(paths["segments"])
+        manager.reload()
+        gc.freeze()
+    done = ctx.Event()
+    procs = []
+    for _ in range(workers):
+        ready = ctx.Event()
+        proc = ctx.Process(target=worker, args=(mode, paths, manager, ready, done))
+        proc.start()
+        procs.append((proc, ready))
+    try:
+        for _, ready in procs:
+            ready.wait()
+        return [process_memory(proc.pid) for proc, _ in procs]
+    finally:
+        done.set()
+        for proc, _ in procs:
+            proc.join()
+        if mode == "preload":
+            import gc
+
+            gc.unfreeze()
+
+
+def build(num_docs, paths, with_legacy):
+    docs, appids = make_documents(num_docs)
+    if with_legacy:
+        save_index(build_index_from_documents(docs, appids), paths["legacy"])
+    SegmentStore(paths["segments"]).write_main(build_columnar_index_from_documents(docs, appids))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-worker memory of the search index by loading mode.")
+    ap.add_argument("--docs", type=int, default=100000, help="number of synthetic games")
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    args = ap.parse_args()
+
+    if process_memory() is None:
+        raise SystemExit("needs /proc/<pid>/smaps_rollup (Linux)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {"legacy": os.path.join(tmp, "tfidf.pkl"), "segments": tmp}
+        # build in a child, so the forked workers don't inherit the build's heap
+        builder = mp.get_context("fork").Process(target=build, args=(args.docs, paths, "legacy" in args.modes))
+        builder.start()
+        builder.join()
+        if builder.exitcode != 0:
+            raise SystemExit("index build failed")
+
+        for mode in args.modes:
+            print(f"\n{mode}: {MODES[mode]}")
+            print(f"{'workers':>7} {'rss/worker':>11} {'private/worker':>15} {'pss/worker':>11} {'pss total':>10}")
+            for workers in args.workers:
+                stats = measure(mode, workers, paths)
+                mean = {k: sum(s[k] for s in stats) / len(stats) / 1024 for k in stats[0]}
+                total_pss = sum(s["pss_kb"] for s in stats) / 1024
+                print(f"{workers:>7} {mean['rss_kb']:>9.1f}MB {mean['private_kb']:>13.1f}MB "
+                      f"{mean['pss_kb']:>9.1f}MB {total_pss:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
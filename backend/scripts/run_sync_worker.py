@@ -0,0 +1,49 @@
+import os
+import sys
+import argparse
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+
+from app import create_app
+from app.routes.steam import append_tfidf_index_internal, refresh_autocomplete_internal
+from app.services.sync_queue import SyncQueueRunner, acquire_runner_lock
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Drain the metadata sync queue in a dedicated process (use with SYNC_WORKER_IN_PROCESS=0)."
+    )
+    ap.add_argument("--once", action="store_true", help="exit once the queue is empty")
+    args = ap.parse_args()
+
+    app = create_app()
+    # held until exit, so in-process runners on this host stay idle
+    lock_file = acquire_runner_lock()
+    if lock_file is None:
+        print("Another process already runs the sync queue on this host.")
+        sys.exit(1)
+    runner = SyncQueueRunner(
+        app,
+        index_games=append_tfidf_index_internal,
+        on_synced=refresh_autocomplete_internal,
+        batch_size=app.config["METADATA_SYNC_COMMIT_BATCH"],
+        lease_seconds=app.config["SYNC_CLAIM_LEASE_SECONDS"],
+        refresh_after=app.config["CATALOG_REFRESH_SECONDS"],
+    )
+    if not args.once:
+        print("Sync worker running. Ctrl+C to stop.")
+        try:
+            runner.run_forever()
+        except KeyboardInterrupt:
+            pass
+    else:
+        with app.app_context():
+            while runner.run_once():
+                pass
+    print(f"Runner stats: {runner.stats()}")
+    print(f"Upstream stats: {runner.engine.stats()}")
+
+
+if __name__ == "__main__":
+    main()
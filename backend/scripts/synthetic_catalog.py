@@ -0,0 +1,53 @@
+"""Synthetic Steam-like documents for index benchmarks (no database needed)."""
+import random
+
+GENRES = [
+    "Action", "Adventure", "Indie", "RPG", "Strategy", "Simulation", "Casual", "Sports",
+    "Racing", "Massively Multiplayer", "Early Access", "Free to Play",
+]
+
+TAGS = [
+    "Singleplayer", "Multiplayer", "Co-op", "Online Co-Op", "PvP", "Open World", "Roguelike",
+    "Roguelite", "Souls-like", "Difficult", "Story Rich", "Atmospheric", "Pixel Graphics",
+    "Survival", "Crafting", "Sandbox", "Building", "Farming Sim", "Cozy", "Relaxing", "Horror",
+    "Shooter", "FPS", "Tactical", "Turn-Based", "Card Game", "Deckbuilding", "Puzzle",
+    "Platformer", "Metroidvania", "Visual Novel", "Anime", "Sci-fi", "Fantasy", "Space",
+    "Management", "Exploration", "Hack and Slash", "Loot", "Team-Based", "Competitive",
+    "Battle Royale", "MOBA", "Fighting", "Arcade", "Retro", "Local Co-Op", "Party Game",
+    "Choices Matter", "Multiple Endings", "Narrative", "Mystery", "Detective", "Stealth",
+]
+
+SYLLABLES = [
+    "ka", "ro", "mi", "ta", "zen", "dra", "vor", "lux", "nex", "sol", "tor", "qua", "bel",
+    "fyr", "gal", "hel", "ion", "jun", "kor", "lum", "myr", "nov", "orb", "pyr", "rax",
+]
+
+
+def _zipf_choice(rng: random.Random, items: list, k: int) -> list:
+    # earlier items are much more common, like real Steam tags
+    weights = [1.0 / (i + 1) for i in range(len(items))]
+    picked = set()
+    while len(picked) < min(k, len(items)):
+        picked.add(rng.choices(items, weights=weights)[0])
+    return sorted(picked)
+
+
+def make_name(rng: random.Random) -> str:
+    words = []
+    for _ in range(rng.randint(1, 3)):
+        words.append("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize())
+    return " ".join(words)
+
+
+def make_documents(n: int, seed: int = 7) -> tuple[list[str], list[int]]:
+    """Return (documents, appids) shaped like build_document(name, genres, tags)."""
+    rng = random.Random(seed)
+    docs = []
+    appids = []
+    for i in range(n):
+        name = make_name(rng)
+        genres = ", ".join(_zipf_choice(rng, GENRES, rng.randint(1, 3)))
+        tags = ", ".join(_zipf_choice(rng, TAGS, rng.randint(3, 15)))
+        docs.append("\n".join([name, genres, tags]))
+        appids.append(10 + i * 10)
+    return docs, appids
@@ -0,0 +1,25 @@
+"""App bound to a throwaway SQLite file, for tests that need the database."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app import create_app, db
+from app.config import Config
+
+
+class SqliteAppTestCase(unittest.TestCase):
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        with mock.patch.object(Config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{self.db_path}"):
+            self.app = create_app()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        os.remove(self.db_path)
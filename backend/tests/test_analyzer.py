@@ -0,0 +1,37 @@
+import re
+import unittest
+
+from app.services.analyzer import STOPWORDS, Analyzer, tokenize, tokenize_many
+from app.services.bm25f import split_fields
+from app.services.context_ranking import keyword_matches, normalize_terms
+
+
+class AnalyzerTests(unittest.TestCase):
+    def test_plain_text_tokenizes_like_the_original_tokenizer(self):
+        text = "The Witcher 3: Wild Hunt\nRPG, Open World\nStory Rich, 2D, A game for you"
+        legacy = [t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in STOPWORDS and len(t) >= 2]
+        self.assertEqual(tokenize(text), legacy)
+
+    def test_hyphenated_words_add_their_folded_compound_after_the_parts(self):
+        self.assertEqual(tokenize("Online Co-op, X-Ray"), ["online", "co", "op", "coop", "ray", "xray"])
+        self.assertEqual(tokenize("co op"), ["co", "op"])
+        self.assertIn("coop", tokenize("COOP"))
+
+    def test_document_tokens_are_its_field_tokens_in_order(self):
+        doc = "Deep Rock Galactic\nAction, Co-op\nFPS, Online Co-Op, Team-Based\nDig deeper.\nMine-craft-like"
+        self.assertEqual(tokenize(doc), [t for terms in tokenize_many(split_fields(doc)) for t in terms])
+
+    def test_light_stemming_is_opt_in(self):
+        stemmed = Analyzer(stem=True)
+        self.assertEqual(stemmed.tokenize("Strategies games boss chess"), ["strategy", "game", "boss", "chess"])
+        self.assertEqual(tokenize("games"), ["games"])
+
+    def test_ranking_terms_fold_hyphens_like_the_index(self):
+        for text in ("online co-op", "Online Co-Op", "coop"):
+            terms = normalize_terms(text)
+            self.assertTrue(keyword_matches("co-op", terms, text.lower()), text)
+            self.assertTrue(keyword_matches("coop", terms, text.lower()), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import random
+import tempfile
+import time
+import unittest
+
+from app.services.autocomplete import (
+    SCAN_LIMIT,
+    AutocompleteHolder,
+    build_autocomplete,
+    load_autocomplete,
+    save_autocomplete,
+    term_document_frequencies,
+)
+from app.services.columnar_index import ColumnarTfidfIndex
+from app.services.tfidf_index import build_index_from_documents
+
+GAMES = [
+    (730, "Counter-Strike 2", 8_000_000),
+    (240, "Counter-Strike: Source", 150_000),
+    (1145360, "Hades", 250_000),
+    (1145350, "Hades II", 90_000),
+    (646570, "Slay the Spire", 160_000),
+    (892970, "Valheim", 400_000),
+    (548430, "Deep Rock Galactic", 230_000),
+    (413150, "Stardew Valley", 700_000),
+]
+DOCUMENTS = [
+    "Counter-Strike 2\nAction, Free to Play\nFPS, Shooter, Competitive",
+    "Hades\nAction, Indie, RPG\nRoguelike, Action Roguelike, Difficult",
+    "Slay the Spire\nStrategy, Indie\nRoguelike, Deckbuilding, Card Game",
+    "Stardew Valley\nSimulation, RPG\nFarming Sim, Cozy, Relaxing",
+]
+
+
+class AutocompleteTests(unittest.TestCase):
+    def setUp(self):
+        index = build_index_from_documents(DOCUMENTS, [730, 1145360, 646570, 413150])
+        self.ac = build_autocomplete(GAMES, term_document_frequencies(index))
+
+    def test_games_are_ranked_by_popularity(self):
+        names = [g["name"] for g in self.ac.complete("Counter")["games"]]
+        self.assertEqual(names, ["Counter-Strike 2", "Counter-Strike: Source"])
+        names = [g["name"] for g in self.ac.complete("hades")["games"]]
+        self.assertEqual(names, ["Hades", "Hades II"])
+
+    def test_prefix_matches_later_words_and_ignores_punctuation(self):
+        result = self.ac.complete("strike")
+        self.assertEqual([g["appid"] for g in result["games"]], [730, 240])
+        result = self.ac.complete("counter-strike: s")
+        self.assertEqual([g["appid"] for g in result["games"]], [240])
+        self.assertEqual(self.ac.complete("spire")["games"][0]["name"], "Slay the Spire")
+
+    def test_terms_complete_last_word_by_document_frequency(self):
+        result = self.ac.complete("coop rog")
+        self.assertEqual(result["terms"][0], {"term": "roguelike", "df": 2})
+        self.assertEqual(self.ac.complete("zzz"), {"prefix": "zzz", "games": [], "terms": []})
+
+    def test_precomputed_short_prefixes_match_range_scan(self):
+        rng = random.Random(3)
+        games = [
+            (i, "".join(rng.choice("abc") for _ in range(rng.randint(1, 6))), rng.randint(0, 50))
+            for i in range(SCAN_LIMIT * 8)
+        ]
+        ac = build_autocomplete(games, {})
+        precomputed = {p: ac.games.complete(p, 10) for p in ("a", "ab", "abc", "b", "ca")}
+        self.assertTrue(any(p in ac.games._top for p in precomputed))
+        ac.games._top.clear()
+        for prefix, expected in precomputed.items():
+            self.assertEqual(ac.games.complete(prefix, 10), expected)
+
+    def test_round_trip_through_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = save_autocomplete(self.ac, os.path.join(tmp, "autocomplete.npz"))
+            loaded = load_autocomplete(path)
+        for prefix in ("c", "counter s", "ha", "rog", "stardew"):
+            self.assertEqual(loaded.complete(prefix), self.ac.complete(prefix))
+
+    def test_holder_keeps_serving_old_tables_while_reloading_and_on_bad_files(self):
+        def settle(holder):
+            deadline = time.monotonic() + 5
+            while holder.status()["reloading"] and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = save_autocomplete(self.ac, os.path.join(tmp, "autocomplete.npz"))
+            holder = AutocompleteHolder(path, poll_interval=0)
+            first = holder.current()
+            self.assertIsNotNone(first)
+
+            with open(path, "wb") as f:
+                f.write(b"not an npz file")
+            self.assertIs(holder.current(), first)
+            settle(holder)
+            self.assertIs(holder.current(), first)
+            self.assertIsNotNone(holder.status()["last_error"])
+
+            save_autocomplete(build_autocomplete(GAMES[:2], {}), path)
+            holder.current()
+            settle(holder)
+            self.assertEqual(holder.current().games.item_appids.size, 2)
+            self.assertIsNone(holder.status()["last_error"])
+
+    def test_columnar_df_matches_legacy(self):
+        index = build_index_from_documents(DOCUMENTS, [730, 1145360, 646570, 413150])
+        expected = term_document_frequencies(index)
+        self.assertEqual(term_document_frequencies(ColumnarTfidfIndex.from_tfidf_index(index)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
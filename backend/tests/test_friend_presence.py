@@ -0,0 +1,127 @@
+import threading
+import unittest
+
+from app.services import friend_presence
+from app.services.friend_presence import FriendPresenceCache
+
+
+class FakeSteam:
+    def __init__(self):
+        self.friend_list_calls = 0
+        self.summary_calls = 0
+        self.online = {"1", "3"}
+        self.fail = False
+        self.gate = None
+
+    def friend_ids(self, api_key, steamid):
+        self.friend_list_calls += 1
+        return ["1", "2", "3"]
+
+    def summaries(self, api_key, ids):
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail:
+            raise RuntimeError("steam down")
+        self.summary_calls += 1
+        return [{"steamid": i, "personastate": 1 if i in self.online else 0} for i in ids]
+
+
+class FriendPresenceCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.steam = FakeSteam()
+        self.cache = FriendPresenceCache(
+            "key",
+            friend_list_ttl=3600,
+            presence_ttl=60,
+            max_stale=600,
+            fetch_friend_ids=self.steam.friend_ids,
+            fetch_summaries=self.steam.summaries,
+            clock=lambda: self.now,
+        )
+
+    def drain(self):
+        if self.cache._pool is not None:
+            self.cache._pool.shutdown(wait=True)
+            self.cache._pool = None
+
+    def test_fresh_entries_are_served_without_calling_steam(self):
+        self.assertEqual(len(self.cache.friends("me")), 3)
+        self.now += 30
+        self.cache.friends("me")
+        self.assertEqual((self.steam.friend_list_calls, self.steam.summary_calls), (1, 1))
+        self.assertEqual(self.cache.online_count("me"), 2)
+
+    def test_stale_presence_is_served_while_revalidating(self):
+        self.cache.friends("me")
+        self.steam.online = {"2"}
+        self.now += 120
+        self.assertEqual(self.cache.online_count("me"), 2)  # stale value, refresh scheduled
+        self.drain()
+        self.assertEqual(self.cache.online_count("me"), 1)
+        # only presence was refreshed; the friend list is still within its TTL
+        self.assertEqual((self.steam.friend_list_calls, self.steam.summary_calls), (1, 2))
+
+    def test_online_count_never_waits_for_a_cold_entry(self):
+        self.steam.gate = threading.Event()
+        self.assertEqual(self.cache.online_count("me"), 0)
+        self.steam.gate.set()
+        self.drain()
+        self.assertEqual(self.cache.online_count("me"), 2)
+
+    def test_failed_refresh_keeps_the_old_value_until_max_stale(self):
+        self.cache.friends("me")
+        self.steam.fail = True
+        self.now += 120
+        self.assertEqual(self.cache.online_count("me"), 2)
+        self.drain()
+        self.assertEqual(self.cache.stats()["refresh_errors"], 1)
+        self.now += 600
+        self.assertEqual(self.cache.online_count("me"), 0)
+        with self.assertRaises(RuntimeError):
+            self.cache.friends("me")
+
+    def test_waiting_caller_joins_the_refresh_in_flight(self):
+        self.steam.gate = threading.Event()
+        self.cache.prefetch("me")
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(self.cache.friends("me")))
+        waiter.start()
+        self.steam.gate.set()
+        waiter.join(5)
+        self.drain()
+        self.assertEqual(len(result[0]), 3)
+        self.assertEqual((self.steam.friend_list_calls, self.steam.summary_calls), (1, 1))
+
+    def test_failures_back_off_before_steam_is_asked_again(self):
+        self.steam.fail = True
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                self.cache.friends("me")
+        self.cache.sweep()
+        self.drain()
+        self.assertEqual(self.cache.stats()["refresh_errors"], 1)
+        self.assertEqual(self.cache.stats()["backing_off"], 1)
+
+        self.steam.fail = False
+        self.now += friend_presence.FAILURE_BACKOFF_SECONDS
+        self.assertEqual(len(self.cache.friends("me")), 3)
+        self.assertEqual(self.cache.stats()["backing_off"], 0)
+
+    def test_sweep_refreshes_active_entries_and_evicts_idle_ones(self):
+        self.cache.friends("me")
+        self.cache.friends("idle")
+        self.now += 50
+        self.cache.friends("me")
+        self.cache.sweep()  # both are recently requested and 50s into a 60s TTL
+        self.drain()
+        self.assertEqual(self.steam.summary_calls, 4)
+        self.now += 3600
+        self.cache.friends("me")
+        self.drain()
+        self.cache.sweep()
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
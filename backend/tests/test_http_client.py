@@ -0,0 +1,110 @@
+import unittest
+
+import requests
+
+from app.services.http_client import HttpClient, endpoint_name
+from stub_server import StubServer
+
+
+def no_sleep(seconds):
+    pass
+
+
+class HttpClientTests(unittest.TestCase):
+    def test_retries_5xx_then_returns_success(self):
+        replies = iter([(503, {"error": "busy"}, None), (502, {}, None), (200, {"ok": True}, None)])
+        with StubServer(lambda path, query: next(replies)) as server:
+            client = HttpClient(max_retries=3, sleep=no_sleep)
+            r = client.get(f"{server.url}/api.php", params={"appid": "10"})
+            self.assertEqual(r.status_code, 200)
+            self.assertEqual(r.json(), {"ok": True})
+            self.assertEqual([q for _, q, _ in server.requests], [{"appid": "10"}] * 3)
+
+            stats = client.stats()[endpoint_name(f"{server.url}/api.php")]
+            self.assertEqual(stats["calls"], 1)
+            self.assertEqual(stats["retries"], 2)
+            self.assertEqual(stats["errors"], 0)
+            self.assertEqual(stats["statuses"], {"200": 1})
+
+    def test_returns_last_response_when_retries_run_out(self):
+        with StubServer(lambda path, query: (500, {}, None)) as server:
+            client = HttpClient(max_retries=2, sleep=no_sleep)
+            r = client.get(f"{server.url}/x")
+            self.assertEqual(r.status_code, 500)
+            self.assertEqual(len(server.requests), 3)
+            with self.assertRaises(requests.HTTPError):
+                r.raise_for_status()
+            self.assertEqual(client.stats()[endpoint_name(f"{server.url}/x")]["errors"], 1)
+
+    def test_does_not_retry_client_errors(self):
+        with StubServer(lambda path, query: (404, {}, None)) as server:
+            client = HttpClient(max_retries=3, sleep=no_sleep)
+            self.assertEqual(client.get(f"{server.url}/missing").status_code, 404)
+            self.assertEqual(len(server.requests), 1)
+
+    def test_honours_retry_after_on_429(self):
+        replies = iter([(429, {}, {"Retry-After": "2"}), (200, {}, None)])
+        slept = []
+        with StubServer(lambda path, query: next(replies)) as server:
+            client = HttpClient(max_retries=1, backoff_max=5, sleep=slept.append)
+            self.assertEqual(client.get(server.url + "/").status_code, 200)
+        self.assertEqual(slept, [2.0])
+
+    def test_backoff_is_jittered_and_capped(self):
+        client = HttpClient(backoff_base=0.5, backoff_max=3.0)
+        for attempt in range(8):
+            delay = client.backoff(attempt)
+            self.assertGreaterEqual(delay, 0.0)
+            self.assertLessEqual(delay, min(3.0, 0.5 * 2 ** attempt))
+
+    def test_keeps_connection_alive_across_calls(self):
+        with StubServer(lambda path, query: (200, {"path": path}, None)) as server:
+            client = HttpClient(sleep=no_sleep)
+            for i in range(5):
+                self.assertEqual(client.get(f"{server.url}/game/{i}").json(), {"path": f"/game/{i}"})
+            self.assertEqual(len(server.client_ports()), 1)
+
+    def test_connection_errors_are_retried_then_raised(self):
+        with StubServer(lambda path, query: (200, {}, None)) as server:
+            url = server.url
+        slept = []
+        client = HttpClient(max_retries=2, sleep=slept.append)
+        with self.assertRaises(requests.ConnectionError):
+            client.get(url + "/", timeout=1)
+        self.assertEqual(len(slept), 2)
+        stats = client.stats()[endpoint_name(url + "/")]
+        self.assertEqual((stats["calls"], stats["errors"], stats["retries"]), (1, 1, 2))
+
+    def test_interactive_calls_retry_once(self):
+        with StubServer(lambda path, query: (503, {}, None)) as server:
+            client = HttpClient(max_retries=3, sleep=no_sleep)
+            self.assertEqual(client.get(f"{server.url}/x", interactive=True).status_code, 503)
+            self.assertEqual(len(server.requests), 2)
+
+    def test_deadline_stops_retries_that_would_overrun_it(self):
+        now = [0.0]
+        slept = []
+
+        def sleep(seconds):
+            slept.append(seconds)
+            now[0] += seconds
+
+        with StubServer(lambda path, query: (503, {}, {"Retry-After": "4"})) as server:
+            client = HttpClient(max_retries=5, backoff_max=8, sleep=sleep, clock=lambda: now[0])
+            self.assertEqual(client.get(f"{server.url}/x", deadline=10).status_code, 503)
+            # 4 s + 4 s of backoff fit in 10 s; a third wait would leave under a second
+            self.assertEqual(slept, [4.0, 4.0])
+            self.assertEqual(len(server.requests), 3)
+
+    def test_waiting_for_a_pooled_connection_times_out(self):
+        with StubServer(lambda path, query: (200, {}, None)) as server:
+            client = HttpClient(max_retries=0, pool_maxsize=1, pool_timeout=0.1, sleep=no_sleep)
+            held = client.get(server.url + "/", stream=True)  # keeps the only connection checked out
+            with self.assertRaises(requests.ConnectionError):
+                client.get(server.url + "/")
+            held.close()
+            self.assertEqual(client.get(server.url + "/").status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
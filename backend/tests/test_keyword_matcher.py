@@ -0,0 +1,61 @@
+import random
+import unittest
+
+from app.services import context_ranking as cr
+from app.services.keyword_matcher import KeywordAutomaton
+
+
+def substring_hits(keywords, text):
+    return frozenset(k for k in keywords if k in text)
+
+
+class KeywordAutomatonTests(unittest.TestCase):
+    def test_finds_overlapping_and_nested_keywords(self):
+        automaton = KeywordAutomaton(["shooter", "arena shooter", "hoot", "he", "she", "hers"])
+        self.assertEqual(
+            automaton.find_all("arena shooters, she hers"),
+            {"shooter", "arena shooter", "hoot", "she", "he", "hers"},
+        )
+        self.assertEqual(automaton.find_all("nothing here?"), {"he"})
+        self.assertEqual(automaton.find_all(""), frozenset())
+
+    def test_matches_substring_checks_on_random_text(self):
+        rng = random.Random(11)
+        keywords = sorted(cr.RANKING_KEYWORDS)
+        automaton = KeywordAutomaton(keywords)
+        for _ in range(500):
+            text = " ".join(rng.choice(keywords + ["-", "co", "op", "x"]) for _ in range(rng.randint(0, 8)))
+            self.assertEqual(automaton.find_all(text), substring_hits(keywords, text), text)
+
+    def test_scanning_in_pieces_equals_one_scan(self):
+        automaton = KeywordAutomaton(["co-op", "online co-op", "op"])
+        mask, state = automaton.scan("online co")
+        rest, _ = automaton.scan("-op", state)
+        self.assertEqual(automaton.keywords_in(mask | rest), automaton.find_all("online co-op"))
+
+
+class ContextRankingKeywordTests(unittest.TestCase):
+    def test_matches_include_folded_forms_but_any_stays_substring_only(self):
+        hits = cr.keyword_hits(cr.compose_game_text("Online Co-Op", "Team-Based"))
+        self.assertTrue(hits.any(("co-op",)))
+        self.assertFalse(hits.any(("coop",)))
+        self.assertEqual(hits.count_matches(("coop", "co-op", "pvp")), 2)
+        self.assertFalse(hits.any(("pvp", "battle royale")))
+
+    def test_priority_hits_count_each_keyword_once(self):
+        text = "fps, fps shooter, arena shooter, co-op"
+        expected = sum(
+            cr.keyword_matches(k, cr.normalize_terms(text, "coop"), cr.compose_game_text(text, "coop"))
+            for k in cr.FPS_PRIORITY_KEYWORDS
+        )
+        self.assertEqual(cr.get_priority_keyword_hits(cr.FPS_PRIORITY_KEYWORDS, text, "coop"), expected)
+
+    def test_scoring_helpers_on_sample_descriptors(self):
+        text = cr.compose_game_text("Stardew Valley", "Simulation, RPG", "Farming Sim, Relaxing, Cozy, Online Co-Op")
+        self.assertTrue(cr.is_social_game(text))
+        self.assertFalse(cr.is_social_game("puzzle, singleplayer"))
+        self.assertEqual(cr.get_session_length_by_text(""), cr.DEFAULT_SESSION_LENGTH)
+
+
+if __name__ == "__main__":
+    unittest.main()
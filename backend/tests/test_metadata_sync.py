@@ -0,0 +1,145 @@
+import time
+import unittest
+
+import requests
+
+from app.services.metadata_sync import MetadataSyncEngine, TokenBucket, Upstream, fetch_steamspy
+from stub_server import StubServer
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_queues_callers_at_the_rate(self):
+        now = [0.0]
+        slept = []
+        bucket = TokenBucket(rate=2, burst=1, clock=lambda: now[0], sleep=slept.append)
+        waits = [bucket.acquire() for _ in range(3)]
+        self.assertEqual(waits, [0.0, 0.5, 1.0])
+        self.assertEqual(slept, [0.5, 1.0])
+
+    def test_refills_up_to_burst(self):
+        now = [0.0]
+        bucket = TokenBucket(rate=1, burst=3, clock=lambda: now[0], sleep=lambda s: None)
+        self.assertEqual([bucket.acquire() for _ in range(3)], [0.0, 0.0, 0.0])
+        now[0] = 100.0  # long idle: only burst tokens are banked
+        self.assertEqual([bucket.acquire() for _ in range(4)], [0.0, 0.0, 0.0, 1.0])
+
+    def test_pause_holds_back_the_next_token(self):
+        now = [0.0]
+        bucket = TokenBucket(rate=1, burst=3, clock=lambda: now[0], sleep=lambda s: None)
+        bucket.pause(30)
+        # banked tokens are dropped; the next token is due once the pause and one refill are over
+        self.assertEqual(bucket.acquire(), 31.0)
+
+    def test_rejects_non_positive_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+def steamspy_handler(path, query):
+    appid = int(query["appid"])
+    if appid == 404:
+        return 404, {}, None
+    if appid % 5 == 0:
+        return 200, {}, None  # unknown to SteamSpy
+    return 200, {"appid": appid, "name": f"Game {appid}", "tags": {"Action": 10}}, None
+
+
+def store_handler(path, query):
+    appid = query["appids"]
+    return 200, {appid: {"success": True, "data": {"platforms": {"windows": True, "linux": True}}}}, None
+
+
+class MetadataSyncEngineTests(unittest.TestCase):
+    def test_fetches_both_upstreams_and_reports_errors(self):
+        with StubServer(steamspy_handler) as spy, StubServer(store_handler) as store:
+            engine = MetadataSyncEngine(
+                steamspy_rate=200,
+                store_rate=200,
+                workers=4,
+                steamspy_url=f"{spy.url}/api.php",
+                store_url=f"{store.url}/api/appdetails",
+            )
+            results = {game.appid: game for game in engine.run([1, 2, 5, 404])}
+
+            self.assertEqual(sorted(results), [1, 2, 5, 404])
+            self.assertEqual(results[1].steamspy["name"], "Game 1")
+            self.assertEqual(results[1].store["platforms"], {"windows": True, "linux": True})
+            self.assertIsNone(results[5].steamspy)
+            self.assertEqual(results[5].store, {})
+            self.assertIsNotNone(results[404].error)
+            # the store is only asked about games SteamSpy knows
+            self.assertEqual(sorted(int(q["appids"]) for _, q, _ in store.requests), [1, 2])
+
+            upstreams = engine.stats()["upstreams"]
+            self.assertEqual((upstreams["steamspy"]["calls"], upstreams["steamspy"]["errors"]), (4, 1))
+            self.assertEqual(upstreams["steamspy"]["error_rate"], 0.25)
+            self.assertEqual((upstreams["steam_store"]["calls"], upstreams["steam_store"]["errors"]), (2, 0))
+
+    def test_throughput_follows_the_rate_limit_not_latency(self):
+        def slow(path, query):
+            time.sleep(0.1)
+            return 200, {"name": "x"}, None
+
+        with StubServer(slow) as spy:
+            engine = MetadataSyncEngine(steamspy_rate=20, workers=6, steamspy_url=spy.url, fetch_store=False)
+            started = time.monotonic()
+            fetched = list(engine.run(range(1, 13)))
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(len(fetched), 12)
+        # 11 tokens after the first at 20/s; serial calls would take at least 1.2s
+        self.assertGreaterEqual(elapsed, 0.5)
+        self.assertLess(elapsed, 1.1)
+
+
+class CountingBucket(TokenBucket):
+    def __init__(self):
+        super().__init__(rate=1000, sleep=lambda s: None)
+        self.acquired = 0
+        self.paused = []
+
+    def acquire(self):
+        self.acquired += 1
+        return 0.0
+
+    def pause(self, seconds):
+        self.paused.append(seconds)
+
+
+class UpstreamRetryTests(unittest.TestCase):
+    def test_every_attempt_takes_a_token_and_counts_as_an_error(self):
+        replies = iter([(503, {}, None), (502, {}, None), (200, {"name": "Game 7"}, None)])
+        with StubServer(lambda path, query: next(replies)) as spy:
+            bucket = CountingBucket()
+            upstream = Upstream("steamspy", bucket, max_retries=3, sleep=lambda s: None)
+            data = upstream.call(fetch_steamspy, 7, spy.url, max_retries=0)
+
+        self.assertEqual(data["name"], "Game 7")
+        self.assertEqual(len(spy.requests), 3)
+        self.assertEqual(bucket.acquired, 3)
+        stats = upstream.stats(elapsed=1.0)
+        self.assertEqual((stats["calls"], stats["errors"], stats["retries"]), (3, 2, 2))
+        self.assertEqual(stats["error_rate"], round(2 / 3, 4))
+
+    def test_429_pauses_the_bucket_for_the_full_retry_after(self):
+        replies = iter([(429, {}, {"Retry-After": "120"}), (200, {"name": "Game 8"}, None)])
+        slept = []
+        with StubServer(lambda path, query: next(replies)) as spy:
+            bucket = CountingBucket()
+            upstream = Upstream("steamspy", bucket, max_retries=3, sleep=slept.append)
+            upstream.call(fetch_steamspy, 8, spy.url, max_retries=0)
+
+        self.assertEqual(bucket.paused, [120.0])
+        self.assertEqual(slept, [])
+        self.assertEqual(upstream.stats(elapsed=1.0)["throttled"], 1)
+
+    def test_client_errors_are_not_retried(self):
+        with StubServer(lambda path, query: (404, {}, None)) as spy:
+            upstream = Upstream("steamspy", CountingBucket(), max_retries=3, sleep=lambda s: None)
+            with self.assertRaises(requests.HTTPError):
+                upstream.call(fetch_steamspy, 9, spy.url, max_retries=0)
+            self.assertEqual(len(spy.requests), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
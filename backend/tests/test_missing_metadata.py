@@ -0,0 +1,50 @@
+import unittest
+
+from app import db
+from app.models import MetadataFetchTask, UserGameStat
+from app.models_catalog import GameCatalog
+from app.services.missing_metadata import count_missing
+from app.services.sync_queue import enqueue_missing
+from sqlite_app import SqliteAppTestCase
+
+
+class MissingMetadataTests(SqliteAppTestCase):
+    def setUp(self):
+        super().setUp()
+        libraries = {
+            "alice": [1, 2, 3, 4, 5],
+            "bob": [2, 3, 4, 6],
+            "carol": [3, 4, 7],
+        }
+        for steamid, appids in libraries.items():
+            for appid in appids:
+                db.session.add(UserGameStat(steamid=steamid, appid=appid))
+        for appid in (4, 7):
+            db.session.add(GameCatalog(appid=appid, name=f"Game {appid}"))
+        db.session.commit()
+
+    def queued(self, steamid=None):
+        enqueue_missing(steamid, now=100)
+        db.session.commit()
+        return {t.appid: t.priority for t in MetadataFetchTask.query.all()}
+
+    def test_queues_missing_appids_with_owner_counts(self):
+        self.assertEqual(self.queued(), {1: 1, 2: 2, 3: 3, 5: 1, 6: 1})
+        self.assertEqual(count_missing(), 5)
+
+    def test_scoped_to_a_library_but_counts_every_owner(self):
+        self.assertEqual(self.queued(steamid="nobody"), {})
+        self.assertEqual(self.queued(steamid="carol"), {3: 3})
+        self.assertEqual(count_missing("carol"), 1)
+        self.assertEqual(self.queued(steamid="bob"), {2: 2, 3: 3, 6: 1})
+
+    def test_requeue_updates_owner_counts(self):
+        self.queued()
+        db.session.add(UserGameStat(steamid="dave", appid=6))
+        db.session.add(UserGameStat(steamid="erin", appid=6))
+        db.session.commit()
+        self.assertEqual(self.queued(steamid="dave"), {1: 1, 2: 2, 3: 3, 5: 1, 6: 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import random
+import unittest
+
+from app.routes.public_recommendations import rank_games
+
+GENRES = ["Shooter", "MMORPG", "Card Game", "Strategy", "Battle Royale", "MOBA", "Racing", "Social"]
+
+
+def make_games(n, seed=4):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i,
+            "title": f"Game {i % 25}",  # repeated titles give tied scores
+            "genre": rng.choice(GENRES),
+            "short_description": rng.choice(["A free-to-play co-op shooter.", "A relaxing card game.", ""]),
+            "publisher": "Studio",
+            "platform": "PC (Windows)",
+            "release_date": rng.choice([None, "2019-05-01", "2024-01-15"]),
+            "steamRatingPercent": rng.choice([None, "80", "95"]),
+            "savings": None,
+            "dealRating": None,
+        }
+        for i in range(n)
+    ]
+
+
+class PublicRankingTests(unittest.TestCase):
+    CONTEXT = {"timeAvailable": 45, "energy": "high", "goal": "competitive", "device": "pc", "friendsOnline": True}
+
+    def test_full_ranking_is_sorted_and_stable(self):
+        games = make_games(60)
+        ranked = rank_games(games, self.CONTEXT)
+        self.assertEqual(len(ranked), 60)
+        keyed = sorted(range(60), key=lambda i: -ranked[i]["score"])
+        self.assertEqual(keyed, list(range(60)))
+        position = {game["id"]: i for i, game in enumerate(games)}
+        for a, b in zip(ranked, ranked[1:]):
+            if a["score"] == b["score"]:
+                self.assertLess(position[a["id"]], position[b["id"]])
+
+    def test_pages_are_slices_of_the_full_ranking(self):
+        games = make_games(60)
+        full = rank_games(games, self.CONTEXT)
+        for offset, limit in ((0, 8), (8, 8), (50, 20), (60, 5)):
+            page = rank_games(games, self.CONTEXT, limit=limit, offset=offset)
+            self.assertEqual(page, full[offset:offset + limit])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,14 @@
+import random
 import time
 import unittest
 from types import SimpleNamespace
 
+from flask_jwt_extended import create_access_token
+
+from app.services.batch_scorer import build_columns, rank_library, score_columns
+from app.services.game_features import apply_game_features, compute_game_features, game_features, stored_features
 from app.services.recommender import RecommendationContext, score_candidate
+from sqlite_app import SqliteAppTestCase
 
 
 class RecommenderRankingTests(unittest.TestCase):
@@ -10,6 +16,7 @@ class RecommenderRankingTests(unittest.TestCase):
         return RecommendationContext(
             time_available_min=60,
             energy_level="low",
+            goal="relax",
             platform="windows",
             social_mode="any",
             prefer_installed=prefer_installed,
@@ -18,10 +25,16 @@ class RecommenderRankingTests(unittest.TestCase):
 
     def make_catalog(self):
         return SimpleNamespace(
+            name="Test Game",
+            genres="rpg",
+            tags="",
+            categories="",
+            windows=True,
+            mac=False,
+            linux=False,
             avg_session_minutes=60,
             difficulty="low",
             multiplayer_mode="solo",
-            genres="rpg",
             metacritic_score=None,
             positive=0,
             negative=0,
@@ -78,5 +91,151 @@ class RecommenderRankingTests(unittest.TestCase):
 
         self.assertGreater(high_score, low_score)
 
+
+class GameFeatureTests(unittest.TestCase):
+    def make_catalog(self, **kwargs):
+        data = {
+            "name": "Deep Rock Galactic",
+            "genres": "Action, Indie",
+            "tags": "Co-op, FPS, Online Co-Op, Shooter, Team-Based",
+            "categories": "Multi-player, Online Co-op",
+            "windows": True,
+            "mac": False,
+            "linux": False,
+            "avg_session_minutes": None,
+            "multiplayer_mode": "coop",
+            "difficulty": "medium",
+            "metacritic_score": 85,
+            "positive": 9000,
+            "negative": 400,
+        }
+        data.update(kwargs)
+        return SimpleNamespace(**data)
+
+    def test_stored_features_round_trip(self):
+        cat = self.make_catalog()
+        self.assertIsNone(stored_features(cat))
+        computed = apply_game_features(cat)
+        self.assertEqual(stored_features(cat), computed)
+        self.assertEqual(computed.genres, ("action", "indie"))
+        self.assertTrue(computed.social_game)
+
+    def test_stale_feature_version_is_recomputed(self):
+        cat = self.make_catalog()
+        apply_game_features(cat)
+        cat.feature_version = 0
+        cat.feature_intensity = 99
+        self.assertIsNone(stored_features(cat))
+        self.assertEqual(game_features(cat), compute_game_features(cat))
+
+    def test_scores_match_with_and_without_stored_features(self):
+        stat = SimpleNamespace(playtime_forever=240, playtime_2weeks=30, last_played=int(time.time()) - 86400)
+        for goal in ("relax", "competitive", "story", "social"):
+            for social_mode in ("social", "any"):
+                ctx = RecommendationContext(
+                    time_available_min=45,
+                    energy_level="high",
+                    goal=goal,
+                    platform="windows",
+                    social_mode=social_mode,
+                    prefer_installed=True,
+                    friends_online_count=2,
+                )
+                plain = self.make_catalog()
+                stored = self.make_catalog()
+                apply_game_features(stored)
+                self.assertEqual(
+                    score_candidate(stat, plain, ctx, {"action": 1.5}, 0.2),
+                    score_candidate(stat, stored, ctx, {"action": 1.5}, 0.2),
+                )
+
+
+class BatchScorerTests(unittest.TestCase):
+    TAGS = ["Co-op", "FPS", "Shooter", "Relaxing", "Cozy", "Story Rich", "PvP", "Souls-like", "Puzzle", "MMO"]
+
+    def make_library(self, n, seed=3):
+        rng = random.Random(seed)
+        now = int(time.time())
+        candidates = []
+        for i in range(n):
+            cat = SimpleNamespace(
+                name=rng.choice(["Counter-Strike 2", "Stardew Valley", "Hades", f"Game {i}"]),
+                genres=", ".join(rng.sample(["Action", "RPG", "Indie", "Strategy", "Casual"], 2)),
+                tags=", ".join(rng.sample(self.TAGS, 3)),
+                categories=rng.choice(["Single-player", "Multi-player, Online Co-op", ""]),
+                windows=rng.random() < 0.9,
+                mac=rng.random() < 0.3,
+                linux=False,
+                avg_session_minutes=rng.choice([None, 20, 60, 150]),
+                multiplayer_mode=rng.choice([None, "solo", "coop", "pvp"]),
+                difficulty=rng.choice([None, "low", "high"]),
+                metacritic_score=rng.choice([None, 70, 88]),
+                positive=rng.randint(0, 5000),
+                negative=rng.randint(0, 1000),
+            )
+            if rng.random() < 0.5:
+                apply_game_features(cat)
+            stat = SimpleNamespace(
+                appid=100 + i,
+                playtime_forever=rng.choice([None, 0, 90, 800, 2500]),
+                playtime_2weeks=rng.choice([None, 0, 0, 45]),
+                # whole days plus an hour, so day thresholds are never hit exactly
+                last_played=rng.choice([None, now - rng.randint(0, 400) * 86400 - 3600]),
+            )
+            candidates.append((stat, cat))
+        return candidates
+
+    def per_game_ranking(self, candidates, ctx, weights, bias, shuffle_seed=0):
+        scored = []
+        for stat, cat in candidates:
+            score, reasons = score_candidate(stat, cat, ctx, weights, bias)
+            if shuffle_seed:
+                score += ((stat.appid + shuffle_seed) % 7) * 0.07
+            scored.append((stat.appid, round(score, 4), reasons))
+        scored.sort(key=lambda x: x[1], reverse=True)
+        return scored
+
+    def test_matches_per_game_scores_and_order(self):
+        candidates = self.make_library(400)
+        weights = {"action": 1.2, "rpg": -0.5, "casual": 4.5}
+        for goal in ("relax", "competitive", "story", "social"):
+            for energy, social_mode, prefer_installed in (("low", "social", True), ("high", "any", False)):
+                ctx = RecommendationContext(
+                    time_available_min=60,
+                    energy_level=energy,
+                    goal=goal,
+                    platform="windows",
+                    social_mode=social_mode,
+                    prefer_installed=prefer_installed,
+                    friends_online_count=0,
+                )
+                for shuffle_seed in (0, 11):
+                    expected = self.per_game_ranking(candidates, ctx, weights, 0.9, shuffle_seed)
+                    ranked, total = rank_library(candidates, ctx, weights, 0.9, limit=8, shuffle_seed=shuffle_seed)
+                    self.assertEqual(total, len(candidates))
+                    self.assertEqual(
+                        [(g.game_stat.appid, g.score, g.reasons) for g in ranked],
+                        expected[:8],
+                    )
+                    columns = build_columns(candidates, goal, weights)
+                    self.assertEqual(
+                        score_columns(columns, ctx, 0.9).tolist(),
+                        [score_candidate(stat, cat, ctx, weights, 0.9)[0] for stat, cat in candidates],
+                    )
+
+    def test_empty_library(self):
+        ranked, total = rank_library([], RecommenderRankingTests().make_ctx(), {}, 0.0)
+        self.assertEqual((ranked, total), ([], 0))
+
+
+class RecommendRouteTests(SqliteAppTestCase):
+    def test_unparseable_limit_is_a_bad_request(self):
+        self.app.config["JWT_SECRET_KEY"] = "test-secret-" + "x" * 32
+        headers = {"Authorization": f"Bearer {create_access_token(identity='1')}"}
+        r = self.app.test_client().post("/api/recommend", json={"limit": "abc"}, headers=headers)
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.get_json(), {"error": "invalid_paging"})
+
+
 if __name__ == "__main__":
     unittest.main()
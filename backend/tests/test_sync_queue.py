@@ -0,0 +1,263 @@
+import os
+import tempfile
+import unittest
+
+from app import db
+from app.models import MetadataFetchTask, SyncJob, UserGameStat
+from app.models_catalog import GameCatalog
+from app.services import sync_queue
+from app.services.catalog_writer import CatalogWriter, catalog_values
+from app.services.metadata_sync import FetchedGame
+from sqlite_app import SqliteAppTestCase
+
+
+class FakeEngine:
+    """Stands in for MetadataSyncEngine: appids in `missing` are unknown, in `failing` raise."""
+
+    def __init__(self, missing=(), failing=()):
+        self.missing = set(missing)
+        self.failing = set(failing)
+        self.requested = []
+
+    def run(self, appids):
+        for appid in appids:
+            self.requested.append(appid)
+            if appid in self.failing:
+                yield FetchedGame(appid=appid, error="503 Service Unavailable")
+            elif appid in self.missing:
+                yield FetchedGame(appid=appid)
+            else:
+                spy = {"name": f"Game {appid}", "genre": "Action", "tags": {"Action": 10}}
+                yield FetchedGame(appid=appid, steamspy=spy, store={"platforms": {"windows": True}})
+
+
+class SyncQueueTests(SqliteAppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.indexed = []
+        self.synced = 0
+
+    def own(self, steamid, appids):
+        for appid in appids:
+            db.session.add(UserGameStat(steamid=steamid, appid=appid))
+        db.session.commit()
+
+    def runner(self, engine, batch_size=10):
+        return sync_queue.SyncQueueRunner(
+            self.app,
+            index_games=lambda docs, appids, rows: self.indexed.append(list(appids)),
+            on_synced=self.count_synced,
+            batch_size=batch_size,
+            engine=engine,
+        )
+
+    def count_synced(self):
+        self.synced += 1
+
+    def queue_states(self):
+        return {t.appid: t.state for t in MetadataFetchTask.query.all()}
+
+    def test_appids_are_queued_once_across_users(self):
+        db.session.add(GameCatalog(appid=1, name="Known"))
+        self.own("alice", [1, 2, 3])
+        self.own("bob", [2, 3, 4])
+
+        alice = sync_queue.start_sync_job("alice", owned=3, now=100)
+        bob = sync_queue.start_sync_job("bob", owned=3, now=100)
+
+        self.assertEqual(self.queue_states(), {2: "pending", 3: "pending", 4: "pending"})
+        self.assertEqual((alice.total, alice.remaining), (2, 2))
+        self.assertEqual((bob.total, bob.remaining), (3, 3))
+
+    def test_most_owned_appids_are_claimed_first(self):
+        self.own("alice", [1, 2, 3])
+        self.own("bob", [3, 2])
+        self.own("carol", [3])
+        sync_queue.start_sync_job("alice", owned=3, now=100)
+
+        self.assertEqual({t.appid: t.priority for t in MetadataFetchTask.query.all()}, {1: 1, 2: 2, 3: 3})
+        self.assertEqual(sync_queue.claim_batch(2, now=200)[1], [2, 3])
+        self.assertEqual(sync_queue.claim_batch(2, now=200)[1], [1])
+
+    def test_unknown_appids_are_queued_again_once_stale(self):
+        self.own("alice", [5])
+        sync_queue.start_sync_job("alice", owned=1, now=100)
+        self.runner(FakeEngine(missing={5})).run_once()
+        db.session.query(MetadataFetchTask).update({"updated_at": 100})
+        db.session.commit()
+
+        sync_queue.start_sync_job("alice", owned=1, now=200)
+        self.assertEqual(self.queue_states(), {5: "missing"})
+        sync_queue.start_sync_job("alice", owned=1, now=101 + sync_queue.RETRY_AFTER_SECONDS)
+        self.assertEqual(self.queue_states(), {5: "pending"})
+
+    def test_sync_while_running_joins_the_job(self):
+        self.own("alice", [10, 11])
+        first = sync_queue.start_sync_job("alice", owned=2, now=100)
+        second = sync_queue.start_sync_job("alice", owned=2, now=110)
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(SyncJob.query.count(), 1)
+
+    def test_nothing_missing_finishes_immediately(self):
+        db.session.add(GameCatalog(appid=1, name="Known"))
+        self.own("alice", [1])
+        job = sync_queue.start_sync_job("alice", owned=1, now=100)
+        self.assertEqual(job.state, "done")
+        payload = sync_queue.sync_status_payload("alice")
+        self.assertEqual((payload["state"], payload["pending"]), ("ready", False))
+
+    def test_claims_do_not_overlap_and_expired_leases_are_taken_over(self):
+        self.own("alice", [1, 2, 3])
+        sync_queue.start_sync_job("alice", owned=3, now=100)
+
+        token_a, first = sync_queue.claim_batch(2, lease_seconds=60, now=200)
+        token_b, second = sync_queue.claim_batch(2, lease_seconds=60, now=210)
+        self.assertEqual(first, [1, 2])
+        self.assertEqual(second, [3])
+        self.assertEqual(sync_queue.claim_batch(2, lease_seconds=60, now=220)[1], [])
+
+        # the first runner died: its claims come back after the lease
+        token_c, taken_over = sync_queue.claim_batch(5, lease_seconds=60, now=265)
+        self.assertEqual(taken_over, [1, 2])
+        # the old claimant can no longer record outcomes for them
+        sync_queue.finish_batch(token_a, {1: ("done", None), 2: ("done", None)}, now=266)
+        db.session.commit()
+        self.assertEqual(self.queue_states()[1], "claimed")
+
+    def test_runner_fills_catalog_and_finishes_jobs(self):
+        self.own("alice", [1, 2, 3])
+        self.own("bob", [3, 4])
+        sync_queue.start_sync_job("alice", owned=3)
+        sync_queue.start_sync_job("bob", owned=2)
+
+        engine = FakeEngine(missing={2})
+        runner = self.runner(engine, batch_size=3)
+        self.assertEqual(runner.run_once(), 3)
+        self.assertEqual(sync_queue.sync_status_payload("bob")["remaining"], 1)
+        self.assertEqual(runner.run_once(), 1)
+        self.assertEqual(runner.run_once(), 0)
+
+        self.assertEqual(sorted(engine.requested), [1, 2, 3, 4])
+        self.assertEqual(sorted(a for (a,) in db.session.query(GameCatalog.appid)), [1, 3, 4])
+        self.assertEqual(self.queue_states(), {1: "done", 2: "missing", 3: "done", 4: "done"})
+        self.assertEqual(sorted(sum(self.indexed, [])), [1, 3, 4])
+        self.assertIsNotNone(db.session.get(GameCatalog, 3).feature_version)
+        for steamid in ("alice", "bob"):
+            payload = sync_queue.sync_status_payload(steamid)
+            self.assertEqual((payload["state"], payload["pending"]), ("ready", False))
+
+    def test_whole_index_work_runs_once_per_job(self):
+        self.own("alice", [1, 2, 3, 4, 5])
+        sync_queue.start_sync_job("alice", owned=5)
+        runner = self.runner(FakeEngine(), batch_size=2)
+
+        runner.run_once()
+        runner.run_once()
+        self.assertEqual(len(self.indexed), 2)
+        self.assertEqual(self.synced, 0)
+        runner.run_once()  # last batch finishes the job
+        self.assertEqual(self.synced, 1)
+        runner.run_once()  # drained, nothing new indexed
+        self.assertEqual(self.synced, 1)
+
+    def test_failed_fetches_are_retried_then_given_up(self):
+        self.own("alice", [7])
+        sync_queue.start_sync_job("alice", owned=1)
+        runner = self.runner(FakeEngine(failing={7}))
+
+        for _ in range(sync_queue.MAX_ATTEMPTS - 1):
+            runner.run_once()
+            self.assertEqual(self.queue_states()[7], "pending")
+        runner.run_once()
+        self.assertEqual(self.queue_states()[7], "failed")
+        self.assertEqual(db.session.get(MetadataFetchTask, 7).last_error, "503 Service Unavailable")
+        self.assertFalse(sync_queue.sync_status_payload("alice")["pending"])
+
+    def test_appids_already_in_catalog_are_not_fetched(self):
+        self.own("alice", [5])
+        sync_queue.start_sync_job("alice", owned=1)
+        db.session.add(GameCatalog(appid=5, name="Synced elsewhere"))
+        db.session.commit()
+
+        engine = FakeEngine()
+        self.runner(engine).run_once()
+        self.assertEqual(engine.requested, [])
+        self.assertEqual(self.queue_states(), {5: "done"})
+
+    def test_stale_synced_rows_are_refreshed_without_holding_the_job(self):
+        db.session.add(GameCatalog(appid=8, name="Old name", metadata_synced_at=1000))
+        db.session.add(GameCatalog(appid=9, name="Imported"))  # never synced: left alone
+        db.session.commit()
+        self.own("alice", [8, 9])
+
+        job = sync_queue.start_sync_job("alice", owned=2, now=1000 + sync_queue.DEFAULT_REFRESH_SECONDS + 1)
+        self.assertEqual(self.queue_states(), {8: "pending"})
+        self.assertEqual(job.state, "done")
+
+        engine = FakeEngine()
+        self.runner(engine).run_once()
+        self.assertEqual(engine.requested, [8])
+        db.session.expire_all()
+        row = db.session.get(GameCatalog, 8)
+        self.assertEqual(row.name, "Game 8")
+        self.assertGreater(row.metadata_synced_at, 1000)
+        self.assertEqual(self.indexed, [[8]])
+
+
+class RunnerLockTests(unittest.TestCase):
+    def test_only_one_holder_until_it_lets_go(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "locks", sync_queue.RUNNER_LOCK_NAME)
+            first = sync_queue.acquire_runner_lock(path)
+            self.assertIsNotNone(first)
+            self.assertIsNone(sync_queue.acquire_runner_lock(path))
+            first.close()
+            second = sync_queue.acquire_runner_lock(path)
+            self.assertIsNotNone(second)
+            second.close()
+
+
+class CatalogWriterTests(SqliteAppTestCase):
+    def values(self, appid, name):
+        return catalog_values(appid, {"name": name, "genre": "RPG", "tags": {"Co-op": 5}}, {"platforms": {"mac": True}}, now=50)
+
+    def test_commits_each_chunk(self):
+        committed = []
+        writer = CatalogWriter(chunk_size=2, on_commit=lambda docs, appids, rows: committed.append(appids))
+        for appid in range(1, 6):
+            writer.add(self.values(appid, f"Game {appid}"))
+            if appid == 2:
+                # another session already sees the first chunk
+                with db.engine.connect() as conn:
+                    self.assertEqual(conn.execute(db.text("select count(*) from game_catalog")).scalar(), 2)
+        self.assertEqual(len(writer), 1)
+        writer.flush()
+        self.assertEqual(committed, [[1, 2], [3, 4], [5]])
+        self.assertEqual((writer.written, writer.chunks), (5, 3))
+        self.assertEqual(GameCatalog.query.count(), 5)
+
+    def test_upsert_refreshes_existing_rows(self):
+        db.session.add(GameCatalog(appid=1, name="Stale", about="kept"))
+        db.session.commit()
+        writer = CatalogWriter()
+        writer.add(self.values(1, "Fresh"))
+        writer.add(self.values(2, "New"))
+        writer.flush()
+
+        db.session.expire_all()
+        row = db.session.get(GameCatalog, 1)
+        self.assertEqual((row.name, row.about, row.mac, row.multiplayer_mode), ("Fresh", "kept", True, "coop"))
+        self.assertEqual(row.metadata_synced_at, 50)
+        self.assertIsNotNone(row.feature_version)
+        self.assertEqual(GameCatalog.query.count(), 2)
+
+    def test_same_appid_twice_in_a_chunk_keeps_the_last(self):
+        writer = CatalogWriter()
+        writer.add(self.values(3, "First"))
+        writer.add(self.values(3, "Second"))
+        self.assertEqual(writer.flush(), 1)
+        self.assertEqual(db.session.get(GameCatalog, 3).name, "Second")
+
+
+if __name__ == "__main__":
+    unittest.main()
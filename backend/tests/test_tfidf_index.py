@@ -0,0 +1,492 @@
+import os
+import random
+import tempfile
+import threading
+import unittest
+
+from app.services.columnar_index import ColumnarTfidfIndex, build_columnar_index_from_documents, split_by_doc_range
+from app.services.compact_vocab import CompactVocab
+from app.services.game_attributes import AttributeFilter, attach_attributes, attribute_columns
+from app.services.index_builder import build_index_streaming
+from app.services.index_format import IndexFormatError, load_binary_index, open_index, save_binary_index
+from app.services.index_manager import IndexManager
+from app.services.index_segments import SegmentStore
+from app.services.search_cache import QueryResultCache, make_cache_key
+from app.services.tfidf_index import build_index_from_documents, tokenize
+
+DOCUMENTS = [
+    "Stardew Valley\nSimulation, RPG\nFarming Sim, Cozy, Relaxing, Multiplayer",
+    "Counter-Strike 2\nAction, Free to Play\nFPS, Shooter, Competitive, Tactical, PvP",
+    "Hades\nAction, Indie, RPG\nRoguelike, Action Roguelike, Story Rich, Difficult",
+    "Slay the Spire\nStrategy, Indie\nRoguelike, Deckbuilding, Card Game, Difficult",
+    "Valheim\nAdventure, Indie, Early Access\nSurvival, Open World, Co-op, Crafting",
+    "Disco Elysium\nRPG\nStory Rich, Detective, Choices Matter, Narrative, Mystery",
+    "Deep Rock Galactic\nAction\nCo-op, FPS, Shooter, Mining, PvE",
+    "Unpacking\nIndie, Casual\nCozy, Relaxing, Puzzle, Wholesome",
+]
+APPIDS = [413150, 730, 1145360, 646570, 892970, 632470, 548430, 1135690]
+QUERIES = ["roguelike", "coop shooter", "cozy relaxing farming", "story rich detective", "indie", "nothing"]
+
+
+class ColumnarTfidfIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.legacy = build_index_from_documents(DOCUMENTS, APPIDS)
+        self.columnar = ColumnarTfidfIndex.from_tfidf_index(self.legacy)
+
+    def test_search_matches_legacy_index(self):
+        for query in QUERIES:
+            expected = self.legacy.search(query, topk=5)
+            actual = self.columnar.search(query, topk=5)
+            self.assertEqual(
+                sorted(doc_id for doc_id, _, _ in expected),
+                sorted(doc_id for doc_id, _, _ in actual),
+                query,
+            )
+            for (_, exp_score, exp_why), (_, act_score, act_why) in zip(expected, actual):
+                self.assertAlmostEqual(exp_score, act_score, places=5)
+                self.assertEqual(set(exp_why), set(act_why))
+
+    def test_search_orders_by_score_then_doc_id(self):
+        hits = self.columnar.search("indie roguelike", topk=8)
+        keys = [(-score, doc_id) for doc_id, score, _ in hits]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_why_terms_are_resolved_to_strings(self):
+        for index in (self.legacy, self.columnar):
+            _, _, why = index.search("detective story", topk=1)[0]
+            self.assertEqual(set(why), {"detective", "story"})
+            self.assertTrue(all(contrib > 0 for contrib in why.values()))
+
+    def test_postings_are_contiguous_arrays(self):
+        self.assertEqual(self.columnar.term_offsets[-1], self.columnar.doc_ids.size)
+        self.assertEqual(self.columnar.doc_ids.dtype.name, "int32")
+        self.assertEqual(self.columnar.weights.dtype.name, "float32")
+        self.assertEqual(list(self.columnar.doc_appids), APPIDS)
+
+
+class PrunedTopKSearchTests(unittest.TestCase):
+    TAGS = ["action", "indie", "rpg", "coop", "survival", "roguelike", "cozy", "puzzle", "fps", "story"]
+
+    def make_corpus(self, n=600, seed=3):
+        rng = random.Random(seed)
+        docs = []
+        for _ in range(n):
+            # skewed tag frequencies + repeats, so there are long lists and score ties
+            tags = [rng.choice(self.TAGS[: rng.randint(1, len(self.TAGS))]) for _ in range(rng.randint(1, 6))]
+            docs.append(" ".join(tags))
+        return ColumnarTfidfIndex.from_tfidf_index(build_index_from_documents(docs, list(range(n))))
+
+    def test_pruned_results_match_exhaustive_exactly(self):
+        index = self.make_corpus()
+        for query in ["action", "indie", "action indie", "coop survival story", "story story rpg", "fps puzzle cozy"]:
+            for topk in (1, 5, 10, 50, 1000):
+                self.assertEqual(
+                    index.search(query, topk=topk),
+                    index.search(query, topk=topk, exhaustive=True),
+                    (query, topk),
+                )
+
+    def test_impact_order_starts_with_term_upper_bound(self):
+        index = self.make_corpus()
+        tid = index.vocab["action"]
+        ids, weights = index.postings(tid)
+        start = index.term_offsets[tid]
+        self.assertAlmostEqual(
+            float(index.impact_values[start]),
+            float((weights / index.doc_norms[ids]).max()),
+            places=6,
+        )
+
+
+class BinaryIndexFormatTests(unittest.TestCase):
+    def setUp(self):
+        self.columnar = ColumnarTfidfIndex.from_tfidf_index(build_index_from_documents(DOCUMENTS, APPIDS))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "tfidf.idx")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_preserves_search_results(self):
+        save_binary_index(self.columnar, self.path)
+        mapped = load_binary_index(self.path)
+
+        self.assertEqual(mapped.vocab, self.columnar.vocab)
+        for query in QUERIES:
+            self.assertEqual(mapped.search(query, topk=5), self.columnar.search(query, topk=5))
+
+    def test_open_index_rejects_unknown_binary_version(self):
+        save_binary_index(self.columnar, self.path)
+        with open(self.path, "r+b") as f:
+            f.seek(8)
+            f.write((99).to_bytes(4, "little"))
+        with self.assertRaises(IndexFormatError):
+            open_index(self.path)
+
+
+class CompactVocabTests(unittest.TestCase):
+    def test_lookups_match_dict_in_both_directions(self):
+        rng = random.Random(5)
+        terms = sorted({"".join(rng.choice("abcdeé") for _ in range(rng.randint(1, 6))) for _ in range(3000)})
+        vocab = {term: tid for tid, term in enumerate(terms)}
+        compact = CompactVocab.from_dict(vocab)
+
+        self.assertEqual(compact, vocab)
+        self.assertEqual(list(compact.terms), terms)
+        for term in ["zz", "", "abcdeéa", "x" * 40]:
+            self.assertNotIn(term, compact)
+            self.assertIsNone(compact.get(term))
+        with self.assertRaises(KeyError):
+            compact["zz"]
+
+    def test_binary_index_serves_search_and_explanations_from_compact_vocab(self):
+        columnar = build_columnar_index_from_documents(DOCUMENTS, APPIDS)
+        with tempfile.TemporaryDirectory() as tmp:
+            mapped = load_binary_index(save_binary_index(columnar, os.path.join(tmp, "tfidf.idx")))
+
+            self.assertIsInstance(mapped.vocab, CompactVocab)
+            self.assertEqual(list(mapped.terms), list(columnar.terms))
+            for query in QUERIES:
+                self.assertEqual(mapped.search(query, topk=5), columnar.search(query, topk=5))
+
+
+class SegmentedIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SegmentStore(self.tmp.name)
+        self.store.write_main(ColumnarTfidfIndex.from_tfidf_index(build_index_from_documents(DOCUMENTS[:5], APPIDS[:5])))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def hit_appids(self, index, query):
+        return [int(index.doc_appids[doc_id]) for doc_id, _, _ in index.search(query, topk=10)]
+
+    def test_appended_documents_are_searchable(self):
+        self.store.append(DOCUMENTS[5:], APPIDS[5:])
+        index = self.store.load()
+
+        self.assertEqual(len(index.segments), 2)
+        self.assertIn(632470, self.hit_appids(index, "detective mystery"))
+        self.assertIn(413150, self.hit_appids(index, "cozy relaxing"))
+
+    def test_reindexed_appid_supersedes_older_segment(self):
+        self.store.append(["Stardew Valley\nSimulation\nHorror, Survival Horror"], [413150])
+        index = self.store.load()
+
+        self.assertNotIn(413150, self.hit_appids(index, "farming cozy"))
+        self.assertEqual(self.hit_appids(index, "horror"), [413150])
+
+    def test_merge_matches_full_rebuild(self):
+        self.store.append(DOCUMENTS[5:7], APPIDS[5:7])
+        self.store.append(DOCUMENTS[7:], APPIDS[7:])
+        self.assertIsNotNone(self.store.merge())
+
+        merged = self.store.load()
+        rebuilt = ColumnarTfidfIndex.from_tfidf_index(build_index_from_documents(DOCUMENTS, APPIDS))
+        self.assertEqual(len(merged.segments), 1)
+        for query in QUERIES:
+            expected = rebuilt.search(query, topk=5)
+            actual = merged.search(query, topk=5)
+            self.assertEqual(
+                [int(rebuilt.doc_appids[d]) for d, _, _ in expected],
+                [int(merged.doc_appids[d]) for d, _, _ in actual],
+                query,
+            )
+            for (_, exp_score, _), (_, act_score, _) in zip(expected, actual):
+                self.assertAlmostEqual(exp_score, act_score, places=5)
+
+    def test_replaced_files_outlive_one_generation_for_readers(self):
+        self.store.append(DOCUMENTS[5:], APPIDS[5:])
+        stale_manifest = self.store.read_manifest()
+        self.store.merge()
+        # a reader that read the manifest just before the merge can still load it
+        for entry in stale_manifest["segments"]:
+            load_binary_index(os.path.join(self.tmp.name, entry["file"]))
+
+        self.store.write_main(ColumnarTfidfIndex.from_tfidf_index(build_index_from_documents(DOCUMENTS, APPIDS)))
+        self.assertEqual(
+            sorted(f for f in os.listdir(self.tmp.name) if f.endswith(".idx")),
+            ["tfidf.seg-000003.idx", "tfidf.seg-000004.idx"],
+        )
+
+
+class ShardedIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SegmentStore(self.tmp.name)
+        self.index = build_columnar_index_from_documents(DOCUMENTS, APPIDS)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_shards_split_documents_into_contiguous_ranges(self):
+        shards = split_by_doc_range(self.index, 3)
+
+        self.assertEqual([s.num_docs for s in shards], [2, 3, 3])
+        self.assertEqual([a for s in shards for a in s.doc_appids.tolist()], APPIDS)
+        for shard in shards:
+            self.assertTrue(all(shard.document_frequency(tid) > 0 for tid in range(len(shard.terms))))
+
+    def test_sharded_search_matches_single_segment(self):
+        self.store.write_main(self.index)
+        single = self.store.load()
+        self.store.write_main(self.index, shards=3)
+        sharded = self.store.load()
+
+        self.assertEqual((len(sharded.segments), sharded.num_shards), (3, 3))
+        for scorer in ("tfidf", "bm25f"):
+            for query in QUERIES:
+                for topk in (1, 3, 10):
+                    for exhaustive in (False, True):
+                        self.assertEqual(
+                            sharded.search(query, topk=topk, exhaustive=exhaustive, scorer=scorer),
+                            single.search(query, topk=topk, exhaustive=exhaustive, scorer=scorer),
+                            (scorer, query, topk),
+                        )
+
+    def test_merge_keeps_shard_count(self):
+        self.store.write_main(build_columnar_index_from_documents(DOCUMENTS[:6], APPIDS[:6]), shards=2)
+        self.store.append(DOCUMENTS[6:], APPIDS[6:])
+        index = self.store.load()
+        self.assertEqual((len(index.deltas), index.delta_docs()), (1, 2))
+
+        self.assertIsNotNone(self.store.merge())
+        merged = self.store.load()
+        self.assertEqual((len(merged.segments), merged.num_shards), (2, 2))
+        self.assertEqual(sorted(os.listdir(self.tmp.name))[-2:], ["tfidf.seg-000003-s00.idx", "tfidf.seg-000003-s01.idx"])
+        self.assertIn(632470, [int(merged.doc_appids[d]) for d, _, _ in merged.search("detective mystery")])
+
+
+class StreamingIndexBuilderTests(unittest.TestCase):
+    def build(self, workers):
+        rows = list(zip(APPIDS, DOCUMENTS))
+        batches = [rows[i:i + 3] for i in range(0, len(rows), 3)]
+        index, work_dir = build_index_streaming(batches, workers=workers)
+        self.addCleanup(work_dir.cleanup)
+        return index
+
+    def test_streaming_build_matches_in_memory_build(self):
+        expected = ColumnarTfidfIndex.from_tfidf_index(build_index_from_documents(DOCUMENTS, APPIDS))
+        for workers in (1, 2):
+            index = self.build(workers)
+            self.assertEqual(index.vocab, expected.vocab)
+            self.assertEqual(index.term_offsets.tolist(), expected.term_offsets.tolist())
+            self.assertEqual(index.doc_ids.tolist(), expected.doc_ids.tolist())
+            self.assertEqual(index.impact_doc_ids.tolist(), expected.impact_doc_ids.tolist())
+            for query in QUERIES:
+                self.assertEqual(
+                    [(d, round(s, 5)) for d, s, _ in index.search(query, topk=5)],
+                    [(d, round(s, 5)) for d, s, _ in expected.search(query, topk=5)],
+                )
+
+
+class IndexManagerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SegmentStore(self.tmp.name)
+        self.store.write_main(ColumnarTfidfIndex.from_tfidf_index(build_index_from_documents(DOCUMENTS[:5], APPIDS[:5])))
+        self.manager = IndexManager(self.tmp.name, poll_interval=0.0)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def wait_for_version(self, version):
+        for _ in range(200):
+            if self.manager.snapshot().version == version:
+                return
+            threading.Event().wait(0.01)
+        self.fail(f"index never reached {version}")
+
+    def test_new_version_is_swapped_in_without_disturbing_old_snapshot(self):
+        old = self.manager.current()
+        self.assertEqual(old.version, "v1")
+
+        self.store.append(DOCUMENTS[5:], APPIDS[5:])
+        self.assertTrue(self.manager.maybe_reload())
+        self.wait_for_version("v2")
+
+        self.assertEqual(old.index.search("detective mystery", topk=3), [])
+        self.assertTrue(self.manager.current().index.search("detective mystery", topk=3))
+        self.assertEqual(self.manager.status()["docs"], len(APPIDS))
+
+    def test_unchanged_index_is_not_reloaded(self):
+        self.manager.current()
+        self.assertFalse(self.manager.maybe_reload())
+
+
+class Bm25fScorerTests(unittest.TestCase):
+    def setUp(self):
+        self.index = build_columnar_index_from_documents(DOCUMENTS, APPIDS)
+
+    def test_title_hit_outranks_tag_hit(self):
+        docs = ["Crafting Quest\nAdventure\nSurvival", "Survival Island\nAdventure\nCrafting"]
+        index = build_columnar_index_from_documents(docs, [1, 2])
+        self.assertEqual([d for d, _, _ in index.search("survival", scorer="tfidf")], [0, 1])
+        self.assertEqual([d for d, _, _ in index.search("survival", scorer="bm25f")], [1, 0])
+
+    def test_pruned_results_match_exhaustive_exactly(self):
+        for query in QUERIES:
+            for topk in (1, 3, 8):
+                self.assertEqual(
+                    self.index.search(query, topk=topk, scorer="bm25f"),
+                    self.index.search(query, topk=topk, exhaustive=True, scorer="bm25f"),
+                )
+
+    def test_streaming_and_binary_indexes_keep_bm25f_values(self):
+        rows = list(zip(APPIDS, DOCUMENTS))
+        streamed, work_dir = build_index_streaming([rows[:3], rows[3:]], workers=1)
+        self.addCleanup(work_dir.cleanup)
+        self.assertEqual(streamed.bm25_weights.tolist(), self.index.bm25_weights.tolist())
+        self.assertEqual(streamed.bm25_impact_doc_ids.tolist(), self.index.bm25_impact_doc_ids.tolist())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            mapped = load_binary_index(save_binary_index(streamed, os.path.join(tmp, "tfidf.idx")))
+            for query in QUERIES:
+                self.assertEqual(mapped.search(query, scorer="bm25f"), self.index.search(query, scorer="bm25f"))
+
+    def test_segments_carry_bm25f_through_append_and_merge(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SegmentStore(tmp)
+            store.write_main(build_columnar_index_from_documents(DOCUMENTS[:5], APPIDS[:5]))
+            store.append(DOCUMENTS[5:], APPIDS[5:])
+            index = store.load()
+            hits = index.search("detective", scorer="bm25f")
+            self.assertEqual(int(index.doc_appids[hits[0][0]]), 632470)
+
+            store.merge()
+            merged = store.load()
+            self.assertTrue(merged.supports("bm25f"))
+            self.assertEqual(
+                [int(merged.doc_appids[d]) for d, _, _ in merged.search("roguelike", scorer="bm25f")],
+                [int(self.index.doc_appids[d]) for d, _, _ in self.index.search("roguelike", scorer="bm25f")],
+            )
+
+    def test_tombstoned_postings_do_not_make_idf_negative(self):
+        docs = ["Dead Cells\nAction\nRoguelike", "Hades\nAction\nRoguelike"]
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SegmentStore(tmp)
+            store.write_main(build_columnar_index_from_documents(docs, [1, 2]))
+            store.append(docs, [1, 2])
+            store.append(docs, [1, 2])
+            index = store.load()
+            self.assertGreater(index.document_frequency("roguelike"), index.num_live_docs)
+
+            [(_, weight)] = index.query_weights("roguelike", scorer="bm25f")
+            self.assertGreater(weight, 0.0)
+            for topk in (1, 2):
+                self.assertEqual(
+                    index.search("roguelike", topk=topk, scorer="bm25f"),
+                    index.search("roguelike", topk=topk, exhaustive=True, scorer="bm25f"),
+                )
+            self.assertEqual(sorted(int(index.doc_appids[d]) for d, _, _ in index.search("roguelike", scorer="bm25f")), [1, 2])
+
+    def test_indexes_without_field_statistics_reject_bm25f(self):
+        legacy = build_index_from_documents(DOCUMENTS, APPIDS)
+        with self.assertRaises(ValueError):
+            legacy.search("roguelike", scorer="bm25f")
+        with self.assertRaises(ValueError):
+            ColumnarTfidfIndex.from_tfidf_index(legacy).search("roguelike", scorer="bm25f")
+
+# (appid, windows, mac, linux, multiplayer_mode, difficulty, positive, negative)
+CATALOG_ROWS = [
+    (413150, True, True, True, "coop", "low", 600000, 9000),
+    (730, True, False, True, "pvp", "medium", 7000000, 1000000),
+    (1145360, True, True, False, "solo", "high", 250000, 3000),
+    (646570, True, True, True, "solo", "high", 150000, 4000),
+    (892970, True, False, False, "coop", "medium", 380000, 20000),
+    (632470, True, True, False, "solo", "medium", 4000, 500),
+    (548430, True, False, True, "coop", "high", 220000, 6000),
+    (1135690, True, True, True, "solo", "low", 30000, 400),
+]
+
+
+class AttributeFilterTests(unittest.TestCase):
+    def setUp(self):
+        self.index = build_columnar_index_from_documents(DOCUMENTS, APPIDS)
+        attach_attributes(self.index, attribute_columns(CATALOG_ROWS, APPIDS))
+        self.unfiltered = build_columnar_index_from_documents(DOCUMENTS, APPIDS)
+
+    def expected(self, query, filters, topk):
+        # over-fetch everything, then filter rows: what callers had to do before
+        passing = {row[0] for row in CATALOG_ROWS if filters.matches(_Row(row))}
+        hits = self.unfiltered.search(query, topk=len(APPIDS), exhaustive=True)
+        return [h for h in hits if int(self.unfiltered.doc_appids[h[0]]) in passing][:topk]
+
+    def test_filtered_search_matches_filtering_after_the_fact(self):
+        cases = [
+            AttributeFilter(platforms=("linux",), multiplayer_modes=("coop",)),
+            AttributeFilter(min_reviews=200000),
+            AttributeFilter(difficulties=("high",), platforms=("mac", "linux")),
+            AttributeFilter(multiplayer_modes=("mmo",)),
+        ]
+        for filters in cases:
+            for query in QUERIES + ["coop shooter roguelike cozy"]:
+                for topk in (1, 3):
+                    self.assertEqual(self.index.search(query, topk=topk, filters=filters), self.expected(query, filters, topk))
+
+    def test_payload_parsing_rejects_unknown_values(self):
+        parsed = AttributeFilter.from_payload({"platforms": "Linux", "multiplayer_modes": ["coop", "pvp"], "min_reviews": "5000"})
+        self.assertEqual(parsed, AttributeFilter(platforms=("linux",), multiplayer_modes=("coop", "pvp"), min_reviews=5000))
+        self.assertTrue(AttributeFilter.from_payload(None).is_empty())
+        with self.assertRaises(ValueError):
+            AttributeFilter.from_payload({"platforms": ["switch"]})
+
+    def test_attributes_survive_binary_format_append_and_merge(self):
+        filters = AttributeFilter(platforms=("linux",), min_reviews=100000)
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SegmentStore(tmp)
+            main = build_columnar_index_from_documents(DOCUMENTS[:5], APPIDS[:5])
+            store.write_main(attach_attributes(main, attribute_columns(CATALOG_ROWS, APPIDS[:5])))
+            store.append(DOCUMENTS[5:], APPIDS[5:], attribute_columns(CATALOG_ROWS, APPIDS[5:]))
+            expected = {int(self.index.doc_appids[d]) for d, _, _ in self.index.search("fps shooter", filters=filters)}
+            for index in (store.load(), store.load().merged()):
+                # delta weights use older idf, so compare the filtered hit sets
+                hits = index.search("fps shooter", filters=filters)
+                self.assertEqual({int(index.doc_appids[d]) for d, _, _ in hits}, expected)
+            self.assertEqual(expected, {730, 548430})
+
+    def test_indexes_without_attributes_reject_filters(self):
+        with self.assertRaises(ValueError):
+            self.unfiltered.search("shooter", filters=AttributeFilter(min_reviews=1))
+        self.assertTrue(self.unfiltered.search("shooter", filters=AttributeFilter()))
+
+
+class _Row:
+    def __init__(self, row):
+        (self.appid, self.windows, self.mac, self.linux,
+         self.multiplayer_mode, self.difficulty, self.positive, self.negative) = row
+
+
+class QueryResultCacheTests(unittest.TestCase):
+    def test_key_uses_token_multiset_topk_and_version(self):
+        key = make_cache_key(tokenize("Coop Survival"), 10, "v3")
+        self.assertEqual(key, make_cache_key(tokenize("survival, coop"), 10, "v3"))
+        self.assertNotEqual(key, make_cache_key(tokenize("survival coop coop"), 10, "v3"))
+        self.assertNotEqual(key, make_cache_key(tokenize("coop survival"), 20, "v3"))
+        self.assertNotEqual(key, make_cache_key(tokenize("coop survival"), 10, "v4"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = QueryResultCache(max_entries=2, ttl_seconds=60)
+        cache.put("a", [1])
+        cache.put("b", [2])
+        self.assertEqual(cache.get("a"), [1])
+        cache.put("c", [3])
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), [1])
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 1, 1))
+
+    def test_expired_and_cleared_entries_miss(self):
+        cache = QueryResultCache(max_entries=4, ttl_seconds=0)
+        cache.put("a", [])
+        self.assertIsNone(cache.get("a"))
+        cache = QueryResultCache(max_entries=4, ttl_seconds=60)
+        cache.put("a", [])
+        self.assertEqual(cache.get("a"), [])
+        cache.clear()
+        self.assertIsNone(cache.get("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,6 +7,10 @@ import RecommendationsDashboardPage from './pages/RecommendationsDashboardPage'
 
 const TOKEN_KEY = 'wtp_token'
 const API_BASE_URL = (import.meta.env.VITE_API_BASE_URL || '').replace(/\/$/, '')
+// owned games are filtered client-side, so keep paging until enough survive to fill the list
+const PUBLIC_PAGE_SIZE = 40
+const PUBLIC_VISIBLE_COUNT = 7
+const PUBLIC_MAX_PAGES = 5
 
 const FALLBACK_GAMES = [
   {
@@ -172,18 +176,30 @@ async function apiRequest(path, { method = 'GET', body, token } = {}) {
   return payload
 }
 
-async function fetchPublicRecommendations({ timeAvailable, energy, goal, device, friendsOnline }) {
-  const payload = await apiRequest('/api/public/recommend', {
-    method: 'POST',
-    body: {
-      timeAvailable,
-      energy: energy.toLowerCase(),
-      goal: goal.toLowerCase(),
-      device: device.toLowerCase(),
-      friendsOnline,
-    },
-  })
-  return payload.results || []
+async function fetchPublicRecommendations({ timeAvailable, energy, goal, device, friendsOnline, isExcluded = () => false }) {
+  const results = []
+  let kept = 0
+  let offset = 0
+  for (let page = 0; page < PUBLIC_MAX_PAGES && offset !== null; page += 1) {
+    const payload = await apiRequest('/api/public/recommend', {
+      method: 'POST',
+      body: {
+        timeAvailable,
+        energy: energy.toLowerCase(),
+        goal: goal.toLowerCase(),
+        device: device.toLowerCase(),
+        friendsOnline,
+        limit: PUBLIC_PAGE_SIZE,
+        offset,
+      },
+    })
+    const pageResults = payload.results || []
+    results.push(...pageResults)
+    kept += pageResults.filter((game) => !isExcluded(game)).length
+    if (kept >= PUBLIC_VISIBLE_COUNT) break
+    offset = payload.nextOffset ?? null
+  }
+  return results
 }
 
 async function fetchOwnedLibraryIndex({ token }) {
@@ -305,15 +321,15 @@ function App() {
     () => new Set(ownedLibraryTitles.map((title) => normalizeTitle(title)).filter(Boolean)),
     [ownedLibraryTitles],
   )
+  const isOwnedGame = useCallback((game) => {
+    const steamAppID = Number(game.steamAppID || game.steam_appid || 0)
+    if (steamAppID && ownedAppidSet.has(steamAppID)) return true
+    const titleKey = normalizeTitle(game.title)
+    return Boolean(titleKey && ownedTitleSet.has(titleKey))
+  }, [ownedAppidSet, ownedTitleSet])
   const filteredPublicRankedGames = useMemo(
-    () => publicRankedGames.filter((game) => {
-      const steamAppID = Number(game.steamAppID || game.steam_appid || 0)
-      if (steamAppID && ownedAppidSet.has(steamAppID)) return false
-      const titleKey = normalizeTitle(game.title)
-      if (titleKey && ownedTitleSet.has(titleKey)) return false
-      return true
-    }),
-    [publicRankedGames, ownedAppidSet, ownedTitleSet],
+    () => publicRankedGames.filter((game) => !isOwnedGame(game)),
+    [publicRankedGames, isOwnedGame],
   )
   const publicVisibleGames = useMemo(
     () => filteredPublicRankedGames.filter((g) => !publicDismissedIds.has(g.id || g.appid)),
@@ -322,7 +338,7 @@ function App() {
   const topPick = visibleGames[0] || null
   const alternatives = useMemo(() => visibleGames.slice(1, 6), [visibleGames])
   const publicTopPick = publicVisibleGames[0] || null
-  const publicAlternatives = useMemo(() => publicVisibleGames.slice(1, 7), [publicVisibleGames])
+  const publicAlternatives = useMemo(() => publicVisibleGames.slice(1, PUBLIC_VISIBLE_COUNT), [publicVisibleGames])
 
   const getScoreSummary = (score) => {
     const rounded = Math.round(Number(score) || 0)
@@ -572,7 +588,14 @@ function App() {
         }
 
         try {
-          const publicRanked = await fetchPublicRecommendations({ timeAvailable, energy, goal, device, friendsOnline })
+          const publicRanked = await fetchPublicRecommendations({
+            timeAvailable,
+            energy,
+            goal,
+            device,
+            friendsOnline,
+            isExcluded: isOwnedGame,
+          })
           setPublicRankedGames(publicRanked)
           setPublicDismissedIds(new Set())
           setSelectedPublicAlternativeId(null)